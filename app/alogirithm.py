@@ -1,30 +1,429 @@
 from sentence_transformers import SentenceTransformer
-from sqlalchemy import create_engine, text
+from sqlalchemy import select, text
+from itertools import groupby
+import logging
 import numpy as np
 import os
+import time
+
+from app.database import engine, ResearcherEmbedding
+from app.utils.diversity import MATCH_MMR_CANDIDATES, diversify_matches, diversity_enabled
+from app.utils.match_cache import cache_matches, get_cached_matches
+from app.utils.profile_cards import CARD_FIELDS, hydrate_matches
+from app.utils.reranker import RERANK_TOP_N, rerank_matches, reranker_enabled
+from app.utils.snapshot_utils import EMBEDDING_DIMENSION
+from app.utils.timing import StageTimer
+
+logger = logging.getLogger(__name__)
 
 # --- 1. Load Model and Connect to DB ---
-# These are loaded once when the FastAPI server starts.
-DATABASE_URL = "postgresql://rudradesai@localhost/matchmaking_db"
-engine = create_engine(DATABASE_URL)
+# These are loaded once when the FastAPI server starts; the engine (and its
+# connection pool) is shared with the rest of the app.
 model = SentenceTransformer('all-MiniLM-L6-v2')
 print("Model and DB Engine loaded for matchmaking.")
 
-def find_db_matches(user_query, user_intent, user_wants_resource_type, current_user_id=None):
+# "postgres" queries pgvector; "memory" scans an in-process copy of researcher_embeddings
+# (see app.utils.exact_search); "snapshot" scans a local snapshot (see app.utils.offline_search)
+MATCH_BACKEND = os.getenv("MATCH_BACKEND", "postgres").lower()
+MATCH_LIMIT = 5
+
+# Hybrid retrieval: fuse the vector ranking with a full-text ranking using reciprocal
+# rank fusion, score = sum(1 / (MATCH_RRF_K + rank)) over the two rankings. Databases
+# without profiles.search_vector (app/migrate_profile_search.py not run yet) fall
+# back to the vector ranking alone.
+MATCH_HYBRID = os.getenv("MATCH_HYBRID", "true").strip().lower() in ("1", "true", "yes", "on")
+MATCH_HYBRID_CANDIDATES = int(os.getenv("MATCH_HYBRID_CANDIDATES", "50"))
+MATCH_RRF_K = int(os.getenv("MATCH_RRF_K", "60"))
+
+# Multi-vector scoring over profile_chunk_embeddings: "off" uses the single profile
+# vector, "max" the best chunk (max-sim), "topm" the mean of the MATCH_CHUNK_TOP_M best chunks
+MATCH_CHUNK_SCORING = os.getenv("MATCH_CHUNK_SCORING", "off").lower()
+MATCH_CHUNK_TOP_M = int(os.getenv("MATCH_CHUNK_TOP_M", "3"))
+# Nearest chunks considered before grouping by profile
+MATCH_CHUNK_CANDIDATES = int(os.getenv("MATCH_CHUNK_CANDIDATES", "500"))
+
+# Publication-aware scoring: blend the profile similarity with the similarity of the
+# profile's best-matching publication (0 = off). Publications are searched among the
+# MATCH_PUBLICATION_CANDIDATES nearest ones.
+MATCH_PUBLICATION_WEIGHT = float(os.getenv("MATCH_PUBLICATION_WEIGHT", "0"))
+MATCH_PUBLICATION_CANDIDATES = int(os.getenv("MATCH_PUBLICATION_CANDIDATES", "200"))
+
+# Mutual scoring: blend the query similarity with the similarity between the searcher's
+# own stored profile vector and each candidate's, so two-sided fits rank first
+# (0 = off). The blend re-orders the MATCH_MUTUAL_CANDIDATES best query matches.
+MATCH_MUTUAL_WEIGHT = float(os.getenv("MATCH_MUTUAL_WEIGHT", "0"))
+MATCH_MUTUAL_CANDIDATES = int(os.getenv("MATCH_MUTUAL_CANDIDATES", "50"))
+
+# pgvector's HNSW scan yields at most hnsw.ef_search rows (default 40) before the
+# profile filters (intent, status, self-exclusion) run, so a filtered LIMIT above
+# that comes back short. Each statement raises it for its own transaction to
+# MATCH_HNSW_EF_FACTOR times the candidates it needs (at least MATCH_HNSW_EF_SEARCH,
+# at most pgvector's maximum of 1000); the factor leaves room for rows the filters drop.
+MATCH_HNSW_EF_SEARCH = int(os.getenv("MATCH_HNSW_EF_SEARCH", "40"))
+MATCH_HNSW_EF_FACTOR = float(os.getenv("MATCH_HNSW_EF_FACTOR", "4"))
+HNSW_EF_SEARCH_MAX = 1000
+
+def match_cache_key(user_query, user_intent, user_wants_resource_type, current_user_id=None):
+    """Cache key for a match request; query text is compared case- and whitespace-insensitively"""
+    return (
+        " ".join((user_query or "").lower().split()),
+        (user_intent or "").strip().lower(),
+        (user_wants_resource_type or "").strip().lower(),
+        current_user_id,
+        MATCH_BACKEND,
+    )
+
+
+_search_vector_available = None
+
+
+def hybrid_available():
     """
-    Finds top matches by running a hybrid query against the PostgreSQL database.
+    True when MATCH_HYBRID is on and profiles.search_vector exists; the column
+    is looked up once per process
+    """
+    global _search_vector_available
+    if not MATCH_HYBRID:
+        return False
+    if _search_vector_available is None:
+        with engine.connect() as connection:
+            _search_vector_available = bool(connection.execute(text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                    AND table_name = 'profiles' AND column_name = 'search_vector'
+                )
+            """)).scalar())
+        if not _search_vector_available:
+            logger.warning(
+                "MATCH_HYBRID is on but profiles.search_vector is missing; matching is vector-only "
+                "until app/migrate_profile_search.py has run (restart to pick it up)"
+            )
+    return _search_vector_available
+
+
+# Profiles whose only vector is the legacy profiles.embedding column (databases that have
+# not finished app/migrate_retire_legacy_embeddings.py) stay matchable through a slower
+# fallback; rechecked every LEGACY_VECTORS_RECHECK_SECONDS until none are left
+LEGACY_VECTORS_RECHECK_SECONDS = 300
+_legacy_vectors_needed = None
+_legacy_vectors_checked_at = 0.0
+
+
+def legacy_vectors_needed():
+    """
+    True while some profile has a legacy profiles.embedding vector but no
+    researcher_embeddings row. Once none are left the answer is kept for the
+    rest of the process.
+    """
+    global _legacy_vectors_needed, _legacy_vectors_checked_at
+    if _legacy_vectors_needed is False:
+        return False
+    now = time.monotonic()
+    if _legacy_vectors_needed is None or now - _legacy_vectors_checked_at >= LEGACY_VECTORS_RECHECK_SECONDS:
+        with engine.connect() as connection:
+            needed = bool(connection.execute(text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                    AND table_name = 'profiles' AND column_name = 'embedding'
+                )
+            """)).scalar())
+            if needed:
+                needed = bool(connection.execute(text("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM profiles p
+                        WHERE p.embedding IS NOT NULL
+                        AND NOT EXISTS (SELECT 1 FROM researcher_embeddings re WHERE re.user_id = p.id)
+                    )
+                """)).scalar())
+        if needed and _legacy_vectors_needed is None:
+            logger.warning(
+                "Some profiles only have a legacy profiles.embedding vector; matching falls back to it "
+                "until app/migrate_retire_legacy_embeddings.py has backfilled them"
+            )
+        _legacy_vectors_needed, _legacy_vectors_checked_at = needed, now
+    return _legacy_vectors_needed
+
+
+def _profile_vectors_sql():
+    """Relation of (user_id, embedding, embedding_source) the match statements rank"""
+    return _LEGACY_VECTORS_SQL if legacy_vectors_needed() else _VECTORS_SQL
+
+
+def find_db_matches(user_query, user_intent, user_wants_resource_type, current_user_id=None, timer=None):
+    """
+    Finds top matches for a query using the configured MATCH_BACKEND.
     Intelligently excludes the current user from their own search results.
     
+    When a cross-encoder is configured (see app.utils.reranker) the backend
+    returns RERANK_TOP_N candidates which are re-ordered within the rerank
+    latency budget before trimming to MATCH_LIMIT. With diversity enabled
+    (see app.utils.diversity) the final MATCH_LIMIT are picked from the pool
+    by maximal marginal relevance. Final results are cached for
+    MATCH_CACHE_TTL_SECONDS.
+    
     Args:
         user_query: Search query text
         user_intent: 'seek' or 'share'
         user_wants_resource_type: Resource type filter
         current_user_id: ID of the current user (to exclude from results)
+        timer: Optional StageTimer that records encode/retrieve/rerank durations
     """
-    with engine.connect() as connection:
-        # Generate the embedding for the user's query
+    timer = timer or StageTimer()
+    cache_key = match_cache_key(user_query, user_intent, user_wants_resource_type, current_user_id)
+    matches = get_cached_matches(cache_key)
+    if matches is not None:
+        return matches
+
+    candidates = retrieve_matches(user_query, user_intent, user_wants_resource_type, current_user_id, timer)
+    matches = refine_matches(user_query, candidates, timer)
+    cache_matches(cache_key, matches)
+    return matches
+
+
+def retrieve_matches(user_query, user_intent, user_wants_resource_type, current_user_id=None, timer=None):
+    """
+    First stage of find_db_matches: encode the query and retrieve candidates.
+    
+    Returns:
+        list: Candidates best first; enough of them for re-ranking and
+        diversification when those are enabled, MATCH_LIMIT otherwise
+    """
+    timer = timer or StageTimer()
+
+    # Generate the embedding for the user's query
+    with timer.stage("encode"):
         query_embedding = model.encode([user_query])[0]
 
+    limit = MATCH_LIMIT
+    if reranker_enabled():
+        limit = max(limit, RERANK_TOP_N)
+    if diversity_enabled():
+        limit = max(limit, MATCH_MMR_CANDIDATES)
+
+    with timer.stage("retrieve"):
+        if MATCH_BACKEND == "memory":
+            from app.utils.exact_search import find_memory_matches
+            return find_memory_matches(
+                query_embedding, user_intent, user_wants_resource_type, current_user_id, limit=limit,
+                mutual_weight=MATCH_MUTUAL_WEIGHT
+            )
+        if MATCH_BACKEND == "snapshot":
+            from app.utils.offline_search import get_snapshot_matcher
+            return get_snapshot_matcher().find_matches(
+                query_embedding, user_intent, user_wants_resource_type, current_user_id, limit=limit,
+                mutual_weight=MATCH_MUTUAL_WEIGHT
+            )
+        return find_postgres_matches(
+            query_embedding, user_intent, user_wants_resource_type, current_user_id,
+            query_text=user_query if hybrid_available() else None, limit=limit
+        )
+
+
+def refine_matches(user_query, candidates, timer=None):
+    """
+    Second stage of find_db_matches: re-rank candidates (when a cross-encoder
+    is configured), then diversify (when enabled) or trim to MATCH_LIMIT.
+    """
+    timer = timer or StageTimer()
+    matches = candidates
+
+    if reranker_enabled():
+        with timer.stage("rerank"):
+            matches, rerank_status = rerank_matches(user_query, candidates)
+        if rerank_status != "ok":
+            timer.describe("rerank", rerank_status)
+
+    if diversity_enabled() and len(matches) > MATCH_LIMIT:
+        with timer.stage("diversify"):
+            embeddings = candidate_embeddings([match["id"] for match in matches])
+            matches = diversify_matches(matches, embeddings, MATCH_LIMIT)
+
+    return matches[:MATCH_LIMIT]
+
+
+def candidate_embeddings(profile_ids):
+    """
+    Profile vectors row-aligned with profile_ids (zeros where a profile has none),
+    from the in-process index for the memory/snapshot backends and one
+    researcher_embeddings query otherwise
+    """
+    if MATCH_BACKEND == "memory":
+        from app.utils.exact_search import get_memory_index
+        return get_memory_index().vectors(profile_ids)
+    if MATCH_BACKEND == "snapshot":
+        from app.utils.offline_search import get_snapshot_matcher
+        return get_snapshot_matcher().index.vectors(profile_ids)
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(ResearcherEmbedding.user_id, ResearcherEmbedding.embedding)
+            .where(ResearcherEmbedding.user_id.in_(profile_ids))
+        ).fetchall()
+    by_id = dict(rows)
+    vectors = np.zeros((len(profile_ids), EMBEDDING_DIMENSION), dtype=np.float32)
+    for i, profile_id in enumerate(profile_ids):
+        if by_id.get(profile_id) is not None:
+            vectors[i] = by_id[profile_id]
+    return vectors
+
+
+def find_db_matches_batch(queries, current_user_id=None, timer=None):
+    """
+    Finds top matches for several queries at once.
+    
+    All query texts are encoded in one model call and retrieved in one pass:
+    a single LATERAL query for the postgres backend, one matrix-matrix product
+    for the memory and snapshot backends. Hybrid fusion, chunk/publication
+    scoring and re-ranking are per-query refinements and are not applied here.
+    
+    Args:
+        queries: List of (user_query, user_intent, user_wants_resource_type)
+        current_user_id: ID of the current user (to exclude from results)
+        timer: Optional StageTimer that records the encode duration, and the
+            retrieve duration for the memory and snapshot backends
+    
+    Returns:
+        iterator: (query index, matches) pairs in query order; postgres results
+        are yielded while rows are still being read, so their retrieval happens
+        as the caller consumes the iterator
+    """
+    timer = timer or StageTimer()
+    filters = [(user_intent, resource_type) for _, user_intent, resource_type in queries]
+
+    with timer.stage("encode"):
+        query_embeddings = model.encode([user_query for user_query, _, _ in queries])
+
+    if MATCH_BACKEND in ("memory", "snapshot"):
+        with timer.stage("retrieve"):
+            if MATCH_BACKEND == "memory":
+                from app.utils.exact_search import find_memory_matches_batch
+                results = find_memory_matches_batch(query_embeddings, filters, current_user_id, limit=MATCH_LIMIT)
+            else:
+                from app.utils.offline_search import get_snapshot_matcher
+                results = get_snapshot_matcher().find_matches_batch(
+                    query_embeddings, filters, current_user_id, limit=MATCH_LIMIT
+                )
+        return iter(enumerate(results))
+    return find_postgres_matches_batch(query_embeddings, filters, current_user_id)
+
+
+def hnsw_ef_search(candidates):
+    """hnsw.ef_search for a statement whose filtered scans must yield `candidates` rows"""
+    return int(min(max(MATCH_HNSW_EF_SEARCH, candidates * MATCH_HNSW_EF_FACTOR), HNSW_EF_SEARCH_MAX))
+
+
+def _widen_hnsw_search(connection, candidates):
+    """Raise hnsw.ef_search for the connection's current transaction (SET LOCAL)"""
+    connection.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+        {"ef_search": str(hnsw_ef_search(candidates))}
+    )
+
+
+def find_postgres_matches_batch(query_embeddings, filters, current_user_id=None, limit=MATCH_LIMIT):
+    """
+    Vector matches for several queries with one statement: the queries are
+    unnested into rows and each one drives a LATERAL top-k subquery.
+    
+    Args:
+        query_embeddings: One embedding per query
+        filters: (user_intent, resource_type) per query
+        current_user_id: ID of the current user (to exclude from results)
+        limit: Maximum matches per query
+    
+    Yields:
+        tuple: (query index, matches) for every query, in order; display
+        fields come from the profile card cache
+    """
+    exclusion = "AND p.id != :current_user_id" if current_user_id is not None else ""
+    distance = _distance_sql("q.query_vector")
+    vectors = _profile_vectors_sql()
+    sql_query = text(f"""
+        WITH queries AS (
+            SELECT q.query_index, q.embedding::vector AS query_vector, q.opposite_intent, q.resource_type_filter
+            FROM unnest(
+                CAST(:query_indexes AS integer[]),
+                CAST(:query_embeddings AS text[]),
+                CAST(:opposite_intents AS text[]),
+                CAST(:resource_type_filters AS text[])
+            ) AS q(query_index, embedding, opposite_intent, resource_type_filter)
+        )
+        SELECT q.query_index, m.*
+        FROM queries q
+        CROSS JOIN LATERAL (
+            SELECT p.id,
+                   1 - {distance} AS match_score,
+                   {_EMBEDDING_SOURCE_SQL} AS embedding_source
+            FROM {vectors} re
+            JOIN profiles p ON p.id = re.user_id
+            WHERE p.seek_share ILIKE q.opposite_intent
+            AND p.resource_type ILIKE q.resource_type_filter
+            AND p.status = 'active'
+            {exclusion}
+            ORDER BY {distance}
+            LIMIT :match_limit
+        ) m
+        ORDER BY q.query_index, m.match_score DESC;
+    """)
+    query_params = {
+        "query_indexes": list(range(len(filters))),
+        "query_embeddings": [str(list(embedding)) for embedding in query_embeddings],
+        "opposite_intents": ['share' if user_intent.lower() == 'seek' else 'seek' for user_intent, _ in filters],
+        "resource_type_filters": [f"%{resource_type or ''}%" for _, resource_type in filters],
+        "match_limit": limit,
+        "current_user_id": current_user_id,
+    }
+
+    next_index = 0
+    with engine.connect() as connection:
+        _widen_hnsw_search(connection, limit)
+        rows = connection.execution_options(stream_results=True).execute(sql_query, query_params)
+        for query_index, group in groupby(rows, key=lambda row: row.query_index):
+            # Queries without any match produce no rows
+            for empty_index in range(next_index, query_index):
+                yield empty_index, []
+            matches = []
+            for row in group:
+                match = dict(row._mapping)
+                del match["query_index"]
+                matches.append(match)
+            yield query_index, hydrate_matches(matches)
+            next_index = query_index + 1
+    for empty_index in range(next_index, len(filters)):
+        yield empty_index, []
+
+
+def find_postgres_matches(query_embedding, user_intent, user_wants_resource_type, current_user_id=None, query_text=None,
+                          limit=MATCH_LIMIT, chunk_scoring=None, publication_weight=None, mutual_weight=None):
+    """
+    Finds top matches by running a hybrid query against the PostgreSQL database.
+    
+    Args:
+        query_embedding: Embedding of the search query
+        user_intent: 'seek' or 'share'
+        user_wants_resource_type: Resource type filter
+        current_user_id: ID of the current user (to exclude from results)
+        query_text: Raw query; when given, a full-text ranking over profiles.search_vector
+            is fused with the vector ranking in the same statement
+        limit: Maximum number of matches
+        chunk_scoring: "off", "max" or "topm" (defaults to MATCH_CHUNK_SCORING)
+        publication_weight: Weight of the best-matching publication, 0 to disable
+            (defaults to MATCH_PUBLICATION_WEIGHT)
+        mutual_weight: Weight of the searcher-profile to candidate similarity, 0 to
+            disable (defaults to MATCH_MUTUAL_WEIGHT); needs current_user_id
+    
+    The statement ranks ids and scores only; the display fields are added from
+    the profile card cache (see app.utils.profile_cards).
+    """
+    chunk_scoring = chunk_scoring or MATCH_CHUNK_SCORING
+    publication_weight = MATCH_PUBLICATION_WEIGHT if publication_weight is None else publication_weight
+    mutual_weight = MATCH_MUTUAL_WEIGHT if mutual_weight is None else mutual_weight
+    mutual = mutual_weight > 0 and current_user_id is not None
+    vectors = _profile_vectors_sql()
+    
+    with engine.connect() as connection:
         # Determine the opposite intent for the filter
         opposite_intent = 'share' if user_intent.lower() == 'seek' else 'seek'
 
@@ -34,9 +433,9 @@ def find_db_matches(user_query, user_intent, user_wants_resource_type, current_u
 
         # --- Build the Hybrid SQL Query with Intelligent Self-Exclusion ---
         base_conditions = [
-            "seek_share ILIKE :opposite_intent",
-            "resource_type ILIKE :resource_type_filter",
-            "status = :status_filter"  # Only show active users in matches
+            "p.seek_share ILIKE :opposite_intent",
+            "p.resource_type ILIKE :resource_type_filter",
+            "p.status = :status_filter"  # Only show active users in matches
         ]
         
         # Add intelligent self-exclusion filter
@@ -44,41 +443,296 @@ def find_db_matches(user_query, user_intent, user_wants_resource_type, current_u
             "query_embedding": str(list(query_embedding)),
             "opposite_intent": opposite_intent,
             "resource_type_filter": f"%{resource_filter}%",
-            "status_filter": "active"  # Only match with active users
+            "status_filter": "active",  # Only match with active users
+            "match_limit": limit,
+            "candidate_limit": limit,
         }
         
         if current_user_id is not None:
-            base_conditions.append("id != :current_user_id")
+            base_conditions.append("p.id != :current_user_id")
             query_params["current_user_id"] = current_user_id
         
         where_clause = " AND ".join(base_conditions)
         
-        # Hybrid SQL Query: Use new async embeddings when available, fall back to old embeddings
-        sql_query = text(f"""
-            SELECT p.id, p.name, p.email, p.organization, p.research_area, p.primary_text, p.resource_type,
-                   CASE 
-                       WHEN re.embedding IS NOT NULL THEN 1 - (re.embedding <=> :query_embedding)
-                       ELSE 1 - (p.embedding <=> :query_embedding)
-                   END AS match_score,
-                   CASE 
-                       WHEN re.embedding IS NOT NULL THEN 'async'
-                       ELSE 'legacy'
-                   END AS embedding_source
-            FROM profiles p
-            LEFT JOIN researcher_embeddings re ON p.id = re.user_id
-            WHERE {where_clause}
-            AND (re.embedding IS NOT NULL OR p.embedding IS NOT NULL)
-            ORDER BY 
-                CASE 
-                    WHEN re.embedding IS NOT NULL THEN re.embedding <=> :query_embedding
-                    ELSE p.embedding <=> :query_embedding
-                END
-            LIMIT 5;
-        """)
-
-        # Execute the query and fetch the results
+        # With publications and/or mutual scoring blended in, the vector ranking
+        # becomes an input CTE of the blended "semantic" ranking
+        query_ranking_name = "query_ranking" if mutual else "semantic"
+        ranking_name = "profile_ranking" if publication_weight > 0 else query_ranking_name
+        if chunk_scoring in ("max", "topm"):
+            semantic = _chunk_semantic_sql(where_clause, chunk_scoring, ranking_name, vectors)
+            query_params.update({"chunk_candidates": MATCH_CHUNK_CANDIDATES, "chunk_top_m": MATCH_CHUNK_TOP_M})
+        else:
+            semantic = _profile_semantic_sql(where_clause, ranking_name, vectors)
+        
+        extra_columns = ()
+        if publication_weight > 0:
+            semantic = _publication_semantic_sql(where_clause, semantic, query_ranking_name, vectors)
+            extra_columns = PUBLICATION_COLUMNS
+            query_params.update({
+                "publication_weight": publication_weight,
+                "publication_candidates": MATCH_PUBLICATION_CANDIDATES,
+            })
+        
+        if mutual:
+            semantic = _mutual_semantic_sql(semantic, extra_columns, vectors)
+            extra_columns = extra_columns + MUTUAL_COLUMNS
+            query_params.update({
+                "mutual_weight": mutual_weight,
+                "candidate_limit": max(MATCH_MUTUAL_CANDIDATES, limit),
+            })
+        
+        if query_text and query_text.strip():
+            query_params.update({
+                "query_text": query_text,
+                "candidate_limit": max(MATCH_HYBRID_CANDIDATES, query_params["candidate_limit"]),
+                "rrf_k": MATCH_RRF_K,
+            })
+            sql_query = _hybrid_sql(where_clause, semantic, extra_columns, vectors)
+        else:
+            sql_query = _semantic_sql(semantic, extra_columns)
+
+        # Same transaction as the SET LOCAL, so every HNSW scan in the statement sees it;
+        # the chunk and publication scans need their own, larger candidate counts
+        _widen_hnsw_search(connection, max(
+            query_params.get(name, 0) for name in ("candidate_limit", "chunk_candidates", "publication_candidates")
+        ))
+        # Execute the query and fetch the results (ids and scores)
         results = connection.execute(sql_query, query_params).fetchall()
 
-        # Convert the database rows into a list of dictionaries
-        matches = [dict(row._mapping) for row in results]
-        return matches
\ No newline at end of file
+    # Convert the database rows into dictionaries with the display fields added
+    return hydrate_matches([dict(row._mapping) for row in results])
+
+
+def _distance_sql(query_vector=":query_embedding"):
+    """Cosine distance between the profile vector (re, see _profile_vectors_sql) and query_vector"""
+    return f"(re.embedding <=> {query_vector})"
+
+
+_DISTANCE_SQL = _distance_sql()
+
+# Profile vectors, aliased "re" in the statements. The subquery is flattened by the
+# planner, so ORDER BY distance still walks the researcher_embeddings HNSW index.
+_VECTORS_SQL = "(SELECT user_id, embedding, 'async' AS embedding_source FROM researcher_embeddings)"
+# The same plus profiles that only have the legacy column; that branch is a sequential scan
+_LEGACY_VECTORS_SQL = """(
+    SELECT user_id, embedding, 'async' AS embedding_source FROM researcher_embeddings
+    UNION ALL
+    SELECT lp.id, lp.embedding, 'legacy' FROM profiles lp
+    WHERE lp.embedding IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM researcher_embeddings lr WHERE lr.user_id = lp.id)
+)"""
+
+_EMBEDDING_SOURCE_SQL = "re.embedding_source"
+
+# Extra columns returned by the publication-aware and mutual rankings
+PUBLICATION_COLUMNS = ("best_publication", "publication_score")
+MUTUAL_COLUMNS = ("query_score", "reciprocal_score")
+# Every key a match can carry: card fields plus the scores of each ranking mode
+MATCH_FIELDS = CARD_FIELDS + (
+    "match_score", "embedding_source", "fused_score", "lexical_score", "rerank_score"
+) + PUBLICATION_COLUMNS + MUTUAL_COLUMNS
+
+
+# Each semantic ranking is a list of CTEs ending in "semantic", which yields
+# (id, match_score, embedding_source, semantic_rank, ...) for the :candidate_limit
+# best filtered profiles.
+
+def _profile_semantic_sql(where_clause, name="semantic", vectors=_VECTORS_SQL):
+    """Ranking by the single profile vector"""
+    return f"""{name} AS (
+        SELECT p.id,
+               1 - {_DISTANCE_SQL} AS match_score,
+               {_EMBEDDING_SOURCE_SQL} AS embedding_source,
+               ROW_NUMBER() OVER (ORDER BY {_DISTANCE_SQL}) AS semantic_rank
+        FROM {vectors} re
+        JOIN profiles p ON p.id = re.user_id
+        WHERE {where_clause}
+        ORDER BY {_DISTANCE_SQL}
+        LIMIT :candidate_limit
+    )"""
+
+
+def _chunk_semantic_sql(where_clause, chunk_scoring, name="semantic", vectors=_VECTORS_SQL):
+    """
+    Multi-vector ranking: the nearest :chunk_candidates chunks of eligible profiles are
+    grouped per profile and scored by their best chunk ("max") or the mean of the
+    :chunk_top_m best chunks ("topm").
+
+    Profiles without chunk rows (embedded before chunking was enabled, and not
+    re-embedded since because their text is unchanged) are ranked by their
+    profile vector instead, so they stay matchable until a forced reindex
+    (``cli/embedding_cli.py reindex --force``) gives them chunks.
+    """
+    aggregate = (
+        "MAX(1 - h.distance)" if chunk_scoring == "max"
+        else "AVG(1 - h.distance) FILTER (WHERE h.chunk_rank <= :chunk_top_m)"
+    )
+    return f"""{name} AS (
+        SELECT g.id, g.match_score, g.embedding_source,
+               ROW_NUMBER() OVER (ORDER BY g.match_score DESC, g.id) AS semantic_rank
+        FROM (
+            SELECT pv.id, pv.match_score, pv.embedding_source
+            FROM (
+                SELECT p.id, 1 - {_DISTANCE_SQL} AS match_score, {_EMBEDDING_SOURCE_SQL} AS embedding_source
+                FROM {vectors} re
+                JOIN profiles p ON p.id = re.user_id
+                WHERE {where_clause}
+                AND NOT EXISTS (SELECT 1 FROM profile_chunk_embeddings ce WHERE ce.profile_id = p.id)
+                ORDER BY {_DISTANCE_SQL}
+                LIMIT :candidate_limit
+            ) pv
+            UNION ALL
+            SELECT h.profile_id AS id, {aggregate} AS match_score, 'chunks' AS embedding_source
+            FROM (
+                SELECT c.profile_id, c.distance,
+                       ROW_NUMBER() OVER (PARTITION BY c.profile_id ORDER BY c.distance) AS chunk_rank
+                FROM (
+                    SELECT ce.profile_id, ce.embedding <=> :query_embedding AS distance
+                    FROM profile_chunk_embeddings ce
+                    JOIN profiles p ON p.id = ce.profile_id
+                    WHERE {where_clause}
+                    ORDER BY distance
+                    LIMIT :chunk_candidates
+                ) c
+            ) h
+            GROUP BY h.profile_id
+        ) g
+        ORDER BY g.match_score DESC, g.id
+        LIMIT :candidate_limit
+    )"""
+
+
+def _publication_semantic_sql(where_clause, profile_ranking, name="semantic", vectors=_VECTORS_SQL):
+    """
+    Blend a vector ranking (a CTE named profile_ranking) with each profile's
+    best-matching publication.
+
+    Candidates are the ranking's profiles plus the owners of the
+    :publication_candidates nearest publications, so a strong publication can
+    surface a profile the vector ranking missed. Each candidate's best publication
+    is picked per profile (DISTINCT ON) and the score becomes
+    (1 - w) * profile similarity + w * publication similarity, where profiles
+    without a matching publication keep their profile similarity.
+    """
+    profile_similarity = f"COALESCE(pr.match_score, 1 - {_DISTANCE_SQL})"
+    blended = f"""
+        (1 - :publication_weight) * {profile_similarity}
+        + :publication_weight * COALESCE(bp.similarity, {profile_similarity})
+    """
+    return f"""{profile_ranking},
+    publication_hits AS (
+        SELECT pe.profile_id, pe.publication_id, 1 - (pe.embedding <=> :query_embedding) AS similarity
+        FROM publication_embeddings pe
+        JOIN profiles p ON p.id = pe.profile_id
+        WHERE {where_clause}
+        ORDER BY pe.embedding <=> :query_embedding
+        LIMIT :publication_candidates
+    ),
+    best_publication AS (
+        SELECT DISTINCT ON (h.profile_id) h.profile_id, h.similarity, pub.title
+        FROM publication_hits h
+        JOIN publications pub ON pub.id = h.publication_id
+        ORDER BY h.profile_id, h.similarity DESC
+    ),
+    {name} AS (
+        SELECT c.id,
+               {blended} AS match_score,
+               COALESCE(pr.embedding_source, {_EMBEDDING_SOURCE_SQL}) AS embedding_source,
+               bp.title AS best_publication,
+               bp.similarity AS publication_score,
+               ROW_NUMBER() OVER (ORDER BY {blended} DESC, c.id) AS semantic_rank
+        FROM (SELECT id FROM profile_ranking UNION SELECT profile_id FROM best_publication) c
+        JOIN profiles p ON p.id = c.id
+        LEFT JOIN {vectors} re ON p.id = re.user_id
+        LEFT JOIN profile_ranking pr ON pr.id = c.id
+        LEFT JOIN best_publication bp ON bp.profile_id = c.id
+        WHERE (pr.id IS NOT NULL OR re.embedding IS NOT NULL)
+        ORDER BY semantic_rank
+        LIMIT :candidate_limit
+    )"""
+
+
+def _mutual_semantic_sql(query_ranking, extra_columns=(), vectors=_VECTORS_SQL):
+    """
+    Re-score a ranking (a CTE named query_ranking) in both directions.
+
+    The searcher's stored profile vector is compared with each candidate's
+    vector in the same statement, and the score becomes
+    (1 - w) * query similarity + w * reciprocal similarity. When the searcher
+    has no stored vector the query similarity is kept.
+    """
+    reciprocal = f"1 - {_distance_sql('sv.embedding')}"
+    blended = f"(1 - :mutual_weight) * q.match_score + :mutual_weight * COALESCE({reciprocal}, q.match_score)"
+    return f"""{query_ranking},
+    searcher AS (
+        SELECT sr.embedding FROM {vectors} sr WHERE sr.user_id = :current_user_id
+    ),
+    semantic AS (
+        SELECT q.id,
+               {blended} AS match_score,
+               q.embedding_source{_extra_select("q", extra_columns)},
+               q.match_score AS query_score,
+               {reciprocal} AS reciprocal_score,
+               ROW_NUMBER() OVER (ORDER BY {blended} DESC, q.semantic_rank) AS semantic_rank
+        FROM query_ranking q
+        JOIN profiles p ON p.id = q.id
+        LEFT JOIN {vectors} re ON p.id = re.user_id
+        LEFT JOIN searcher sv ON TRUE
+    )"""
+
+
+def _extra_select(prefix, extra_columns):
+    return "".join(f", {prefix}.{column}" for column in extra_columns)
+
+
+def _semantic_sql(semantic, extra_columns=()):
+    """Vector-only matches"""
+    return text(f"""
+        WITH {semantic}
+        SELECT s.id, s.match_score, s.embedding_source{_extra_select("s", extra_columns)}
+        FROM semantic s
+        ORDER BY s.semantic_rank
+        LIMIT :match_limit;
+    """)
+
+
+def _hybrid_sql(where_clause, semantic, extra_columns=(), vectors=_VECTORS_SQL):
+    """
+    Semantic and lexical candidates fused with reciprocal rank fusion in one statement.
+
+    Each ranking contributes its top :candidate_limit profiles; a profile found
+    by only one of them still scores. match_score stays the vector similarity
+    so clients see the same scale as before; fused_score decides the order.
+    """
+    return text(f"""
+        WITH {semantic},
+        lexical AS (
+            SELECT p.id,
+                   ts_rank_cd(p.search_vector, q.query) AS lexical_score,
+                   ROW_NUMBER() OVER (ORDER BY ts_rank_cd(p.search_vector, q.query) DESC, p.id) AS lexical_rank
+            FROM profiles p
+            CROSS JOIN websearch_to_tsquery('english', :query_text) AS q(query)
+            JOIN {vectors} re ON p.id = re.user_id
+            WHERE {where_clause}
+            AND p.search_vector @@ q.query
+            ORDER BY lexical_score DESC, p.id
+            LIMIT :candidate_limit
+        ),
+        fused AS (
+            SELECT COALESCE(s.id, l.id) AS id, s.semantic_rank, s.match_score, s.embedding_source,
+                   l.lexical_score{_extra_select("s", extra_columns)},
+                   (COALESCE(1.0 / (:rrf_k + s.semantic_rank), 0)
+                    + COALESCE(1.0 / (:rrf_k + l.lexical_rank), 0))::double precision AS fused_score
+            FROM semantic s
+            FULL OUTER JOIN lexical l ON s.id = l.id
+        )
+        SELECT f.id,
+               COALESCE(f.match_score, 1 - {_DISTANCE_SQL}) AS match_score,
+               COALESCE(f.embedding_source, {_EMBEDDING_SOURCE_SQL}) AS embedding_source,
+               f.fused_score,
+               f.lexical_score{_extra_select("f", extra_columns)}
+        FROM fused f
+        LEFT JOIN {vectors} re ON re.user_id = f.id
+        ORDER BY f.fused_score DESC, f.semantic_rank NULLS LAST
+        LIMIT :match_limit;
+    """)
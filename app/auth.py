@@ -1,25 +1,80 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException, Depends, status
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from pydantic import SecretStr
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi.security import OAuth2PasswordBearer
 
 from app import database, schemas
+from app.utils.cache_utils import TTLCache
 
 SECRET_KEY = "A_very_secret_key_xyz" 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_Context = CryptContext(schemes=['bcrypt'] , deprecated = "auto", bcrypt__rounds=4)
+# Resolved users are cached per bearer token so authenticated requests skip
+# the JWT decode and the users lookup. Entries never outlive the token itself.
+USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+# Columns kept out of the cache; they are lazy-loaded if a caller needs them
+_USER_CACHE_EXCLUDED_FIELDS = {"hashed_password"}
+
+_user_cache = TTLCache(ttl_seconds=USER_CACHE_TTL_SECONDS, max_entries=USER_CACHE_MAX_ENTRIES)
+
+# bcrypt work factor. Stored hashes below it are upgraded on the next login.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+# Size of the dedicated hashing pool. bcrypt releases the GIL, so threads run
+# in parallel while keeping the event loop and the default threadpool free.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_Context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated="auto",
+    bcrypt__default_rounds=PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=PASSWORD_HASH_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 def get_hashed_pass(password):
     return pwd_Context.hash(password)
 def verify_hashed_pass(plain_password , hashed_password):
-    return pwd_Context.verify(plain_password , hashed_password)
+    return _verify_and_update(plain_password, hashed_password)[0]
+
+def _verify_and_update(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and produce a replacement hash if the stored one is outdated
+
+    Unknown users and unusable hashes (e.g. imported accounts) still pay for a
+    dummy verification so response times don't reveal which emails exist.
+    """
+    if not hashed_password or pwd_Context.identify(hashed_password, required=False) is None:
+        pwd_Context.dummy_verify()
+        return False, None
+    return pwd_Context.verify_and_update(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the dedicated hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_Context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the dedicated hashing pool
+
+    Returns:
+        tuple: (is_valid, new_hash) where new_hash is set when the stored hash
+        should be replaced because it uses an outdated work factor
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, _verify_and_update, plain_password, hashed_password)
 def create_Access_token(data : dict , expires_delta : Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -40,6 +95,66 @@ def verify_access_token(token: str):
     except JWTError:
         return None
 
+def _snapshot_user(user: database.User) -> dict:
+    """Copy the cacheable column values of a loaded user"""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in sa_inspect(database.User).column_attrs
+        if attr.key not in _USER_CACHE_EXCLUDED_FIELDS
+    }
+
+
+def _attach_cached_user(snapshot: dict, db: Session) -> database.User:
+    """
+    Rebuild a user from its cached snapshot and attach it to ``db`` without a query.
+
+    A fresh instance is built for every request so callers can modify it and
+    commit through their own session exactly as with a queried user.
+    """
+    user = database.User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def resolve_user(token: str, db: Session) -> Optional[database.User]:
+    """
+    Resolve the user owning a bearer token, using the per-token cache
+
+    Args:
+        token: Encoded JWT access token
+        db: Request database session
+
+    Returns:
+        User bound to ``db``, or None if the token is invalid or the user is gone
+    """
+    snapshot = _user_cache.get(token)
+    if snapshot is not None:
+        return _attach_cached_user(snapshot, db)
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    token_data = schemas.TokenData(email=payload.get("sub"))
+    if token_data.email is None:
+        return None
+
+    user = db.query(database.User).filter(database.User.email == token_data.email).first()
+    if user is None:
+        return None
+
+    ttl = USER_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    _user_cache.set(token, _snapshot_user(user), ttl_seconds=ttl)
+    return user
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Drop every cached token entry for a user (call after the user is modified)"""
+    _user_cache.delete_where(lambda token, snapshot: snapshot.get("id") == user_id)
+
+
 def get_current_user(token : str = Depends(oauth2_scheme) , db : Session = Depends(database.get_db)):
     
     credential_Exception = HTTPException(
@@ -48,16 +163,7 @@ def get_current_user(token : str = Depends(oauth2_scheme) , db : Session = Depen
         headers = {"WWW-Authenticate": "Bearer"}
     )
 
-    try:
-         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-         email: str = payload.get("sub")
-         if email is None:
-            raise credential_Exception
-         token_data = schemas.TokenData(email=email)
-    except JWTError:
-        raise credential_Exception
-    
-    user = db.query(database.User).filter(database.User.email == token_data.email).first()
+    user = resolve_user(token, db)
     if user is None:
         raise credential_Exception
     return user
\ No newline at end of file
@@ -7,6 +7,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Interactive lane: registrations and profile edits, consumed by their own worker pool
+EMBEDDING_INTERACTIVE_QUEUE = "embeddings.interactive"
+# Bulk lane: reindexes and backfills, rate limited so they cannot starve the database or encoder
+EMBEDDING_BULK_QUEUE = "embeddings.bulk"
+# Batch tasks each bulk worker starts per time unit (Celery rate limit syntax; empty = unlimited)
+EMBEDDING_BULK_RATE_LIMIT = os.getenv("EMBEDDING_BULK_RATE_LIMIT", "30/m") or None
+# Seconds to wait for a broker connection before a publish fails
+BROKER_CONNECT_TIMEOUT = float(os.getenv("BROKER_CONNECT_TIMEOUT", "2"))
 
 celery_app = Celery(
     "matchmaking",
@@ -23,7 +31,8 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    task_track_started=True,
+    # Embedding tasks report progress to embedding_jobs (app.tasks.jobs), not the result backend
+    task_track_started=False,
     task_time_limit=10 * 60,  # 10 minutes (reduced)
     task_soft_time_limit=8 * 60,  # 8 minutes (reduced)
     worker_prefetch_multiplier=1,  # Process one task at a time
@@ -33,9 +42,19 @@ celery_app.conf.update(
     task_max_retries=2,  # Reduced retries
     worker_max_tasks_per_child=10,  # Restart worker after 10 tasks to prevent memory leaks
     worker_max_memory_per_child=200000,  # 200MB memory limit per worker
+    broker_connection_timeout=BROKER_CONNECT_TIMEOUT,
+    broker_transport_options={"socket_connect_timeout": BROKER_CONNECT_TIMEOUT},
+    # Publishing also subscribes to the result; don't retry that for 20 seconds
+    result_backend_transport_options={"retry_policy": {"max_retries": 2}},
+    redis_socket_connect_timeout=BROKER_CONNECT_TIMEOUT,
+    task_default_queue=EMBEDDING_INTERACTIVE_QUEUE,
     task_routes={
-        "app.tasks.embedding_tasks.embed_profile": {"queue": "embeddings"},
-        # Remove bulk reindex task - too memory intensive
+        "app.tasks.embedding_tasks.embed_profile": {"queue": EMBEDDING_INTERACTIVE_QUEUE},
+        "app.tasks.embedding_tasks.embed_profiles_batch": {"queue": EMBEDDING_BULK_QUEUE},
+        "app.tasks.embedding_tasks.reindex_all_profiles": {"queue": EMBEDDING_BULK_QUEUE},
+    },
+    task_annotations={
+        "app.tasks.embedding_tasks.embed_profiles_batch": {"rate_limit": EMBEDDING_BULK_RATE_LIMIT},
     },
 )
 
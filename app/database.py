@@ -1,11 +1,196 @@
-from sqlalchemy import ForeignKey, Column, Integer, String, Text, create_engine, DateTime, Index
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import ForeignKey, Column, Integer, Float, Boolean, String, Text, create_engine, DateTime, Index, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import sessionmaker, relationship, column_property
+from sqlalchemy.pool import NullPool, QueuePool
 from pgvector.sqlalchemy import Vector
 from datetime import datetime
 
-DATABASE_URL = "postgresql://rudradesai@localhost/matchmaking_db"
-engine = create_engine(DATABASE_URL)
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://rudradesai@localhost/matchmaking_db")
+# Hosted Postgres providers still hand out the legacy postgres:// scheme
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
+
+# Connection pool settings (see .env.example)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# Transaction-pooling PgBouncer: no client-side pool, no startup parameters
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)
+DB_POOL_WAIT_WARN_MS = float(os.getenv("DB_POOL_WAIT_WARN_MS", "100"))
+
+
+class PoolMetrics:
+    """
+    Counters describing connection pool usage
+
+    Updated from pool events and from the timed checkout in the pool classes
+    below, so pool exhaustion shows up in logs and in /admin/db/pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.slow_checkouts = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if seconds * 1000 >= DB_POOL_WAIT_WARN_MS:
+                self.slow_checkouts += 1
+
+    def snapshot(self, pool=None) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "avg_wait_ms": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    """Measure how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            # Counted and logged as a timeout only, not as a (slow) wait
+            pool_metrics._incr("timeouts")
+            logger.error(f"Connection pool exhausted after {time.perf_counter() - start:.2f}s: {self.status()}")
+            raise
+        waited = time.perf_counter() - start
+        pool_metrics.record_wait(waited)
+        if waited * 1000 >= DB_POOL_WAIT_WARN_MS:
+            logger.warning(f"Waited {waited * 1000:.0f}ms for a database connection: {self.status()}")
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+
+def _register_pool_events(engine: Engine) -> None:
+    event.listen(engine, "connect", lambda dbapi_conn, record: pool_metrics._incr("connects"))
+    event.listen(engine, "checkout", lambda dbapi_conn, record, proxy: pool_metrics._incr("checkouts"))
+    event.listen(engine, "checkin", lambda dbapi_conn, record: pool_metrics._incr("checkins"))
+    event.listen(engine, "invalidate", lambda dbapi_conn, record, exc: pool_metrics._incr("invalidations"))
+
+
+def create_db_engine(url: Optional[str] = None, **overrides) -> Engine:
+    """
+    Create a SQLAlchemy engine configured from the environment
+
+    Args:
+        url: Database URL (defaults to DATABASE_URL)
+        **overrides: Keyword arguments passed through to create_engine
+
+    Returns:
+        Engine: Engine with an instrumented connection pool
+    """
+    url = url or DATABASE_URL
+    is_postgres = make_url(url).get_backend_name() == "postgresql"
+    options: Dict[str, Any] = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    if DB_PGBOUNCER:
+        # PgBouncer owns the pooling; every checkout is a fresh client connection
+        options["poolclass"] = InstrumentedNullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        if is_postgres and DB_STATEMENT_TIMEOUT_MS > 0:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    options.update(overrides)
+    new_engine = create_engine(url, **options)
+    _register_pool_events(new_engine)
+
+    if DB_PGBOUNCER and is_postgres and DB_STATEMENT_TIMEOUT_MS > 0:
+        # Session settings would leak across clients in transaction pooling,
+        # so the timeout is scoped to each transaction instead
+        @event.listens_for(new_engine, "begin")
+        def _set_local_statement_timeout(conn):
+            cursor = conn.connection.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+            cursor.close()
+
+    return new_engine
+
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """Return pool configuration, counters and current occupancy"""
+    return {
+        "pgbouncer_mode": DB_PGBOUNCER,
+        "pool_class": type(engine.pool).__name__,
+        "max_connections": None if DB_PGBOUNCER else DB_POOL_SIZE + DB_MAX_OVERFLOW,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+        **pool_metrics.snapshot(engine.pool),
+    }
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autoflush=False, autocommit=False, bind=engine)
 Base = declarative_base()
 
@@ -28,32 +213,60 @@ class SavedMatch(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     matched_profile_id = Column(Integer, ForeignKey("profiles.id"))
-    match_score = Column(String, nullable=True)  # Store the match score as string (e.g., "85%")
+    match_score = Column(Float, nullable=True)  # Match score as a percentage (e.g., 85.0)
+    
+    __table_args__ = (
+        # Target of the ON CONFLICT upserts; one bookmark per (user, profile)
+        Index("uq_saved_matches_user_profile", "user_id", "matched_profile_id", unique=True),
+        # Keyset pagination of a user's saved list (newest first)
+        Index("ix_saved_matches_user_id_id", "user_id", "id"),
+    )
+
+# Weighted full-text document for lexical matching (research area > description > primary text).
+# Shared with app/migrate_profile_search.py.
+PROFILE_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(research_area, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(primary_text, '')), 'C')"
+)
+
 
 class Profile(Base):
     __tablename__ = "profiles"
     id = Column(Integer, primary_key=True , index = True)
     name = Column(String , nullable = True)
-    email = Column(String , nullable = True)
-    organization = Column(String , nullable = True)
-    seek_share = Column(String , nullable = True)
-    resource_type = Column(String , nullable = True)
+    email = Column(String , nullable = True, index = True)
+    # active_history: facet counts need the previous value even when the
+    # attribute was expired (e.g. after a commit) before being overwritten
+    organization = column_property(Column(String , nullable = True), active_history=True)
+    seek_share = column_property(Column(String , nullable = True), active_history=True)
+    resource_type = column_property(Column(String , nullable = True), active_history=True)
     description = Column(Text , nullable = True)
-    research_area = Column(String , nullable = True)
+    research_area = column_property(Column(String , nullable = True), active_history=True)
     primary_text = Column(String , nullable = True)
-    embedding = Column(Vector(384))
-    status = Column(String, nullable=False, default="active")  # active or inactive
+    status = column_property(Column(String, nullable=False, default="active"), active_history=True)  # active or inactive
     
     # Proof of work fields for building trust
     h_index = Column(Integer, nullable=True)  # H-index metric
     citations = Column(Integer, nullable=True)  # Total citation count
     funding_summary = Column(Text, nullable=True)  # Summary of funding received
     
+    # Generated by Postgres from the text fields; only read inside match queries.
+    # Left unmapped (see __mapper_args__) so inserts do not RETURNING it, which
+    # would fail on databases that have not run app/migrate_profile_search.py
+    search_vector = Column(TSVECTOR, Computed(PROFILE_SEARCH_VECTOR_SQL, persisted=True))
+    
     # Relationship to embeddings
     researcher_embedding = relationship("ResearcherEmbedding", back_populates="profile", uselist=False)
     
     # Relationship to publications (one-to-many)
     publications = relationship("Publication", back_populates="profile", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_profiles_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
 
 class Publication(Base):
@@ -93,6 +306,97 @@ class ResearcherEmbedding(Base):
     )
 
 
+class PublicationEmbedding(Base):
+    __tablename__ = "publication_embeddings"
+    
+    publication_id = Column(Integer, ForeignKey("publications.id", ondelete="CASCADE"), primary_key=True)
+    # Denormalized from publications so matches can group by profile without a join
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    embedding = Column(Vector(384), nullable=False)
+    model_version = Column(String, nullable=False, default="all-MiniLM-L6-v2")
+    text_sha256 = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index(
+            "idx_publication_embeddings_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"}
+        ),
+    )
+
+
+class ProfileChunkEmbedding(Base):
+    __tablename__ = "profile_chunk_embeddings"
+    
+    # One row per field/sentence chunk of a profile; replaced whenever the
+    # profile's researcher_embeddings row is recomputed
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    field = Column(String, nullable=False)  # research_area, description or primary_text
+    chunk_index = Column(Integer, nullable=False)
+    chunk_text = Column(Text, nullable=False)
+    embedding = Column(Vector(384), nullable=False)
+    model_version = Column(String, nullable=False, default="all-MiniLM-L6-v2")
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index(
+            "idx_profile_chunk_embeddings_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"}
+        ),
+    )
+
+
+class EmbeddingJob(Base):
+    __tablename__ = "embedding_jobs"
+    
+    # Progress of tracked embedding tasks (reindexes and admin/CLI triggers),
+    # keyed by Celery task ID; embedding tasks store no Celery results
+    id = Column(String(64), primary_key=True)
+    kind = Column(String(20), nullable=False)  # profile or reindex
+    status = Column(String(20), nullable=False, default="queued")  # queued, dispatching, running, completed, failed
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProfileFacetCount(Base):
+    __tablename__ = "profile_facet_counts"
+    
+    # Active profiles per (intent, facet, value), kept current by the profile
+    # hooks and rebuilt after bulk loads (see app.utils.facets)
+    seek_share = Column(String, primary_key=True)
+    facet = Column(String, primary_key=True)  # resource_type, organization or research_area
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Top values of one facet without scanning the rest
+        Index("ix_profile_facet_counts_top", "seek_share", "facet", "count"),
+    )
+
+
+class IngestCheckpoint(Base):
+    __tablename__ = "ingest_checkpoints"
+    
+    # One row per ingested source file; lets an interrupted import resume
+    source = Column(String, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # SHA256 of the file contents
+    rows_done = Column(Integer, nullable=False, default=0)
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -2,14 +2,39 @@
 Database event hooks for automatic embedding task enqueuing
 """
 import logging
-from sqlalchemy import event
-from sqlalchemy.orm import Session
+from types import SimpleNamespace
 
-from app.database import Profile
+from sqlalchemy import Connection, event, inspect, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from app.database import Profile, Publication, ResearcherEmbedding, User
 from app.tasks.embedding_tasks import embed_profile
+from app.tasks.publisher import task_publisher
+from app.utils.embedding_utils import compute_text_hash, create_profile_text
+from app.utils.facets import FACET_SOURCE_FIELDS, apply_facet_delta, facet_keys
+from app.utils.match_cache import invalidate_matches
+from app.utils.profile_cache import invalidate_profile, invalidate_profiles
+from app.utils.profile_cards import CARD_FIELDS, invalidate_profile_cards
 
 logger = logging.getLogger(__name__)
 
+# Profile columns that feed the embedding text (see create_profile_text); updates that
+# touch none of them never re-embed
+EMBEDDING_RELEVANT_FIELDS = ('research_area', 'description', 'primary_text', 'resource_type', 'organization', 'seek_share')
+# Everything create_profile_text reads (name is its fallback)
+_PROFILE_TEXT_FIELDS = EMBEDDING_RELEVANT_FIELDS + ('name',)
+
+# session.info keys of the profile IDs to enqueue / whose cached cards to drop, of the
+# (profile ID, user ID) pairs whose cached /profile responses to drop, of the profile
+# IDs and emails whose owners' /profile/me responses to drop, and of the flag that
+# drops cached match results, once the session commits
+_PENDING_EMBEDDINGS_KEY = "pending_embedding_profile_ids"
+_PENDING_CARDS_KEY = "pending_profile_card_ids"
+_PENDING_RESPONSES_KEY = "pending_profile_response_ids"
+_PENDING_OWNER_PROFILES_KEY = "pending_owner_profile_ids"
+_PENDING_OWNER_EMAILS_KEY = "pending_owner_emails"
+_PENDING_MATCHES_KEY = "pending_match_invalidation"
+
 
 def enqueue_embedding_task(profile_id: int) -> None:
     """
@@ -19,54 +44,309 @@ def enqueue_embedding_task(profile_id: int) -> None:
         profile_id: Profile ID to process
     """
     try:
-        # Enqueue the task asynchronously (non-blocking)
-        task = embed_profile.delay(profile_id)
-        logger.info(f"Enqueued embedding task {task.id} for profile {profile_id}")
+        # Buffered and sent by the publisher thread, so a slow broker never
+        # blocks the request that saved the profile
+        task_id = task_publisher.publish(embed_profile, args=[profile_id])
+        logger.info(f"Enqueued embedding task {task_id} for profile {profile_id}")
     except Exception as e:
         logger.error(f"Failed to enqueue embedding task for profile {profile_id}: {str(e)}")
 
 
+def schedule_embedding_task(session: Session, profile_id: int) -> None:
+    """
+    Enqueue embedding for a profile once ``session`` commits
+    
+    Several writes to the same profile in one transaction enqueue a single
+    task, and nothing is enqueued if the transaction rolls back. Without a
+    session the task is enqueued immediately.
+    """
+    if session is None:
+        enqueue_embedding_task(profile_id)
+        return
+    session.info.setdefault(_PENDING_EMBEDDINGS_KEY, set()).add(profile_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def enqueue_pending_embeddings(session):
+    """
+    Enqueue the embedding tasks scheduled during the committed transaction
+    """
+    for profile_id in sorted(session.info.pop(_PENDING_EMBEDDINGS_KEY, ())):
+        enqueue_embedding_task(profile_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_pending_cards(session):
+    """
+    Drop the match result cards of profiles changed by the committed transaction
+    """
+    profile_ids = session.info.pop(_PENDING_CARDS_KEY, None)
+    if profile_ids:
+        try:
+            invalidate_profile_cards(profile_ids)
+        except Exception as e:
+            logger.error(f"Failed to invalidate profile cards {sorted(profile_ids)}: {e}")
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_pending_responses(session):
+    """
+    Drop the cached /profile responses (body and ETag) of profiles and users
+    changed by the committed transaction
+    """
+    for profile_id, user_id in session.info.pop(_PENDING_RESPONSES_KEY, ()):
+        invalidate_profile(profile_id=profile_id, user_id=user_id)
+
+    profile_ids = session.info.pop(_PENDING_OWNER_PROFILES_KEY, set())
+    emails = session.info.pop(_PENDING_OWNER_EMAILS_KEY, set())
+    if not profile_ids and not emails:
+        return
+    try:
+        user_ids = _owner_user_ids(session, profile_ids, emails)
+    except Exception as e:
+        # Better to drop every /profile/me response than to keep a stale one
+        logger.error(f"Failed to look up the owners of profiles {sorted(profile_ids)}: {e}")
+        invalidate_profiles(profile_ids)
+        return
+    for user_id in user_ids:
+        invalidate_profile(user_id=user_id)
+
+
+def _owner_user_ids(session, profile_ids, emails):
+    """
+    IDs of the users owning the given profiles (matched by email), looked up
+    outside the committed transaction
+    """
+    condition = User.email.in_(select(Profile.email).where(Profile.id.in_(profile_ids)))
+    if emails:
+        # Old emails, and those of deleted profiles, are no longer in profiles
+        condition = or_(condition, User.email.in_(emails))
+    statement = select(User.id).where(condition)
+    bind = session.get_bind()
+    if isinstance(bind, Connection):
+        # Session joined to an outer transaction (tests): it is still open
+        return bind.execute(statement).scalars().all()
+    with bind.connect() as connection:
+        return connection.execute(statement).scalars().all()
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_pending_matches(session):
+    """
+    Drop cached match results once a transaction that changed searchable data commits
+    """
+    if session.info.pop(_PENDING_MATCHES_KEY, False):
+        invalidate_matches()
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_pending_embeddings(session):
+    """
+    Drop embedding tasks and cache invalidations scheduled by a transaction that did not commit
+    """
+    session.info.pop(_PENDING_EMBEDDINGS_KEY, None)
+    session.info.pop(_PENDING_CARDS_KEY, None)
+    session.info.pop(_PENDING_RESPONSES_KEY, None)
+    session.info.pop(_PENDING_OWNER_PROFILES_KEY, None)
+    session.info.pop(_PENDING_OWNER_EMAILS_KEY, None)
+    session.info.pop(_PENDING_MATCHES_KEY, None)
+
+
 @event.listens_for(Profile, 'after_insert')
 def profile_inserted(mapper, connection, target):
     """
-    Handle profile insertion - enqueue embedding task
+    Handle profile insertion - enqueue embedding task after commit
     """
     logger.info(f"Profile inserted: {target.id}")
-    # Use after_bulk_insert to ensure the transaction is committed
-    # We'll enqueue the task directly since the profile is already committed
-    try:
-        enqueue_embedding_task(target.id)
-        logger.info(f"Embedding task enqueued for profile {target.id}")
-    except Exception as e:
-        logger.error(f"Failed to enqueue embedding task for profile {target.id}: {e}")
+    schedule_embedding_task(object_session(target), target.id)
 
 
 @event.listens_for(Profile, 'after_update')
 def profile_updated(mapper, connection, target):
     """
-    Handle profile update - enqueue embedding task if relevant fields changed
+    Handle profile update - enqueue embedding task after commit when a relevant
+    field changed and the resulting profile text differs from the previous one
     """
-    # Check if embedding-relevant fields were modified
-    state = target.__dict__
-    relevant_fields = ['research_area', 'description', 'primary_text', 'resource_type', 'organization', 'seek_share']
+    state = inspect(target)
+    modified_relevant = any(state.attrs[field].history.has_changes() for field in EMBEDDING_RELEVANT_FIELDS)
+    if not modified_relevant:
+        logger.debug(f"Profile updated without relevant changes: {target.id}")
+        return
     
-    # Check if any relevant fields were modified
-    modified_relevant = any(
-        hasattr(target, f'_{field}_changed') or 
-        field in state.get('_sa_instance_state').committed_state
-        for field in relevant_fields
-    )
+    # Compared in memory, so the flush runs no extra query; the task itself
+    # still skips profiles whose stored embedding matches the text
+    if _profile_text_hash(target, previous=True) == _profile_text_hash(target):
+        logger.debug(f"Profile {target.id} text unchanged; embedding is current")
+        return
     
-    if modified_relevant:
-        logger.info(f"Profile updated with relevant changes: {target.id}")
-        # Enqueue the task directly since the profile is already committed
-        try:
-            enqueue_embedding_task(target.id)
-            logger.info(f"Embedding task enqueued for updated profile {target.id}")
-        except Exception as e:
-            logger.error(f"Failed to enqueue embedding task for updated profile {target.id}: {e}")
-    else:
-        logger.debug(f"Profile updated without relevant changes: {target.id}")
+    logger.info(f"Profile updated with relevant changes: {target.id}")
+    schedule_embedding_task(object_session(target), target.id)
+
+
+def _profile_text_hash(target, previous: bool = False) -> str:
+    """Hash of a profile's embedding text, as of before the flush when previous is set"""
+    state = inspect(target)
+    values = {}
+    for field in _PROFILE_TEXT_FIELDS:
+        history = state.attrs[field].history
+        values[field] = history.deleted[0] if previous and history.deleted else getattr(target, field)
+    return compute_text_hash(create_profile_text(SimpleNamespace(**values)))
+
+
+def _facet_values(target, previous: bool = False) -> dict:
+    """Facet source columns of a profile, as of before the flush when previous is set"""
+    state = inspect(target)
+    values = {}
+    for field in FACET_SOURCE_FIELDS:
+        history = state.attrs[field].history
+        values[field] = history.deleted[0] if previous and history.deleted else getattr(target, field)
+    return values
+
+
+@event.listens_for(Profile, 'after_insert')
+def profile_facets_inserted(mapper, connection, target):
+    """
+    Count a new profile in profile_facet_counts (same transaction as the insert)
+    """
+    apply_facet_delta(connection, [], facet_keys(_facet_values(target)))
+
+
+@event.listens_for(Profile, 'after_update')
+def profile_facets_updated(mapper, connection, target):
+    """
+    Move an updated profile between facet counts when a facet, its intent or
+    its status changed
+    """
+    state = inspect(target)
+    if any(state.attrs[field].history.deleted for field in FACET_SOURCE_FIELDS):
+        apply_facet_delta(
+            connection,
+            facet_keys(_facet_values(target, previous=True)),
+            facet_keys(_facet_values(target))
+        )
+
+
+@event.listens_for(Profile, 'before_delete')
+def profile_facets_deleted(mapper, connection, target):
+    """
+    Drop a deleted profile from profile_facet_counts (while its row can still be loaded)
+    """
+    apply_facet_delta(connection, facet_keys(_facet_values(target, previous=True)), [])
+
+
+@event.listens_for(Profile, 'after_update')
+def profile_card_updated(mapper, connection, target):
+    """
+    Drop the cached match card of a profile whose displayed fields changed, after commit
+    """
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in CARD_FIELDS):
+        _schedule_card_invalidation(target)
+
+
+@event.listens_for(Profile, 'after_delete')
+def profile_card_deleted(mapper, connection, target):
+    """
+    Drop the cached match card of a deleted profile, after commit
+    """
+    _schedule_card_invalidation(target)
+
+
+def _schedule_card_invalidation(target):
+    session = object_session(target)
+    if session is None:
+        invalidate_profile_cards([target.id])
+        return
+    session.info.setdefault(_PENDING_CARDS_KEY, set()).add(target.id)
+
+
+def _schedule_response_invalidation(session, profile_id=None, user_id=None):
+    if session is None:
+        invalidate_profile(profile_id=profile_id, user_id=user_id)
+        return
+    session.info.setdefault(_PENDING_RESPONSES_KEY, set()).add((profile_id, user_id))
+
+
+def _schedule_profile_views_invalidation(session, profile_id, emails=()):
+    """
+    Drop the cached public view of a profile and the /profile/me views of the
+    users it belongs to (matched by email), after commit
+
+    The owners are looked up once the transaction has committed, so the flush
+    itself runs no extra query.
+    """
+    emails = {email for email in emails if email}
+    if session is None:
+        invalidate_profiles([profile_id])
+        return
+    _schedule_response_invalidation(session, profile_id=profile_id)
+    session.info.setdefault(_PENDING_OWNER_PROFILES_KEY, set()).add(profile_id)
+    session.info.setdefault(_PENDING_OWNER_EMAILS_KEY, set()).update(emails)
+
+
+@event.listens_for(Profile, 'after_insert')
+@event.listens_for(Profile, 'after_update')
+@event.listens_for(Profile, 'after_delete')
+def profile_response_changed(mapper, connection, target):
+    """
+    Drop the cached /profile responses that show this profile, after commit
+    """
+    history = inspect(target).attrs.email.history
+    _schedule_profile_views_invalidation(object_session(target), target.id, [target.email, *history.deleted])
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_response_changed(mapper, connection, target):
+    """
+    Drop the cached /profile/me response of a changed user (and the users-table
+    fallback of /profile/{id}), after commit
+    """
+    _schedule_response_invalidation(object_session(target), user_id=target.id)
+
+
+@event.listens_for(Publication, 'after_insert')
+@event.listens_for(Publication, 'after_update')
+@event.listens_for(Publication, 'after_delete')
+def publication_response_changed(mapper, connection, target):
+    """
+    Drop the cached /profile responses that list this publication, after commit
+    """
+    profile_ids = {target.profile_id, *inspect(target).attrs.profile_id.history.deleted} - {None}
+    for profile_id in profile_ids:
+        _schedule_profile_views_invalidation(object_session(target), profile_id)
+
+
+@event.listens_for(Profile, 'after_insert')
+@event.listens_for(Profile, 'after_update')
+@event.listens_for(Profile, 'after_delete')
+@event.listens_for(Publication, 'after_insert')
+@event.listens_for(Publication, 'after_update')
+@event.listens_for(Publication, 'after_delete')
+@event.listens_for(ResearcherEmbedding, 'after_insert')
+@event.listens_for(ResearcherEmbedding, 'after_update')
+@event.listens_for(ResearcherEmbedding, 'after_delete')
+def searchable_data_changed(mapper, connection, target):
+    """
+    Drop cached match results after commit; they may include (or miss) the
+    changed profile
+    """
+    session = object_session(target)
+    if session is None:
+        invalidate_matches()
+        return
+    session.info[_PENDING_MATCHES_KEY] = True
+
+
+@event.listens_for(Publication, 'after_insert')
+@event.listens_for(Publication, 'after_update')
+def publication_changed(mapper, connection, target):
+    """
+    Handle publication writes - the profile's embedding task also refreshes
+    its publication embeddings (deletes are handled by the foreign key cascade)
+    """
+    if target.profile_id is not None:
+        schedule_embedding_task(object_session(target), target.profile_id)
 
 
 def register_profile_hooks():
@@ -1,17 +1,28 @@
 import os
+from typing import Optional
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
 from app.routers import auth_route
 from app.routers import matches
 from app.routers import profile
 from app.routers import admin
 from app.hooks.profile_hooks import register_profile_hooks
 from app import database, schemas, auth
-from app.model import MatchRequest
-from app.alogirithm import find_db_matches
+from app.model import MatchRequest, MatchBatchRequest
+from app.alogirithm import (
+    MATCH_FIELDS, MATCH_LIMIT, find_db_matches, find_db_matches_batch, match_cache_key, get_cached_matches, cache_matches,
+    retrieve_matches, refine_matches
+)
+from app.utils import reranker
+from app.utils.diversity import diversity_enabled
+from app.utils.fast_json import FastJSONResponse, dumps, parse_fields, select_fields
+from app.utils.facets import get_directory_facets
+from app.utils.sse import sse_event, sse_stream
+from app.utils.timing import StageTimer
 
 database.Base.metadata.create_all(bind = database.engine)
 
@@ -30,7 +41,8 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_headers=["*"],
-    allow_methods=["*"]
+    allow_methods=["*"],
+    expose_headers=["Server-Timing"]
 )
 
 # Serve static files (React build)
@@ -70,11 +82,25 @@ def get_current_user_email(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     return email
 
-@app.post("/api/match")
-def request_match(request : MatchRequest, current_user: database.User = Depends(auth.get_current_user)):
-    user_profile = database.get_db().__next__().query(database.Profile).filter(
-        database.Profile.email == current_user.email
-    ).first()
+@app.on_event("startup")
+def warm_up_reranker():
+    reranker.warm_up()
+
+
+@app.post("/api/match", response_class=FastJSONResponse)
+def request_match(request : MatchRequest, fields: Optional[str] = None, current_user: database.User = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    """
+    Top matches for a query, with directory-wide facet counts of the
+    searched intent (see get_directory_facets; not narrowed by the query).
+    
+    fields: optional comma-separated match keys to return (id is always included)
+    """
+    selected = parse_fields(fields, MATCH_FIELDS)
+    timer = StageTimer()
+    with timer.stage("profile"):
+        user_profile = db.query(database.Profile).filter(
+            database.Profile.email == current_user.email
+        ).first()
     
     current_user_profile_id = user_profile.id if user_profile else None
     
@@ -83,6 +109,118 @@ def request_match(request : MatchRequest, current_user: database.User = Depends(
         user_intent=request.seek_share,
         user_query= request.description,
         user_wants_resource_type= None,
-        current_user_id=current_user_profile_id
+        current_user_id=current_user_profile_id,
+        timer=timer
+    )
+    with timer.stage("facets"):
+        facets = get_directory_facets(db, request.seek_share)
+    return FastJSONResponse(
+        {"matches": [select_fields(match, selected) for match in matches], "facets": facets},
+        headers={"Server-Timing": timer.header()}
+    )
+
+
+@app.post("/api/match/batch")
+def request_match_batch(request: MatchBatchRequest, fields: Optional[str] = None, current_user: database.User = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    """
+    Run several match queries in one request.
+    
+    The response is NDJSON: one line {"index": i, "matches": [...]} per query,
+    in request order, written as soon as that query's results are read, then
+    a last line {"timing": {stage: ms}}. Postgres retrieval runs while the
+    lines are written, so the Server-Timing header only covers the stages
+    finished before the first line; the timing line covers all of them.
+    fields limits the keys of each match as for /api/match. Each query may
+    also give a resource_type, matched as a case-insensitive substring.
+    """
+    selected = parse_fields(fields, MATCH_FIELDS)
+    timer = StageTimer()
+    with timer.stage("profile"):
+        user_profile = db.query(database.Profile).filter(
+            database.Profile.email == current_user.email
+        ).first()
+    
+    results = find_db_matches_batch(
+        [(query.description, query.seek_share, query.resource_type) for query in request.queries],
+        current_user_id=user_profile.id if user_profile else None,
+        timer=timer
+    )
+    
+    def stream_results():
+        # Includes reading the postgres rows, which are fetched as lines are written
+        with timer.stage("stream"):
+            for index, matches in results:
+                yield dumps({"index": index, "matches": [select_fields(match, selected) for match in matches]}) + b"\n"
+        yield dumps({"timing": timer.as_dict()}) + b"\n"
+    
+    return StreamingResponse(
+        stream_results(),
+        media_type="application/x-ndjson",
+        headers={"Server-Timing": timer.header()}
+    )
+
+
+@app.post("/api/match/stream")
+def request_match_stream(request: MatchRequest, fields: Optional[str] = None, current_user: database.User = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    """
+    Server-sent events version of /api/match that shows results progressively.
+    
+    Events, in order:
+        matches  {"stage": "cached" | "first" | "refined", "final": bool, "matches": [...]}
+                 cached or first-stage results come first; when a cross-encoder is
+                 configured or diversity is enabled, a "refined" event with the final
+                 list follows
+        facets   {"facets": {facet: {value: count}}} directory-wide counts of the
+                 searched intent, not narrowed by the query
+        details  {"profiles": {id: full public profile}} for the final matches
+        done     {"timing": {stage: ms}}
+    
+    If retrieval or hydration fails partway through, an error event
+    {"detail": ...} ends the stream in place of the remaining events.
+    
+    fields (comma-separated match or profile keys) limits both the matches and
+    the profile details to those keys, e.g. the fields a result card shows.
+    """
+    selected = parse_fields(fields, MATCH_FIELDS + profile.PROFILE_FIELDS)
+    select_all = lambda items: [select_fields(item, selected) for item in items]
+    timer = StageTimer()
+    with timer.stage("profile"):
+        user_profile = db.query(database.Profile).filter(
+            database.Profile.email == current_user.email
+        ).first()
+    current_user_profile_id = user_profile.id if user_profile else None
+    with timer.stage("facets"):
+        facets = get_directory_facets(db, request.seek_share)
+    
+    def stream_events():
+        cache_key = match_cache_key(request.description, request.seek_share, None, current_user_profile_id)
+        matches = get_cached_matches(cache_key)
+        if matches is not None:
+            yield sse_event("matches", {"stage": "cached", "final": True, "matches": select_all(matches)})
+        else:
+            candidates = retrieve_matches(request.description, request.seek_share, None, current_user_profile_id, timer)
+            refine = reranker.reranker_enabled() or diversity_enabled()
+            yield sse_event("matches", {"stage": "first", "final": not refine, "matches": select_all(candidates[:MATCH_LIMIT])})
+            matches = refine_matches(request.description, candidates, timer)
+            if refine:
+                yield sse_event("matches", {"stage": "refined", "final": True, "matches": select_all(matches)})
+            cache_matches(cache_key, matches)
+        yield sse_event("facets", {"facets": facets})
+        
+        # The request's session is not guaranteed to outlive the response body
+        with timer.stage("details"):
+            details_db = database.SessionLocal()
+            try:
+                bodies = profile.get_profile_bodies(details_db, [match["id"] for match in matches])
+            finally:
+                details_db.close()
+        yield sse_event("details", {
+            "profiles": {profile_id: select_fields(body, selected) for profile_id, body in bodies.items()}
+        })
+        yield sse_event("done", {"timing": timer.as_dict()})
+    
+    return StreamingResponse(
+        sse_stream(stream_events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    return {"matches": matches}
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+Database migration script to create embedding_jobs, the progress table of
+reindexes and admin/CLI triggered embedding tasks. Safe to re-run.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, EmbeddingJob
+
+
+def migrate_database():
+    """Create embedding_jobs."""
+
+    print("Starting database migration for embedding jobs...")
+
+    EmbeddingJob.__table__.create(bind=engine, checkfirst=True)
+    print("Table embedding_jobs created/verified")
+
+    print("✅ Database migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_database()
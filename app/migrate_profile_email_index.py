@@ -0,0 +1,28 @@
+"""
+Database migration script to add the index on profiles.email used by profile
+lookups.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from database import engine
+
+
+def migrate_database():
+    """Add an index on profiles.email."""
+
+    print("Starting database migration for the profile email index...")
+
+    with engine.connect() as connection:
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_profiles_email ON profiles (email)"))
+        connection.commit()
+        print("Index ix_profiles_email created/verified")
+
+    print("✅ Database migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,30 @@
+"""
+Database migration script to create profile_facet_counts and fill it from
+the existing profiles. Safe to re-run: the counts are rebuilt each time.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, ProfileFacetCount
+from app.utils.facets import rebuild_facet_counts
+
+
+def migrate_database():
+    """Create profile_facet_counts and rebuild the counts."""
+
+    print("Starting database migration for profile facet counts...")
+
+    ProfileFacetCount.__table__.create(bind=engine, checkfirst=True)
+    print("Table profile_facet_counts created/verified")
+
+    with engine.begin() as connection:
+        rows = rebuild_facet_counts(connection)
+    print(f"Rebuilt {rows} facet counts")
+
+    print("✅ Database migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_database()
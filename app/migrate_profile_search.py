@@ -0,0 +1,45 @@
+"""
+Database migration script to add the generated full-text search column on
+profiles and its GIN index, used by hybrid (lexical + semantic) matching.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from database import engine, PROFILE_SEARCH_VECTOR_SQL
+
+
+def migrate_database():
+    """Add profiles.search_vector and ix_profiles_search_vector."""
+
+    print("Starting database migration for profile full-text search...")
+
+    with engine.connect() as connection:
+        result = connection.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'profiles' AND column_name = 'search_vector'
+        """)).fetchall()
+
+        if not result:
+            # Rewrites the table once to compute the column for existing rows
+            connection.execute(text(f"""
+                ALTER TABLE profiles ADD COLUMN search_vector tsvector
+                GENERATED ALWAYS AS ({PROFILE_SEARCH_VECTOR_SQL}) STORED
+            """))
+            connection.commit()
+            print("Added search_vector column")
+
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_profiles_search_vector ON profiles USING gin (search_vector)"
+        ))
+        connection.commit()
+        print("Index ix_profiles_search_vector created/verified")
+
+    print("✅ Database migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_database()
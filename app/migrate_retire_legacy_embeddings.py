@@ -0,0 +1,144 @@
+"""
+Database migration script to retire the legacy profiles.embedding column.
+
+Matching ranks researcher_embeddings and only falls back to the legacy
+column (a slower query) while some profile has no other vector. This script:
+
+1. backfills researcher_embeddings for those legacy-only profiles, in
+   batches of --batch-size with --pause seconds between batches so the
+   database and the encoder are not saturated;
+2. verifies that no profile with a legacy vector lacks a researcher_embeddings
+   row;
+3. with --drop, and only when the check passes, drops profiles.embedding.
+
+Safe to re-run: each step only touches what is still left to do.
+
+Usage:
+    python app/migrate_retire_legacy_embeddings.py [--batch-size 100] [--pause 1.0] [--drop]
+    python app/migrate_retire_legacy_embeddings.py --verify-only
+"""
+
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database import engine, get_db, Profile
+
+LEGACY_ONLY_SQL = """
+    SELECT p.id
+    FROM profiles p
+    WHERE p.embedding IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM researcher_embeddings re WHERE re.user_id = p.id)
+    AND p.id > :after_id
+    ORDER BY p.id
+    LIMIT :batch_size
+"""
+
+
+def legacy_column_exists(connection) -> bool:
+    """True while profiles.embedding has not been dropped"""
+    return bool(connection.execute(text("""
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_name = 'profiles' AND column_name = 'embedding'
+    """)).first())
+
+
+def backfill(batch_size: int, pause: float) -> int:
+    """
+    Compute researcher_embeddings rows for legacy-only profiles
+
+    Returns:
+        int: Number of profiles embedded
+    """
+    from app.tasks.embedding_tasks import embed_profiles
+
+    done = 0
+    after_id = 0
+    while True:
+        with engine.connect() as connection:
+            ids = [row[0] for row in connection.execute(
+                text(LEGACY_ONLY_SQL), {"after_id": after_id, "batch_size": batch_size}
+            )]
+        if not ids:
+            return done
+
+        db = next(get_db())
+        try:
+            profiles = db.query(Profile).filter(Profile.id.in_(ids)).all()
+            result = embed_profiles(db, profiles)
+        finally:
+            db.close()
+        done += result["processed"]
+        after_id = ids[-1]
+        print(f"Backfilled {done} profiles (through id {after_id})")
+        time.sleep(pause)
+
+
+def verify(connection) -> dict:
+    """
+    Coverage of researcher_embeddings over profiles
+
+    Returns:
+        dict: total/embedded profile counts and legacy-only profiles still missing
+    """
+    counts = connection.execute(text("""
+        SELECT COUNT(*) AS total,
+               COUNT(re.user_id) AS embedded
+        FROM profiles p
+        LEFT JOIN researcher_embeddings re ON re.user_id = p.id
+    """)).one()
+    missing = 0
+    if legacy_column_exists(connection):
+        missing = connection.execute(text("""
+            SELECT COUNT(*)
+            FROM profiles p
+            WHERE p.embedding IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM researcher_embeddings re WHERE re.user_id = p.id)
+        """)).scalar()
+    return {"total": counts.total, "embedded": counts.embedded, "legacy_only": missing}
+
+
+def migrate_database(batch_size: int = 100, pause: float = 1.0, drop: bool = False, verify_only: bool = False):
+    """Backfill, verify and optionally drop profiles.embedding."""
+
+    print("Starting migration to retire profiles.embedding...")
+
+    with engine.connect() as connection:
+        if not legacy_column_exists(connection):
+            print("profiles.embedding already dropped")
+            print("✅ Database migration completed successfully!")
+            return
+
+    if not verify_only:
+        backfill(batch_size, pause)
+
+    with engine.connect() as connection:
+        coverage = verify(connection)
+    print(
+        f"Coverage: {coverage['embedded']}/{coverage['total']} profiles have researcher_embeddings, "
+        f"{coverage['legacy_only']} legacy-only"
+    )
+    if coverage["legacy_only"]:
+        print("❌ Legacy-only profiles remain; not dropping profiles.embedding")
+        sys.exit(1)
+
+    if drop:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE profiles DROP COLUMN IF EXISTS embedding"))
+        print("Dropped profiles.embedding (run VACUUM FULL profiles to return the space to the OS)")
+
+    print("✅ Database migration completed successfully!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retire the legacy profiles.embedding column")
+    parser.add_argument("--batch-size", type=int, default=100, help="Profiles embedded per batch")
+    parser.add_argument("--pause", type=float, default=1.0, help="Seconds to sleep between batches")
+    parser.add_argument("--drop", action="store_true", help="Drop profiles.embedding once coverage is verified")
+    parser.add_argument("--verify-only", action="store_true", help="Only report coverage")
+    args = parser.parse_args()
+    migrate_database(args.batch_size, args.pause, args.drop, args.verify_only)
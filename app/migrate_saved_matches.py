@@ -0,0 +1,63 @@
+"""
+Database migration script to make saved matches constraint-backed:
+removes duplicate bookmarks, converts match_score to a number and adds the
+unique (user_id, matched_profile_id) index used by the upserts.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from database import engine
+
+
+def migrate_database():
+    """Deduplicate saved_matches, convert match_score and add indexes."""
+
+    print("Starting database migration for saved matches...")
+
+    with engine.connect() as connection:
+        # Keep the oldest bookmark of each (user, profile) pair
+        result = connection.execute(text("""
+            DELETE FROM saved_matches a
+            USING saved_matches b
+            WHERE a.user_id = b.user_id
+              AND a.matched_profile_id = b.matched_profile_id
+              AND a.id > b.id
+        """))
+        connection.commit()
+        print(f"Removed {result.rowcount} duplicate saved matches")
+
+        data_type = connection.execute(text("""
+            SELECT data_type
+            FROM information_schema.columns
+            WHERE table_name = 'saved_matches' AND column_name = 'match_score'
+        """)).scalar()
+
+        if data_type and data_type != 'double precision':
+            # "85%" -> 85.0; anything unparsable becomes NULL
+            connection.execute(text("""
+                ALTER TABLE saved_matches
+                ALTER COLUMN match_score TYPE DOUBLE PRECISION
+                USING NULLIF(substring(match_score FROM '[0-9]+(?:\\.[0-9]+)?'), '')::double precision
+            """))
+            connection.commit()
+            print("Converted match_score to a numeric column")
+
+        connection.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_saved_matches_user_profile
+            ON saved_matches (user_id, matched_profile_id)
+        """))
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_saved_matches_user_id_id
+            ON saved_matches (user_id, id)
+        """))
+        connection.commit()
+        print("Saved match indexes created/verified")
+
+    print("✅ Database migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -1,6 +1,16 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Largest number of queries accepted by /api/match/batch
+MAX_MATCH_BATCH = 50
 
 class MatchRequest(BaseModel):
     seek_share : str
-    description : str
\ No newline at end of file
+    description : str
+
+class MatchBatchQuery(MatchRequest):
+    # Substring the matched profiles' resource_type must contain (any when omitted)
+    resource_type : Optional[str] = None
+
+class MatchBatchRequest(BaseModel):
+    queries : List[MatchBatchQuery] = Field(..., min_length=1, max_length=MAX_MATCH_BATCH)
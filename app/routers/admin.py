@@ -2,14 +2,17 @@
 Admin routes for embedding management and system administration
 """
 import logging
+import uuid
 from typing import Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
 
-from app.database import get_db, Profile, ResearcherEmbedding
+from app.database import get_db, get_pool_metrics, Profile, ResearcherEmbedding
 from app.auth import get_current_user
 from app.schemas import User
 from app.tasks.embedding_tasks import embed_profile, reindex_all_profiles
+from app.tasks.jobs import create_job, get_job
+from app.tasks.publisher import task_publisher
 from app.utils.embedding_utils import should_recompute_embedding
 
 logger = logging.getLogger(__name__)
@@ -78,10 +81,31 @@ async def get_embedding_stats(
         )
 
 
+@router.get("/db/pool")
+async def get_db_pool_status(
+    admin_user: User = Depends(verify_admin_user)
+) -> Dict[str, Any]:
+    """
+    Get connection pool configuration, usage counters and checkout wait times
+    """
+    return get_pool_metrics()
+
+
+@router.get("/broker/publisher")
+async def get_publisher_status(
+    admin_user: User = Depends(verify_admin_user)
+) -> Dict[str, Any]:
+    """
+    Get the task publish buffer depth, counters and broker circuit state
+    """
+    return task_publisher.stats()
+
+
 @router.post("/embedding/reindex")
 async def trigger_reindex_all(
     force: bool = False,
     background_tasks: BackgroundTasks = BackgroundTasks(),
+    db: Session = Depends(get_db),
     admin_user: User = Depends(verify_admin_user)
 ) -> Dict[str, Any]:
     """
@@ -91,14 +115,19 @@ async def trigger_reindex_all(
         force: If True, recompute all embeddings regardless of hash
     """
     try:
+        # Register the job so its progress is visible before a worker picks it up
+        task_id = str(uuid.uuid4())
+        create_job(db, task_id, "reindex")
+        db.commit()
+        
         # Enqueue the bulk reindexing task
-        task = reindex_all_profiles.delay(force=force)
+        task_publisher.publish(reindex_all_profiles, kwargs={"force": force}, task_id=task_id)
         
-        logger.info(f"Admin {admin_user.email} triggered bulk reindexing (force={force}), task_id={task.id}")
+        logger.info(f"Admin {admin_user.email} triggered bulk reindexing (force={force}), task_id={task_id}")
         
         return {
             "message": "Bulk reindexing task enqueued successfully",
-            "task_id": task.id,
+            "task_id": task_id,
             "force_recompute": force,
             "status": "enqueued"
         }
@@ -152,15 +181,18 @@ async def trigger_profile_embedding(
                         "current_hash": current_hash
                     }
         
-        # Enqueue the embedding task
-        task = embed_profile.delay(profile_id)
+        # Enqueue the embedding task, tracked in embedding_jobs
+        task_id = str(uuid.uuid4())
+        create_job(db, task_id, "profile", total=1)
+        db.commit()
+        task_publisher.publish(embed_profile, args=[profile_id], kwargs={"job_id": task_id}, task_id=task_id)
         
-        logger.info(f"Admin {admin_user.email} triggered embedding for profile {profile_id}, task_id={task.id}")
+        logger.info(f"Admin {admin_user.email} triggered embedding for profile {profile_id}, task_id={task_id}")
         
         return {
             "message": "Embedding task enqueued successfully",
             "profile_id": profile_id,
-            "task_id": task.id,
+            "task_id": task_id,
             "force_recompute": force,
             "status": "enqueued"
         }
@@ -178,33 +210,27 @@ async def trigger_profile_embedding(
 @router.get("/embedding/task/{task_id}")
 async def get_task_status(
     task_id: str,
+    db: Session = Depends(get_db),
     admin_user: User = Depends(verify_admin_user)
 ) -> Dict[str, Any]:
     """
-    Get status of an embedding task
+    Get status and progress of a tracked embedding job
     
     Args:
-        task_id: Celery task ID
+        task_id: Task ID returned when the job was triggered
     """
     try:
-        from app.celery_app import celery_app
-        
-        # Get task result
-        result = celery_app.AsyncResult(task_id)
-        
-        return {
-            "task_id": task_id,
-            "status": result.status,
-            "result": result.result if result.ready() else None,
-            "info": result.info,
-            "ready": result.ready(),
-            "successful": result.successful() if result.ready() else None,
-            "failed": result.failed() if result.ready() else None
-        }
-        
+        job = get_job(db, task_id)
     except Exception as e:
         logger.error(f"Error getting task status: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve task status"
         )
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {task_id} not found"
+        )
+    return job
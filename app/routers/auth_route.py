@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, HTTPException ,status, Depends
+from starlette.concurrency import run_in_threadpool
 from app import schemas, auth, database
 from app.database import Profile
 import time
@@ -9,25 +10,11 @@ router = APIRouter(
     tags = ["Authentication"]
 )
 
-@router.post("/register")
+def _get_user_by_email(db: Session, email: str):
+    return db.query(database.User).filter(database.User.email == email).first()
 
-def register_user(user : schemas.UserCreate , db:Session = Depends(database.get_db)):
-    start_time = time.time()
-    print(f"Registration started for {user.email}")
-    
-    # Check existing user
-    check_start = time.time()
-    db_user = db.query(database.User).filter(database.User.email == user.email).first()
-    print(f"DB check took: {time.time() - check_start:.2f}s")
-    
-    if db_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,  detail = "Email already registerd")
-    
-    # Hash password
-    hash_start = time.time()
-    hashed_password = auth.get_hashed_pass(user.password)
-    print(f"Password hashing took: {time.time() - hash_start:.2f}s")
 
+def _create_user_with_profile(db: Session, user: schemas.UserCreate, hashed_password: str):
     new_user = database.User(
         email=user.email,
         hashed_password=hashed_password,
@@ -61,37 +48,65 @@ def register_user(user : schemas.UserCreate , db:Session = Depends(database.get_
 
     print(f"User and Profile created for {new_user.email} (User ID: {new_user.id}, Profile ID: {new_profile.id})")
 
-    # Explicitly enqueue embedding task for the new profile
-    # This ensures embedding computation happens even if SQLAlchemy hooks fail
-    try:
-        from app.hooks.profile_hooks import enqueue_embedding_task
-        enqueue_embedding_task(new_profile.id)
-        print(f"Embedding task enqueued for new profile {new_profile.id}")
-    except Exception as e:
-        print(f"Warning: Failed to enqueue embedding task for profile {new_profile.id}: {e}")
-        # Don't fail registration if embedding task fails - it can be computed later
+    # The profile insert hook enqueues the embedding task once the commit lands
+
+
+def _upgrade_password_hash(db: Session, user: database.User, new_hash: str):
+    user.hashed_password = new_hash
+    db.commit()
+
+
+# The handlers are async so bcrypt runs on the dedicated hashing pool in
+# app.auth; blocking database work is pushed to the default threadpool.
+@router.post("/register")
+async def register_user(user : schemas.UserCreate , db:Session = Depends(database.get_db)):
+    start_time = time.time()
+    print(f"Registration started for {user.email}")
+    
+    # Check existing user
+    check_start = time.time()
+    db_user = await run_in_threadpool(_get_user_by_email, db, user.email)
+    print(f"DB check took: {time.time() - check_start:.2f}s")
+    
+    if db_user:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,  detail = "Email already registerd")
+    
+    # Hash password
+    hash_start = time.time()
+    hashed_password = await auth.hash_password_async(user.password)
+    print(f"Password hashing took: {time.time() - hash_start:.2f}s")
+
+    await run_in_threadpool(_create_user_with_profile, db, user, hashed_password)
+    print(f"Total registration time: {time.time() - start_time:.2f}s")
 
     return {"message": "User registered successfully."}
 
 
 @router.post("/login" , response_model = schemas.Token)
-def login_Access_token(user_credentials : schemas.UserLogin , db:Session = Depends(database.get_db)):
+async def login_Access_token(user_credentials : schemas.UserLogin , db:Session = Depends(database.get_db)):
     start_time = time.time()
     print(f"Login started for {user_credentials.email}")
     
     # Find user
     db_start = time.time()
-    user = db.query(database.User).filter(database.User.email == user_credentials.email).first()
+    user = await run_in_threadpool(_get_user_by_email, db, user_credentials.email)
     print(f"DB lookup took: {time.time() - db_start:.2f}s")
     
     # Verify password
     verify_start = time.time()
-    password_valid = user and auth.verify_hashed_pass(user_credentials.password , user.hashed_password)
+    password_valid, new_hash = await auth.verify_password_async(
+        user_credentials.password, user.hashed_password if user else None
+    )
     print(f"Password verification took: {time.time() - verify_start:.2f}s")
     
     if not password_valid:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST , detail = "Invalid credentials" , headers={"WWW-Authenticate": "Bearer"})
     
+    # Transparently re-hash passwords stored with an outdated work factor
+    if new_hash:
+        await run_in_threadpool(_upgrade_password_hash, db, user, new_hash)
+        print(f"Password hash upgraded to {auth.PASSWORD_HASH_ROUNDS} rounds for {user.email}")
+    
     # Create token
     token_start = time.time()
     access_token = auth.create_Access_token(data = {"sub" : user.email})
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app import database, auth, schemas
 
@@ -11,16 +15,12 @@ router = APIRouter(
 
 security = HTTPBearer()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_BATCH_SIZE = 500
+
 def get_current_user_for_matches(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(database.get_db)):
-    token = credentials.credentials
-    email = auth.verify_access_token(token)
-    if email is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    user = db.query(database.User).filter(database.User.email == email).first()
+    user = auth.resolve_user(credentials.credentials, db)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,23 +28,89 @@ def get_current_user_for_matches(credentials: HTTPAuthorizationCredentials = Dep
             headers={"WWW-Authenticate": "Bearer"},
         )
     return user
+def parse_match_score(value) -> Optional[float]:
+    """
+    Convert a match score to a numeric percentage
+
+    Accepts numbers and strings such as "85%" or "85"; returns None when empty.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = str(value).strip().rstrip("%").strip()
+    if not cleaned:
+        return None
+    try:
+        return float(cleaned)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid match score: {value}")
+
+
+# Batch routes are declared before /save/{profile_id} so "batch" is not parsed as an id
+@router.post("/save/batch")
+def save_matches_batch(batch: schemas.SavedMatchBatchCreate, db: Session = Depends(database.get_db), current_user: schemas.User = Depends(get_current_user_for_matches)):
+    if not batch.matches:
+        return {"message": "No matches to save", "saved": 0, "updated": 0}
+    if len(batch.matches) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BATCH_SIZE} matches per batch")
+
+    # Last entry wins when the same profile appears twice in one batch
+    rows = {
+        item.profile_id: {
+            "user_id": current_user.id,
+            "matched_profile_id": item.profile_id,
+            "match_score": parse_match_score(item.match_score),
+        }
+        for item in batch.matches
+    }
+    insert_stmt = pg_insert(database.SavedMatch).values(list(rows.values()))
+    upsert_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=[database.SavedMatch.user_id, database.SavedMatch.matched_profile_id],
+        set_={"match_score": func.coalesce(insert_stmt.excluded.match_score, database.SavedMatch.match_score)},
+    ).returning(literal_column("(xmax = 0)").label("inserted"))
+
+    try:
+        results = db.execute(upsert_stmt).fetchall()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="One or more profiles not found")
+
+    saved = sum(1 for row in results if row.inserted)
+    return {"message": "Matches saved successfully", "saved": saved, "updated": len(results) - saved}
+
 @router.post("/save/{profile_id}")
 def save_matches(profile_id: int, match_score: str = None, db: Session = Depends(database.get_db), current_user: schemas.User = Depends(get_current_user_for_matches)):
-    existing_match = db.query(database.SavedMatch).filter(
-        database.SavedMatch.user_id == current_user.id,
-        database.SavedMatch.matched_profile_id == profile_id
-    ).first()
+    # A single INSERT ... ON CONFLICT DO NOTHING; the unique index settles races
+    stmt = pg_insert(database.SavedMatch).values(
+        user_id=current_user.id,
+        matched_profile_id=profile_id,
+        match_score=parse_match_score(match_score),
+    ).on_conflict_do_nothing(
+        index_elements=[database.SavedMatch.user_id, database.SavedMatch.matched_profile_id]
+    ).returning(database.SavedMatch.id)
+
+    try:
+        new_id = db.execute(stmt).scalar()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
 
-    if existing_match:
+    if new_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Match already saved")
-    new_saved_match = database.SavedMatch(user_id = current_user.id , matched_profile_id = profile_id, match_score = match_score)
-    db.add(new_saved_match)
-    db.commit()
     return {"message" : "Match saved successfully"}
 
-@router.get("/saved")
-def get_saved_match(db: Session = Depends(database.get_db), current_user: schemas.User = Depends(get_current_user_for_matches)):
-    saved_matches = db.query(
+@router.get("/saved", response_model=schemas.SavedMatchPage)
+def get_saved_match(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.User = Depends(get_current_user_for_matches)
+):
+    # Keyset pagination over (user_id, saved id), newest first
+    query = db.query(
         database.Profile.id,
         database.Profile.name,
         database.Profile.organization,
@@ -53,12 +119,19 @@ def get_saved_match(db: Session = Depends(database.get_db), current_user: schema
         database.Profile.description,
         database.Profile.research_area,
         database.Profile.primary_text,
-        database.SavedMatch.match_score
+        database.SavedMatch.match_score,
+        database.SavedMatch.id.label("saved_id")
     ).join(
         database.SavedMatch, database.Profile.id == database.SavedMatch.matched_profile_id
     ).filter(
         database.SavedMatch.user_id == current_user.id
-    ).all()
+    )
+    if cursor is not None:
+        query = query.filter(database.SavedMatch.id < cursor)
+    saved_matches = query.order_by(database.SavedMatch.id.desc()).limit(limit + 1).all()
+
+    has_more = len(saved_matches) > limit
+    saved_matches = saved_matches[:limit]
     
     # Convert query results to dictionaries with match_score included
     profiles = []
@@ -76,16 +149,29 @@ def get_saved_match(db: Session = Depends(database.get_db), current_user: schema
         }
         profiles.append(profile)
     
-    return profiles
+    return {
+        "items": profiles,
+        "next_cursor": saved_matches[-1].saved_id if has_more else None
+    }
+
+@router.post("/saved/batch-delete")
+def delete_saved_matches_batch(batch: schemas.SavedMatchBatchDelete, db: Session = Depends(database.get_db), current_user: schemas.User = Depends(get_current_user_for_matches)):
+    if len(batch.profile_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BATCH_SIZE} matches per batch")
+    deleted = db.query(database.SavedMatch).filter(
+        database.SavedMatch.user_id == current_user.id,
+        database.SavedMatch.matched_profile_id.in_(batch.profile_ids)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return {"message": "Matches deleted successfully", "deleted": deleted}
 
 @router.delete("/saved/{profile_id}")
 def delete_saved_match(profile_id: int, db: Session = Depends(database.get_db), current_user: schemas.User = Depends(get_current_user_for_matches)):
-    match_to_Delete = db.query(database.SavedMatch).filter(
+    deleted = db.query(database.SavedMatch).filter(
         database.SavedMatch.user_id == current_user.id,
         database.SavedMatch.matched_profile_id == profile_id
-    ).first()
-    if not match_to_Delete:
+    ).delete(synchronize_session=False)
+    if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND , detail = "Saved match not found")
-    db.delete(match_to_Delete)
     db.commit()
-    return {"message" : "Match deleted successfully"}
\ No newline at end of file
+    return {"message" : "Match deleted successfully"}
@@ -1,40 +1,121 @@
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
+from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from app import schemas, auth, database
+from app.utils import profile_cache
+from app.utils.fast_json import FastJSONResponse, parse_fields, select_fields
 
 router = APIRouter(
     prefix="/profile",
     tags=["Profile"]
 )
 
+# Clients must revalidate every time; unchanged profiles come back as 304
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+# Keys a profile response can be narrowed to with ?fields=
+PROFILE_FIELDS = tuple(schemas.UserProfile.model_fields)
+
+
+def _serialize_profile(data: dict) -> dict:
+    """Validate a profile response once and keep its JSON-ready form"""
+    return schemas.UserProfile.model_validate(data).model_dump(mode="json")
+
+
+def _profile_response(request: Request, etag: str, body: dict, fields=None) -> Response:
+    """Return 304 if the client already has this body, otherwise the cached body (narrowed to fields)"""
+    etag = profile_cache.fields_etag(etag, fields)
+    headers = {"ETag": etag, "Cache-Control": PROFILE_CACHE_CONTROL}
+    if profile_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FastJSONResponse(content=select_fields(body, fields), headers=headers)
+
+
+# User columns copied onto the matching profile on update
+PROFILE_SYNCED_FIELDS = ("name", "email", "organization", "seek_share", "resource_type", "description", "research_area")
+
+
+def _assign_changed(obj, field: str, value) -> None:
+    """Set an attribute only when the value differs, keeping the unit of work minimal"""
+    if getattr(obj, field) != value:
+        setattr(obj, field, value)
+
+
+def _load_profile(db: Session, *criteria):
+    """Load a profile and its publications (one extra SELECT ... IN query)"""
+    return db.query(database.Profile).options(
+        selectinload(database.Profile.publications)
+    ).filter(*criteria).first()
+
+
+def _profile_body(profile) -> tuple:
+    """Serialized public view of a loaded profile and its content ETag"""
+    body = _serialize_profile({
+        "id": profile.id,
+        "email": profile.email,
+        "name": profile.name,
+        "organization": profile.organization,
+        "seek_share": profile.seek_share,
+        "resource_type": profile.resource_type,
+        "description": profile.description,
+        "research_area": profile.research_area,
+        "status": getattr(profile, 'status', 'active'),
+        "h_index": profile.h_index,
+        "citations": profile.citations,
+        "funding_summary": profile.funding_summary,
+        "publications": profile.publications
+    })
+    # Content-derived, so publication writes change it as well
+    return profile_cache.content_etag(body), body
+
+
+def get_profile_bodies(db: Session, profile_ids: list) -> dict:
+    """
+    Public profile views for several profiles, served from the profile cache
+    where possible and loaded with one query (plus publications) otherwise
+    
+    Returns:
+        dict: Profile ID -> serialized body, for the profiles that exist
+    """
+    bodies = {}
+    missing = []
+    for profile_id in profile_ids:
+        cached = profile_cache.get_cached_profile(profile_cache.profile_key(profile_id))
+        if cached:
+            bodies[profile_id] = cached[1]
+        else:
+            missing.append(profile_id)
+    
+    if missing:
+        profiles = db.query(database.Profile).options(
+            selectinload(database.Profile.publications)
+        ).filter(database.Profile.id.in_(missing)).all()
+        for profile in profiles:
+            etag, body = _profile_body(profile)
+            profile_cache.cache_profile(profile_cache.profile_key(profile.id), etag, body)
+            bodies[profile.id] = body
+    return bodies
+
+
 @router.get("/me", response_model=schemas.UserProfile)
 def get_current_user_profile(
+    request: Request,
+    fields: Optional[str] = None,
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(database.get_db)
 ):
-    """Get current user's profile information"""
+    """Get current user's profile information (fields: optional comma-separated keys to return)"""
+    selected = parse_fields(fields, PROFILE_FIELDS)
+    cache_key = profile_cache.me_key(current_user.id)
+    cached = profile_cache.get_cached_profile(cache_key)
+    if cached:
+        return _profile_response(request, *cached, selected)
+
     # Get the profile with publications
-    profile = db.query(database.Profile).filter(database.Profile.email == current_user.email).first()
+    profile = _load_profile(db, database.Profile.email == current_user.email)
     
     # If no profile exists, use User data (fallback)
-    if not profile:
-        return {
-            "id": current_user.id,
-            "email": current_user.email,
-            "name": current_user.name,
-            "organization": current_user.organization,
-            "seek_share": current_user.seek_share,
-            "resource_type": current_user.resource_type,
-            "description": current_user.description,
-            "research_area": current_user.research_area,
-            "status": getattr(current_user, 'status', 'active'),
-            "h_index": None,
-            "citations": None,
-            "funding_summary": None,
-            "publications": []
-        }
-    
-    return {
+    body = _serialize_profile({
         "id": current_user.id,
         "email": current_user.email,
         "name": current_user.name,
@@ -44,42 +125,43 @@ def get_current_user_profile(
         "description": current_user.description,
         "research_area": current_user.research_area,
         "status": getattr(current_user, 'status', 'active'),
-        "h_index": profile.h_index,
-        "citations": profile.citations,
-        "funding_summary": profile.funding_summary,
-        "publications": profile.publications
-    }
+        "h_index": profile.h_index if profile else None,
+        "citations": profile.citations if profile else None,
+        "funding_summary": profile.funding_summary if profile else None,
+        "publications": profile.publications if profile else []
+    })
+    # Derived from the body, which mixes users-table fields with the profile and its publications
+    etag = profile_cache.content_etag(body)
+
+    profile_cache.cache_profile(cache_key, etag, body)
+    return _profile_response(request, etag, body, selected)
 
 @router.get("/{profile_id}", response_model=schemas.UserProfile)
 def get_user_profile_by_id(
     profile_id: int,
+    request: Request,
+    fields: Optional[str] = None,
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(database.get_db)
 ):
-    """Get any user's profile information by Profile ID (read-only)"""
+    """Get any user's profile information by Profile ID (read-only; fields as for /me)"""
+    selected = parse_fields(fields, PROFILE_FIELDS)
+    cache_key = profile_cache.profile_key(profile_id)
+    cached = profile_cache.get_cached_profile(cache_key)
+    if cached:
+        return _profile_response(request, *cached, selected)
+
     # First try to find by Profile ID (for saved matches)
-    profile = db.query(database.Profile).filter(database.Profile.id == profile_id).first()
+    profile = _load_profile(db, database.Profile.id == profile_id)
     if profile:
-        return {
-            "id": profile.id,
-            "email": profile.email,
-            "name": profile.name,
-            "organization": profile.organization,
-            "seek_share": profile.seek_share,
-            "resource_type": profile.resource_type,
-            "description": profile.description,
-            "research_area": profile.research_area,
-            "status": getattr(profile, 'status', 'active'),
-            "h_index": profile.h_index,
-            "citations": profile.citations,
-            "funding_summary": profile.funding_summary,
-            "publications": profile.publications
-        }
+        etag, body = _profile_body(profile)
+        profile_cache.cache_profile(cache_key, etag, body)
+        return _profile_response(request, etag, body, selected)
     
     # If not found in Profile table, try User table (fallback)
     user = db.query(database.User).filter(database.User.id == profile_id).first()
     if user:
-        return {
+        body = _serialize_profile({
             "id": user.id,
             "email": user.email,
             "name": user.name,
@@ -93,7 +175,10 @@ def get_user_profile_by_id(
             "citations": None,
             "funding_summary": None,
             "publications": []
-        }
+        })
+        etag = profile_cache.content_etag(body)
+        profile_cache.cache_profile(cache_key, etag, body)
+        return _profile_response(request, etag, body, selected)
     
     # If not found in either table
     raise HTTPException(status_code=404, detail="Profile not found")
@@ -118,56 +203,34 @@ def update_current_user_profile(
                 detail="Email already registered"
             )
     
-    # Update user fields
+    # Loaded before the email can change; a single transaction covers both rows
+    profile = _load_profile(db, database.Profile.email == current_user.email)
+    
+    # Update user fields, touching only values that differ so unchanged
+    # columns are left out of the UPDATE
     update_data = profile_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         if hasattr(current_user, field):
-            setattr(current_user, field, value)
-    
-    db.commit()
-    db.refresh(current_user)
+            _assign_changed(current_user, field, value)
     
-    # Also update the corresponding profile if it exists
-    profile = db.query(database.Profile).filter(database.Profile.email == current_user.email).first()
     if profile:
         # Update profile fields that match user fields
-        profile.name = current_user.name
-        profile.email = current_user.email
-        profile.organization = current_user.organization
-        profile.seek_share = current_user.seek_share
-        profile.resource_type = current_user.resource_type
-        profile.description = current_user.description
-        profile.research_area = current_user.research_area
-        profile.status = getattr(current_user, 'status', 'active')  # Sync status field
-        
-        # Update proof of work fields if provided
-        if hasattr(profile_update, 'h_index') and profile_update.h_index is not None:
-            profile.h_index = profile_update.h_index
-        if hasattr(profile_update, 'citations') and profile_update.citations is not None:
-            profile.citations = profile_update.citations
-        if hasattr(profile_update, 'funding_summary') and profile_update.funding_summary is not None:
-            profile.funding_summary = profile_update.funding_summary
-        
+        synced = {field: getattr(current_user, field) for field in PROFILE_SYNCED_FIELDS}
+        synced["status"] = getattr(current_user, 'status', 'active')  # Sync status field
         # Update primary_text for search
-        profile.primary_text = f"{current_user.name} {current_user.organization} {current_user.research_area} {current_user.description}"
+        synced["primary_text"] = f"{current_user.name} {current_user.organization} {current_user.research_area} {current_user.description}"
         
-        db.commit()
-        db.refresh(profile)
+        # Update proof of work fields if provided
+        for field in ("h_index", "citations", "funding_summary"):
+            value = getattr(profile_update, field, None)
+            if value is not None:
+                synced[field] = value
         
-        # Explicitly enqueue embedding task for the updated profile
-        # This ensures embedding recomputation happens even if SQLAlchemy hooks fail
-        try:
-            from app.hooks.profile_hooks import enqueue_embedding_task
-            enqueue_embedding_task(profile.id)
-            print(f"Embedding task enqueued for updated profile {profile.id}")
-        except Exception as e:
-            print(f"Warning: Failed to enqueue embedding task for profile {profile.id}: {e}")
-            # Don't fail update if embedding task fails - it can be computed later
-    
-    # Get updated profile data to return
-    updated_profile = db.query(database.Profile).filter(database.Profile.email == current_user.email).first()
+        for field, value in synced.items():
+            _assign_changed(profile, field, value)
     
-    return {
+    # Serialized before the commit expires the loaded rows
+    body = _serialize_profile({
         "id": current_user.id,
         "email": current_user.email,
         "name": current_user.name,
@@ -177,8 +240,16 @@ def update_current_user_profile(
         "description": current_user.description,
         "research_area": current_user.research_area,
         "status": getattr(current_user, 'status', 'active'),
-        "h_index": updated_profile.h_index if updated_profile else None,
-        "citations": updated_profile.citations if updated_profile else None,
-        "funding_summary": updated_profile.funding_summary if updated_profile else None,
-        "publications": updated_profile.publications if updated_profile else []
-    }
+        "h_index": profile.h_index if profile else None,
+        "citations": profile.citations if profile else None,
+        "funding_summary": profile.funding_summary if profile else None,
+        "publications": profile.publications if profile else []
+    })
+    
+    # After this commit the profile hooks drop the cached /profile responses and
+    # enqueue re-embedding, the latter only when an embedding-relevant field
+    # changed the profile text
+    db.commit()
+    auth.invalidate_user_cache(current_user.id)
+    
+    return body
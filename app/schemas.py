@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Union
 
 
 class UserCreate(BaseModel):
@@ -96,3 +96,30 @@ class UserProfileUpdate(BaseModel):
     h_index: Optional[int] = None
     citations: Optional[int] = None
     funding_summary: Optional[str] = None
+
+
+class SavedMatchItem(BaseModel):
+    profile_id: int
+    # Accepts a number or the percentage string the frontend sends (e.g. "85%")
+    match_score: Optional[Union[float, str]] = None
+
+class SavedMatchBatchCreate(BaseModel):
+    matches: List[SavedMatchItem]
+
+class SavedMatchBatchDelete(BaseModel):
+    profile_ids: List[int]
+
+class SavedMatchProfile(BaseModel):
+    id: int
+    name: Optional[str] = None
+    organization: Optional[str] = None
+    seek_share: Optional[str] = None
+    resource_type: Optional[str] = None
+    description: Optional[str] = None
+    research_area: Optional[str] = None
+    primary_text: Optional[str] = None
+    match_score: Optional[float] = None
+
+class SavedMatchPage(BaseModel):
+    items: List[SavedMatchProfile]
+    next_cursor: Optional[int] = None
@@ -1,79 +1,388 @@
-import pandas as pd
-from sqlalchemy import create_engine, text
+#!/usr/bin/env python3
+"""
+Bulk ingest of the Google Forms survey export into users/profiles.
+
+The CSV is streamed in chunks. Each chunk is normalized, COPY'd into a
+temporary staging table and upserted into ``users`` and ``profiles`` in a
+single transaction that also advances a checkpoint, so an interrupted run
+resumes where it stopped and re-running a finished import is a no-op.
+Profiles that were created or changed are handed to batched embedding.
+
+Usage:
+    python app/seed_database.py [--csv PATH] [--chunk-size N] [--embed queue|inline|none] [--restart]
+"""
 import os
-from sentence_transformers import SentenceTransformer
+import io
+import sys
+import csv
+import hashlib
+import argparse
+import logging
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import engine, get_db, IngestCheckpoint, Profile, ProfileFacetCount
+from app.utils.facets import rebuild_facet_counts
+from app.utils.match_cache import invalidate_matches
+from app.utils.profile_cache import invalidate_profiles
+from app.utils.profile_cards import invalidate_profile_cards
 
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = "postgresql://rudradesai@localhost/matchmaking_db"
 DATA_DIR = "data"
 RAW_CSV_PATH = os.path.join(DATA_DIR, "Research Expertise Connector (Responses).csv")
+DEFAULT_CHUNK_SIZE = 1000
+# Profile IDs per embedding task
+EMBED_BATCH_SIZE = 256
 
-df_original = pd.read_csv(RAW_CSV_PATH)
-required_columns = [
-    'Last Name, First Name', 'Email Address', 'Organization', 
-    'Research Expertise to seek / share', 'Resource Type', 
-    'Brief Description of Resource/Study', 'Section/Area/Research Areas'
-]
-df = df_original[required_columns].copy()
-df.columns = [
-    'name', 'email', 'organization', 'seek_share', 
-    'resource_type', 'description', 'research_area'
+# Imported accounts cannot log in until the researcher registers; passlib
+# does not recognise this value as a hash so verification always fails.
+IMPORTED_PASSWORD_PLACEHOLDER = "!"
+
+# Survey column -> normalized column
+CSV_COLUMNS = {
+    'Email Address': 'email',
+    'Last Name, First Name': 'name',
+    'Organization': 'organization',
+    'Research Expertise to seek / share': 'seek_share',
+    'Resource Type': 'resource_type',
+    'Brief Description of Resource/Study': 'description',
+    'Section/Area/Research Areas': 'research_area',
+    'Status': 'status',
+}
+# Used to build research_area when the combined column is empty
+RESEARCH_AREA_FALLBACK_COLUMNS = ['Choose your Section', 'Choose your Area', 'Choose your Research Area(s)']
+
+STAGING_COLUMNS = [
+    'source_row', 'email', 'name', 'organization', 'seek_share',
+    'resource_type', 'description', 'research_area', 'primary_text', 'status'
 ]
-df['primary_text'] = (df['research_area'].str.strip() + ' ' + df['description'].str.strip()).str.strip()
-
-# --- 3. Generate Embeddings ---
-print("Loading model and generating embeddings...")
-model = SentenceTransformer("all-MiniLM-L6-v2")
-embeddings = model.encode(df['primary_text'].tolist(), show_progress_bar=True)
-df['embedding'] = list(embeddings)
-
-#establishing DB connection
-engine = create_engine(DATABASE_URL)
-
-with engine.connect() as connection:
-    connection.execute(text('DROP TABLE IF EXISTS profiles;'))
-    connection.execute(test('DROP TABLE IF EXISTS users;'))
-
-    connection.execute(text(
-        '''
-        CREATE TABLE users(
-        id SERIAL PRIMARY KEY,
-        email TEXT UNIQUE NOT NULL,
-        hashed_password TEXT NOT NULL)
-        '''
-    ))
-    print("Tables Users created")
-    connection.execute(text(
-        '''
-CREATE TABLE profiles(
-id SERIAL PRIMARY KEY,
-user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-name TEXT,
-organization TEXT,
-seek_share TEXT,
-resource_type TEXT,
-description TEXT,
-research_area TEXT,
-primary_text TEXT,
-embedding VECTOR (384))'''
-    ))
-    print("Table Profiled created")
-    connection.commit()
-    for _, rows in df.iterrows():
-        user_insert_result = connection.execute(
-            text("INSERT INTO users (email , hashed_password) VALUES(:email , :password) RETURNING id"),
-            {'email' : rows['email'] , 'password' : "placeholder_password"}
-        )
-        user_id = user_insert_result.fetchone()[0]
-        connection.execute(
-            text(
-                """
-INSERT INTO profiles(name , user_id , organization, seek_share,  resource_type , description , research_area , primary_text, embedding)
-VALUES(:name , :user_id , :organization, :seek_share , :resource_type , :description , :research_area , :primary_text , :embedding)"""
-            ),
-            {**rows.to_dict() , 'embedding' : str(list(rows['embedding']))}
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS profile_ingest_staging (
+        source_row BIGINT NOT NULL,
+        email TEXT NOT NULL,
+        name TEXT,
+        organization TEXT,
+        seek_share TEXT,
+        resource_type TEXT,
+        description TEXT,
+        research_area TEXT,
+        primary_text TEXT,
+        status TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Only accounts that still hold the import placeholder are refreshed, so
+# re-running an import never overwrites a registered researcher's edits.
+UPSERT_USERS_SQL = """
+    INSERT INTO users (email, hashed_password, name, organization, seek_share,
+                       resource_type, description, research_area, status)
+    SELECT DISTINCT ON (email)
+           email, %(placeholder)s, COALESCE(name, ''), organization, COALESCE(seek_share, ''),
+           COALESCE(resource_type, ''), COALESCE(description, ''), COALESCE(research_area, ''), status
+    FROM profile_ingest_staging
+    ORDER BY email, source_row DESC
+    ON CONFLICT (email) DO UPDATE SET
+        name = EXCLUDED.name,
+        organization = EXCLUDED.organization,
+        seek_share = EXCLUDED.seek_share,
+        resource_type = EXCLUDED.resource_type,
+        description = EXCLUDED.description,
+        research_area = EXCLUDED.research_area,
+        status = EXCLUDED.status
+    WHERE users.hashed_password = %(placeholder)s
+      AND (users.name, users.organization, users.seek_share, users.resource_type,
+           users.description, users.research_area, users.status)
+          IS DISTINCT FROM
+          (EXCLUDED.name, EXCLUDED.organization, EXCLUDED.seek_share, EXCLUDED.resource_type,
+           EXCLUDED.description, EXCLUDED.research_area, EXCLUDED.status)
+"""
+
+# Returns the ids of profiles that were inserted or actually changed
+UPSERT_PROFILES_SQL = """
+    WITH source AS (
+        SELECT DISTINCT ON (email) *
+        FROM profile_ingest_staging
+        ORDER BY email, source_row DESC
+    ),
+    updated AS (
+        UPDATE profiles p SET
+            name = s.name,
+            organization = s.organization,
+            seek_share = s.seek_share,
+            resource_type = s.resource_type,
+            description = s.description,
+            research_area = s.research_area,
+            primary_text = s.primary_text,
+            status = s.status
+        FROM source s
+        JOIN users u ON u.email = s.email AND u.hashed_password = %(placeholder)s
+        WHERE p.email = s.email
+          AND (p.name, p.organization, p.seek_share, p.resource_type,
+               p.description, p.research_area, p.primary_text, p.status)
+              IS DISTINCT FROM
+              (s.name, s.organization, s.seek_share, s.resource_type,
+               s.description, s.research_area, s.primary_text, s.status)
+        RETURNING p.id
+    ),
+    inserted AS (
+        INSERT INTO profiles (name, email, organization, seek_share, resource_type,
+                              description, research_area, primary_text, status)
+        SELECT s.name, s.email, s.organization, s.seek_share, s.resource_type,
+               s.description, s.research_area, s.primary_text, s.status
+        FROM source s
+        WHERE NOT EXISTS (SELECT 1 FROM profiles p WHERE p.email = s.email)
+        RETURNING id
+    )
+    SELECT id FROM updated
+    UNION ALL
+    SELECT id FROM inserted
+"""
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    """Strip whitespace and turn empty strings into None"""
+    if value is None:
+        return None
+    value = value.strip()
+    return value or None
+
+
+def normalize_row(record: Dict[str, str], source_row: int) -> Optional[Dict[str, object]]:
+    """
+    Map one survey response onto the profile columns
+
+    Args:
+        record: CSV row keyed by survey column header
+        source_row: 1-based data row number (later rows win for duplicate emails)
+
+    Returns:
+        dict: Normalized row, or None if the response has no email
+    """
+    email = _clean(record.get('Email Address'))
+    if not email:
+        return None
+
+    row = {normalized: _clean(record.get(column)) for column, normalized in CSV_COLUMNS.items()}
+    # Kept as typed: registration stores emails that way and every lookup is case-sensitive
+    row['email'] = email
+    row['source_row'] = source_row
+
+    if not row['research_area']:
+        parts = [_clean(record.get(column)) for column in RESEARCH_AREA_FALLBACK_COLUMNS]
+        row['research_area'] = ", ".join(part for part in parts if part) or None
+
+    if row['seek_share']:
+        row['seek_share'] = row['seek_share'].lower()
+    row['status'] = (row['status'] or 'active').lower()
+
+    row['primary_text'] = " ".join(
+        part for part in (row['research_area'], row['description']) if part
+    ) or None
+    return row
+
+
+def file_fingerprint(path: str) -> str:
+    """SHA256 of the file contents (identifies the export a checkpoint belongs to)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_chunks(path: str, chunk_size: int, skip_rows: int = 0) -> Iterator[Tuple[int, List[Dict[str, object]]]]:
+    """
+    Stream normalized rows from the CSV in chunks
+
+    Args:
+        path: CSV file path
+        chunk_size: Number of data rows per chunk (before dropping rows without email)
+        skip_rows: Number of data rows already ingested
+
+    Yields:
+        tuple: (data rows consumed so far, normalized rows of the chunk)
+    """
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        reader = csv.DictReader(handle)
+        missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"CSV is missing required columns: {sorted(missing)}")
+
+        consumed = skip_rows
+        rows = enumerate(islice(reader, skip_rows, None), start=skip_rows + 1)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            consumed += len(chunk)
+            normalized = [normalize_row(record, source_row) for source_row, record in chunk]
+            yield consumed, [row for row in normalized if row is not None]
+
+
+def _copy_rows(cursor, rows: List[Dict[str, object]]) -> None:
+    """COPY normalized rows into the staging table"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if row[column] is None else row[column] for column in STAGING_COLUMNS])
+    buffer.seek(0)
+    # Empty unquoted fields load as NULL
+    cursor.copy_expert(
+        f"COPY profile_ingest_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def ingest_chunk(connection, rows: List[Dict[str, object]], source: str, fingerprint: str, rows_done: int, completed: bool) -> List[int]:
+    """
+    Load one chunk and advance the checkpoint in a single transaction
+
+    Args:
+        connection: psycopg2 connection (raw DBAPI)
+        rows: Normalized rows
+        source: Checkpoint key of the file
+        fingerprint: File fingerprint stored with the checkpoint
+        rows_done: Data rows consumed after this chunk
+        completed: Whether this is the final chunk
+
+    Returns:
+        list: IDs of profiles inserted or changed by this chunk
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_STAGING_SQL)
+        changed_ids: List[int] = []
+        if rows:
+            _copy_rows(cursor, rows)
+            params = {"placeholder": IMPORTED_PASSWORD_PLACEHOLDER}
+            cursor.execute(UPSERT_USERS_SQL, params)
+            cursor.execute(UPSERT_PROFILES_SQL, params)
+            changed_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            """
+            INSERT INTO ingest_checkpoints (source, fingerprint, rows_done, completed, updated_at)
+            VALUES (%s, %s, %s, %s, now())
+            ON CONFLICT (source) DO UPDATE SET
+                fingerprint = EXCLUDED.fingerprint,
+                rows_done = EXCLUDED.rows_done,
+                completed = EXCLUDED.completed,
+                updated_at = EXCLUDED.updated_at
+            """,
+            (source, fingerprint, rows_done, completed)
         )
     connection.commit()
+    return changed_ids
+
+
+def hand_off_embeddings(profile_ids: List[int], mode: str) -> None:
+    """
+    Send changed profiles to batched embedding
+
+    Args:
+        profile_ids: Profiles inserted or changed by the ingest
+        mode: 'queue' (Celery), 'inline' (compute in this process) or 'none'
+    """
+    if not profile_ids or mode == 'none':
+        return
+
+    from app.tasks.embedding_tasks import embed_profiles, embed_profiles_batch
+
+    for start in range(0, len(profile_ids), EMBED_BATCH_SIZE):
+        batch = profile_ids[start:start + EMBED_BATCH_SIZE]
+        if mode == 'inline':
+            db = next(get_db())
+            try:
+                profiles = db.query(Profile).filter(Profile.id.in_(batch)).all()
+                result = embed_profiles(db, profiles)
+                logger.info(f"Embedded {result['processed']} profiles inline ({result['skipped']} up-to-date)")
+            finally:
+                db.close()
+        else:
+            try:
+                task = embed_profiles_batch.delay(batch)
+                logger.info(f"Enqueued batch embedding task {task.id} for {len(batch)} profiles")
+            except Exception as e:
+                # The profiles stay listed by `embedding-cli outdated` and are picked up by a reindex
+                logger.error(f"Failed to enqueue embeddings for {len(batch)} profiles: {e}")
+
+
+def ingest_csv(path: str = RAW_CSV_PATH, chunk_size: int = DEFAULT_CHUNK_SIZE, embed: str = 'queue', restart: bool = False) -> dict:
+    """
+    Stream a survey export into users/profiles
+
+    Args:
+        path: CSV file path
+        chunk_size: Data rows per transaction
+        embed: Embedding hand-off mode ('queue', 'inline' or 'none')
+        restart: Ignore any checkpoint and re-read the whole file
+
+    Returns:
+        dict: Summary with rows read and profiles changed
+    """
+    IngestCheckpoint.__table__.create(bind=engine, checkfirst=True)
+    ProfileFacetCount.__table__.create(bind=engine, checkfirst=True)
+
+    source = os.path.abspath(path)
+    fingerprint = file_fingerprint(path)
+
+    db = next(get_db())
+    try:
+        checkpoint = db.query(IngestCheckpoint).filter(IngestCheckpoint.source == source).first()
+        skip_rows = 0
+        if checkpoint and checkpoint.fingerprint == fingerprint and not restart:
+            if checkpoint.completed:
+                logger.info(f"{path} was already ingested ({checkpoint.rows_done} rows); use --restart to re-import")
+                return {"rows": checkpoint.rows_done, "changed_profiles": 0, "resumed_from": checkpoint.rows_done}
+            skip_rows = checkpoint.rows_done
+            logger.info(f"Resuming {path} after {skip_rows} rows")
+    finally:
+        db.close()
+
+    rows_done = skip_rows
+    changed_total = 0
+    raw_connection = engine.raw_connection()
+    try:
+        for rows_done, rows in iter_chunks(path, chunk_size, skip_rows):
+            changed_ids = ingest_chunk(raw_connection, rows, source, fingerprint, rows_done, completed=False)
+            changed_total += len(changed_ids)
+            # The upserts bypass the ORM hooks that drop cached match cards, profile responses and results
+            invalidate_profile_cards(changed_ids)
+            invalidate_profiles(changed_ids)
+            invalidate_matches()
+            logger.info(f"Ingested {rows_done} rows ({len(changed_ids)} profiles created or changed in this chunk)")
+            hand_off_embeddings(changed_ids, embed)
+        ingest_chunk(raw_connection, [], source, fingerprint, rows_done, completed=True)
+    finally:
+        raw_connection.close()
+
+    # COPY/upsert bypasses the ORM hooks that maintain facet counts
+    with engine.begin() as connection:
+        rebuild_facet_counts(connection)
+
+    logger.info(f"Ingest finished: {rows_done} rows, {changed_total} profiles created or changed")
+    return {"rows": rows_done, "changed_profiles": changed_total, "resumed_from": skip_rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest survey responses into users/profiles')
+    parser.add_argument('--csv', default=RAW_CSV_PATH, help='Path to the survey CSV export')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per transaction')
+    parser.add_argument('--embed', choices=['queue', 'inline', 'none'], default='queue',
+                        help='Enqueue batched embedding tasks, compute inline, or skip')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and re-read the whole file')
+    args = parser.parse_args()
+
+    ingest_csv(args.csv, chunk_size=args.chunk_size, embed=args.embed, restart=args.restart)
 
-print("Success")
 
+if __name__ == '__main__':
+    main()
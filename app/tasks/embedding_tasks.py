@@ -7,21 +7,36 @@ import logging
 from typing import Optional
 from datetime import datetime
 
-from celery import current_task
+from celery.signals import task_failure
 from celery.exceptions import Retry
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.celery_app import celery_app
-from app.database import get_db, Profile, ResearcherEmbedding
-from app.utils.embedding_utils import create_profile_text, normalize_embedding
+from app.database import get_db, Profile, Publication, ResearcherEmbedding, ProfileChunkEmbedding, PublicationEmbedding
+from app.tasks.jobs import add_job_progress, fail_job, finish_dispatch, start_job
+from app.utils.embedding_utils import (
+    create_profile_text, create_profile_chunks, create_publication_text,
+    normalize_embedding, normalize_embeddings, compute_text_hash
+)
+from app.utils.match_cache import invalidate_matches
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of texts passed to a single model.encode call in batch tasks
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# Profiles per embed_profiles_batch task dispatched by a reindex
+REINDEX_BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", "256"))
+
+# Also store per-chunk embeddings (profile_chunk_embeddings) for multi-vector matching
+CHUNK_EMBEDDINGS_ENABLED = os.getenv("CHUNK_EMBEDDINGS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
 # Global model instance (loaded once per worker)
 _model_instance: Optional[SentenceTransformer] = None
 _model_version: Optional[str] = None
@@ -44,13 +59,14 @@ def get_embedding_model() -> tuple[SentenceTransformer, str]:
     return _model_instance, _model_version
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
-def embed_profile(self, user_id: int) -> dict:
+@celery_app.task(bind=True, ignore_result=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
+def embed_profile(self, user_id: int, job_id: Optional[str] = None) -> dict:
     """
     Async task to compute and store embedding for a researcher profile
     
     Args:
         user_id: Profile ID to process
+        job_id: embedding_jobs row to report to (admin/CLI triggers only)
         
     Returns:
         dict: Task result with status and metadata
@@ -65,6 +81,9 @@ def embed_profile(self, user_id: int) -> dict:
         profile = db.query(Profile).filter(Profile.id == user_id).first()
         if not profile:
             logger.error(f"Profile not found for user_id={user_id}")
+            if job_id:
+                add_job_progress(db, job_id, errors=1, message=f"Profile {user_id} not found")
+                db.commit()
             return {"status": "error", "message": f"Profile not found for user_id={user_id}"}
         
         # Create profile text for embedding
@@ -78,11 +97,17 @@ def embed_profile(self, user_id: int) -> dict:
         
         if existing_embedding and existing_embedding.text_sha256 == text_hash:
             logger.info(f"Embedding for user_id={user_id} is already up-to-date (hash: {text_hash[:8]}...)")
+            # Publications are hashed separately and may have changed on their own
+            publications = store_publication_embeddings(db, [user_id])
+            if job_id:
+                add_job_progress(db, job_id, skipped=1)
+            db.commit()
             return {
                 "status": "skipped", 
                 "message": "Embedding already up-to-date",
                 "user_id": user_id,
-                "text_hash": text_hash
+                "text_hash": text_hash,
+                "publications": publications
             }
         
         # Load model and compute embedding
@@ -93,10 +118,6 @@ def embed_profile(self, user_id: int) -> dict:
         raw_embedding = model.encode([profile_text])[0]
         normalized_embedding = normalize_embedding(raw_embedding)
         
-        # Update task progress (only if running in Celery context)
-        if hasattr(self, 'request') and self.request.id:
-            current_task.update_state(state='PROGRESS', meta={'progress': 50, 'status': 'Computing embedding'})
-        
         # Upsert embedding record
         if existing_embedding:
             # Update existing
@@ -117,6 +138,11 @@ def embed_profile(self, user_id: int) -> dict:
             db.add(new_embedding)
             logger.info(f"Created new embedding for user_id={user_id}")
         
+        store_profile_chunks(db, [profile], model, model_version)
+        publications = store_publication_embeddings(db, [user_id])
+        if job_id:
+            add_job_progress(db, job_id, processed=1)
+        
         # Commit to database
         db.commit()
         
@@ -127,6 +153,7 @@ def embed_profile(self, user_id: int) -> dict:
             "model_version": model_version,
             "text_hash": text_hash,
             "embedding_dimension": len(normalized_embedding),
+            "publications": publications,
             "processed_at": datetime.utcnow().isoformat()
         }
         
@@ -144,16 +171,24 @@ def embed_profile(self, user_id: int) -> dict:
         db.close()
 
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, ignore_result=True)
 def reindex_all_profiles(self, force: bool = False) -> dict:
     """
     Admin task to reindex all profiles (useful for model upgrades)
     
+    Profile IDs are paged by key and fanned out as embed_profiles_batch
+    tasks on the rate-limited bulk queue. The task does not wait for them,
+    so a reindex never holds a worker slot or sits in front of interactive
+    embed_profile jobs. Progress is tracked in the embedding_jobs row keyed
+    by this task's ID, which the batches update as they finish. Its total is
+    the profile count at the start until paging ends, then the number of
+    profiles actually dispatched.
+    
     Args:
         force: If True, recompute all embeddings regardless of hash
         
     Returns:
-        dict: Summary of reindexing results
+        dict: Summary of the dispatched batches
     """
     task_id = self.request.id
     logger.info(f"Starting bulk reindexing task {task_id} (force={force})")
@@ -161,80 +196,320 @@ def reindex_all_profiles(self, force: bool = False) -> dict:
     db: Session = next(get_db())
     
     try:
-        # Get all profiles
-        profiles = db.query(Profile).all()
-        total_profiles = len(profiles)
-        
+        total_profiles = db.query(Profile.id).count()
+        if task_id:
+            start_job(db, task_id, "reindex", total_profiles, dispatching=True)
+            if total_profiles == 0:
+                finish_dispatch(db, task_id, 0, message="No profiles to reindex")
+            db.commit()
         if total_profiles == 0:
             logger.info("No profiles found for reindexing")
-            return {"status": "completed", "total_profiles": 0, "processed": 0, "skipped": 0, "errors": 0}
+            return {"status": "completed", "total_profiles": 0, "batches": 0, "batch_task_ids": []}
         
         logger.info(f"Found {total_profiles} profiles for reindexing")
         
-        processed = 0
-        skipped = 0
-        errors = 0
-        
-        for i, profile in enumerate(profiles):
-            try:
-                # Update progress (only if running in Celery context)
-                if hasattr(self, 'request') and self.request.id:
-                    progress = int((i / total_profiles) * 100)
-                    current_task.update_state(
-                        state='PROGRESS', 
-                        meta={
-                            'progress': progress, 
-                            'status': f'Processing profile {i+1}/{total_profiles}',
-                            'processed': processed,
-                            'skipped': skipped,
-                            'errors': errors
-                        }
-                )
-                
-                # Enqueue individual embedding task
-                if force:
-                    # Force recomputation by temporarily clearing hash check
-                    result = embed_profile.apply_async(args=[profile.id])
-                    result.get(timeout=300)  # Wait up to 5 minutes per profile
-                    processed += 1
-                else:
-                    # Let the task decide based on hash
-                    result = embed_profile.apply_async(args=[profile.id])
-                    task_result = result.get(timeout=300)
-                    
-                    if task_result["status"] == "success":
-                        processed += 1
-                    elif task_result["status"] == "skipped":
-                        skipped += 1
-                    else:
-                        errors += 1
-                        
-            except Exception as e:
-                logger.error(f"Error processing profile {profile.id}: {str(e)}")
-                errors += 1
-                continue
-        
-        logger.info(f"Bulk reindexing completed: {processed} processed, {skipped} skipped, {errors} errors")
+        dispatched = 0
+        batch_task_ids = []
+        after_id = 0
+        while True:
+            batch = [
+                profile_id for (profile_id,) in db.query(Profile.id)
+                .filter(Profile.id > after_id)
+                .order_by(Profile.id)
+                .limit(REINDEX_BATCH_SIZE)
+            ]
+            if not batch:
+                break
+            result = embed_profiles_batch.apply_async(args=[batch, force], kwargs={"job_id": task_id})
+            batch_task_ids.append(result.id)
+            dispatched += len(batch)
+            after_id = batch[-1]
+        
+        # Profiles added or deleted while paging make this differ from the count above
+        if task_id:
+            finish_dispatch(db, task_id, dispatched)
+            db.commit()
+        logger.info(f"Bulk reindexing dispatched {dispatched} profiles in {len(batch_task_ids)} batches")
         
         return {
-            "status": "completed",
-            "total_profiles": total_profiles,
-            "processed": processed,
-            "skipped": skipped,
-            "errors": errors,
-            "completed_at": datetime.utcnow().isoformat()
+            "status": "dispatched",
+            "total_profiles": dispatched,
+            "batches": len(batch_task_ids),
+            "batch_task_ids": batch_task_ids,
+            "force": force,
+            "dispatched_at": datetime.utcnow().isoformat()
         }
         
     except Exception as e:
         logger.error(f"Error in bulk reindexing task: {str(e)}")
+        if task_id:
+            db.rollback()
+            fail_job(db, task_id, str(e))
+            db.commit()
         return {
             "status": "error",
             "message": str(e),
             "total_profiles": 0,
-            "processed": 0,
-            "skipped": 0,
-            "errors": 1
+            "batches": 0,
+            "batch_task_ids": []
+        }
+        
+    finally:
+        db.close()
+
+
+def store_profile_chunks(db: Session, profiles: list, model, model_version: str) -> int:
+    """
+    Replace the chunk embeddings of the given profiles
+    
+    All chunks of all profiles are encoded together in EMBEDDING_BATCH_SIZE
+    batches. Does not commit; callers commit together with the profile-level
+    embedding so both stay in sync.
+    
+    Args:
+        db: Database session
+        profiles: Profile instances whose chunks changed
+        model: Loaded SentenceTransformer
+        model_version: Model name stored with each chunk
+        
+    Returns:
+        int: Number of chunks stored
+    """
+    if not CHUNK_EMBEDDINGS_ENABLED or not profiles:
+        return 0
+    
+    chunks = [(profile.id, *chunk) for profile in profiles for chunk in create_profile_chunks(profile)]
+    db.query(ProfileChunkEmbedding).filter(
+        ProfileChunkEmbedding.profile_id.in_([profile.id for profile in profiles])
+    ).delete(synchronize_session=False)
+    if not chunks:
+        return 0
+    
+    vectors = normalize_embeddings(
+        model.encode([text for _, _, _, text in chunks], batch_size=EMBEDDING_BATCH_SIZE)
+    )
+    now = datetime.utcnow()
+    db.execute(pg_insert(ProfileChunkEmbedding).values([
+        {
+            "profile_id": profile_id,
+            "field": field,
+            "chunk_index": chunk_index,
+            "chunk_text": text,
+            "embedding": vector.tolist(),
+            "model_version": model_version,
+            "updated_at": now,
+        }
+        for (profile_id, field, chunk_index, text), vector in zip(chunks, vectors)
+    ]))
+    return len(chunks)
+
+
+def store_publication_embeddings(db: Session, profile_ids: list, force: bool = False) -> int:
+    """
+    Embed the publications of the given profiles whose text changed
+    
+    Each publication is hashed on its own, so publications are kept current
+    even when the profile text is unchanged. Rows of deleted publications go
+    away through the foreign key cascade. Does not commit.
+    
+    Args:
+        db: Database session
+        profile_ids: Profiles whose publications to check
+        force: If True, recompute regardless of hash
+        
+    Returns:
+        int: Number of publications embedded
+    """
+    if not profile_ids:
+        return 0
+    
+    publications = db.query(Publication).filter(Publication.profile_id.in_(profile_ids)).all()
+    existing_hashes = dict(
+        db.query(PublicationEmbedding.publication_id, PublicationEmbedding.text_sha256)
+        .filter(PublicationEmbedding.profile_id.in_(profile_ids))
+        .all()
+    )
+    
+    pending = []
+    for publication in publications:
+        publication_text = create_publication_text(publication)
+        text_hash = compute_text_hash(publication_text)
+        if force or existing_hashes.get(publication.id) != text_hash:
+            pending.append((publication, publication_text, text_hash))
+    if not pending:
+        return 0
+    
+    model, model_version = get_embedding_model()
+    for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+        batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+        vectors = normalize_embeddings(model.encode([text for _, text, _ in batch], batch_size=EMBEDDING_BATCH_SIZE))
+        now = datetime.utcnow()
+        
+        insert_stmt = pg_insert(PublicationEmbedding).values([
+            {
+                "publication_id": publication.id,
+                "profile_id": publication.profile_id,
+                "embedding": vector.tolist(),
+                "model_version": model_version,
+                "text_sha256": text_hash,
+                "updated_at": now,
+            }
+            for (publication, _, text_hash), vector in zip(batch, vectors)
+        ])
+        db.execute(insert_stmt.on_conflict_do_update(
+            index_elements=[PublicationEmbedding.publication_id],
+            set_={
+                column: insert_stmt.excluded[column]
+                for column in ("profile_id", "embedding", "model_version", "text_sha256", "updated_at")
+            },
+        ))
+    
+    logger.info(f"Stored {len(pending)} publication embeddings")
+    return len(pending)
+
+
+def embed_profiles(db: Session, profiles: list, force: bool = False) -> dict:
+    """
+    Compute and upsert embeddings for many profiles using batched encoding
+    
+    Profiles whose text hash matches the stored embedding are skipped unless
+    ``force`` is set. Each encoded batch is written with one
+    INSERT ... ON CONFLICT statement and committed.
+    
+    Args:
+        db: Database session
+        profiles: Profile instances to process
+        force: If True, recompute embeddings regardless of hash
+        
+    Returns:
+        dict: Counts of processed and skipped profiles
+    """
+    profile_ids = [profile.id for profile in profiles]
+    existing_hashes = dict(
+        db.query(ResearcherEmbedding.user_id, ResearcherEmbedding.text_sha256)
+        .filter(ResearcherEmbedding.user_id.in_(profile_ids))
+        .all()
+    ) if profile_ids else {}
+    
+    pending = []
+    for profile in profiles:
+        profile_text = create_profile_text(profile)
+        text_hash = compute_text_hash(profile_text)
+        if force or existing_hashes.get(profile.id) != text_hash:
+            pending.append((profile, profile_text, text_hash))
+    
+    skipped = len(profiles) - len(pending)
+    publications = store_publication_embeddings(db, profile_ids, force=force)
+    db.commit()
+    if not pending:
+        return {"processed": 0, "skipped": skipped, "publications": publications}
+    
+    model, model_version = get_embedding_model()
+    for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+        batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+        raw_embeddings = model.encode([text for _, text, _ in batch], batch_size=EMBEDDING_BATCH_SIZE)
+        normalized = normalize_embeddings(raw_embeddings)
+        now = datetime.utcnow()
+        
+        insert_stmt = pg_insert(ResearcherEmbedding).values([
+            {
+                "user_id": profile.id,
+                "embedding": vector.tolist(),
+                "model_version": model_version,
+                "text_sha256": text_hash,
+                "updated_at": now,
+            }
+            for (profile, _, text_hash), vector in zip(batch, normalized)
+        ])
+        db.execute(insert_stmt.on_conflict_do_update(
+            index_elements=[ResearcherEmbedding.user_id],
+            set_={
+                "embedding": insert_stmt.excluded.embedding,
+                "model_version": insert_stmt.excluded.model_version,
+                "text_sha256": insert_stmt.excluded.text_sha256,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        ))
+        store_profile_chunks(db, [profile for profile, _, _ in batch], model, model_version)
+        db.commit()
+        logger.info(f"Stored {len(batch)} embeddings ({start + len(batch)}/{len(pending)})")
+    
+    # The bulk upserts bypass the ORM hooks that drop cached match results
+    invalidate_matches()
+    return {"processed": len(pending), "skipped": skipped, "publications": publications}
+
+
+@celery_app.task(bind=True, ignore_result=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
+def embed_profiles_batch(self, profile_ids: list, force: bool = False, job_id: Optional[str] = None) -> dict:
+    """
+    Async task to compute embeddings for a batch of profiles in one pass
+    
+    Args:
+        profile_ids: Profile IDs to process
+        force: If True, recompute embeddings regardless of hash
+        job_id: embedding_jobs row (the parent reindex) to add this batch's counts to
+        
+    Returns:
+        dict: Task result with processed/skipped counts
+    """
+    logger.info(f"Starting batch embedding task {self.request.id} for {len(profile_ids)} profiles")
+    
+    db: Session = next(get_db())
+    
+    try:
+        profiles = db.query(Profile).filter(Profile.id.in_(profile_ids)).all()
+        result = embed_profiles(db, profiles, force=force)
+        if job_id:
+            add_job_progress(
+                db, job_id, processed=result["processed"], skipped=result["skipped"],
+                errors=len(profile_ids) - len(profiles)
+            )
+            db.commit()
+        logger.info(f"Batch embedding completed: {result['processed']} processed, {result['skipped']} skipped")
+        return {
+            "status": "success",
+            "requested": len(profile_ids),
+            "missing": len(profile_ids) - len(profiles),
+            **result,
+            "processed_at": datetime.utcnow().isoformat()
         }
         
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in batch embedding task: {str(e)}")
+        db.rollback()
+        raise self.retry(countdown=60, exc=e)
+        
+    finally:
+        db.close()
+
+
+@task_failure.connect
+def record_job_failure(sender=None, task_id=None, exception=None, args=None, kwargs=None, **extra):
+    """
+    Count a tracked task that failed for good (retries exhausted) against its job
+    """
+    args, kwargs = list(args or ()), kwargs or {}
+    if sender is embed_profiles_batch:
+        job_id = kwargs.get("job_id") or (args[2] if len(args) > 2 else None)
+        profile_ids = kwargs.get("profile_ids") or (args[0] if args else [])
+        if not job_id:
+            return
+        record = lambda db: add_job_progress(db, job_id, errors=len(profile_ids), message=str(exception))
+    elif sender is embed_profile:
+        job_id = kwargs.get("job_id") or (args[1] if len(args) > 1 else None)
+        if not job_id:
+            return
+        record = lambda db: fail_job(db, job_id, str(exception))
+    elif sender is reindex_all_profiles:
+        record = lambda db: fail_job(db, task_id, str(exception))
+    else:
+        return
+    
+    db: Session = next(get_db())
+    try:
+        record(db)
+        db.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Failed to record failure of task {task_id}: {str(e)}")
     finally:
         db.close()
@@ -0,0 +1,143 @@
+"""
+Progress of tracked embedding jobs, kept in embedding_jobs.
+
+Embedding tasks run with ``ignore_result``, so nothing is written to the
+Redis result backend per task. Jobs someone wants to follow (a reindex, or
+a single profile triggered from the admin API or the CLI) get a row keyed by
+their Celery task ID instead. Workers add to its counters once per batch of
+profiles, and the row moves to ``completed`` when every profile is accounted
+for. Untracked jobs (registrations, profile edits, ingest) write nothing.
+
+A reindex cannot know its final count up front: profiles may be added or
+deleted while it pages through them. It stays ``dispatching`` (and cannot
+complete) until finish_dispatch records how many profiles it actually sent.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import EmbeddingJob
+
+
+def create_job(db, job_id: str, kind: str, total: int = 0) -> None:
+    """
+    Register a job before its task is published. Does not commit.
+
+    Args:
+        db: Database session
+        job_id: Celery task ID the job runs under
+        kind: 'profile' or 'reindex'
+        total: Profiles the job covers, if already known
+    """
+    now = datetime.utcnow()
+    db.execute(pg_insert(EmbeddingJob).values(
+        id=job_id, kind=kind, status="queued", total=total, created_at=now, updated_at=now
+    ).on_conflict_do_nothing(index_elements=[EmbeddingJob.id]))
+
+
+def start_job(db, job_id: str, kind: str, total: int, dispatching: bool = False) -> None:
+    """
+    Mark a job running, creating the row if the task was published without
+    one. Does not commit.
+
+    Args:
+        db: Database session
+        job_id: Celery task ID the job runs under
+        kind: 'profile' or 'reindex'
+        total: Profiles the job covers
+        dispatching: total is only an estimate; the job cannot complete until
+            finish_dispatch records the final count
+    """
+    now = datetime.utcnow()
+    status = "dispatching" if dispatching else "running"
+    stmt = pg_insert(EmbeddingJob).values(
+        id=job_id, kind=kind, status=status, total=total, created_at=now, updated_at=now
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[EmbeddingJob.id],
+        set_={"status": status, "total": total, "updated_at": now},
+    ))
+
+
+def finish_dispatch(db, job_id: str, total: int, message: Optional[str] = None) -> None:
+    """
+    Record the number of profiles a dispatching job actually sent, completing
+    it if its batches have already accounted for all of them. Does not commit.
+    """
+    done = EmbeddingJob.processed + EmbeddingJob.skipped + EmbeddingJob.errors
+    values = {
+        "total": total,
+        "status": case(
+            (EmbeddingJob.status == "failed", EmbeddingJob.status),
+            (done >= total, "completed"),
+            else_="running",
+        ),
+        "updated_at": datetime.utcnow(),
+    }
+    if message is not None:
+        values["message"] = message
+    db.execute(update(EmbeddingJob).where(EmbeddingJob.id == job_id).values(**values))
+
+
+def add_job_progress(db, job_id: str, processed: int = 0, skipped: int = 0, errors: int = 0,
+                     message: Optional[str] = None) -> None:
+    """
+    Add a batch's outcome to a job's counters in one UPDATE. Does not commit.
+
+    The job completes once processed + skipped + errors reaches its total
+    (not while it is still dispatching). Concurrent batches are safe because
+    the increments happen in the database.
+    """
+    done = (EmbeddingJob.processed + processed + EmbeddingJob.skipped + skipped
+            + EmbeddingJob.errors + errors)
+    values = {
+        "processed": EmbeddingJob.processed + processed,
+        "skipped": EmbeddingJob.skipped + skipped,
+        "errors": EmbeddingJob.errors + errors,
+        "status": case(
+            (EmbeddingJob.status.in_(("failed", "dispatching")), EmbeddingJob.status),
+            (done >= EmbeddingJob.total, "completed"),
+            else_="running",
+        ),
+        "updated_at": datetime.utcnow(),
+    }
+    if message is not None:
+        values["message"] = message
+    db.execute(update(EmbeddingJob).where(EmbeddingJob.id == job_id).values(**values))
+
+
+def fail_job(db, job_id: str, message: str) -> None:
+    """Mark a job failed. Does not commit."""
+    db.execute(update(EmbeddingJob).where(EmbeddingJob.id == job_id).values(
+        status="failed", message=message, updated_at=datetime.utcnow()
+    ))
+
+
+def get_job(db, job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Current state of a job
+
+    Returns:
+        dict: Job row plus progress percentage and ready flag, or None if unknown
+    """
+    job = db.get(EmbeddingJob, job_id)
+    if job is None:
+        return None
+    done = job.processed + job.skipped + job.errors
+    return {
+        "task_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "ready": job.status in ("completed", "failed"),
+        "total": job.total,
+        "processed": job.processed,
+        "skipped": job.skipped,
+        "errors": job.errors,
+        # While dispatching, total is an estimate that done can overtake
+        "progress": min(round(done / job.total * 100, 1), 100.0) if job.total else (100.0 if job.status == "completed" else 0.0),
+        "message": job.message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
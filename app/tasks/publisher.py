@@ -0,0 +1,176 @@
+"""
+Non-blocking publishing of Celery tasks from the request path.
+
+``apply_async`` talks to the broker inline, so a slow or unreachable Redis
+stalls whoever calls it for the full connect timeout and retry policy.
+Request handlers instead hand jobs to ``task_publisher``, which assigns the
+task ID up front, appends the job to a bounded in-process buffer and returns.
+A background thread drains the buffer in order.
+
+A circuit breaker guards the broker: after ``BROKER_BREAKER_FAILURES``
+consecutive publish errors it opens and the flusher stops trying for
+``BROKER_BREAKER_RESET_SECONDS``; then a single trial publish decides whether
+to close it again. Jobs that could not be sent stay buffered and are replayed
+once the broker is back. When the buffer is full the oldest jobs are dropped
+(and counted); embedding jobs are idempotent, so a later reindex repairs them.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional, Sequence
+
+from app.utils.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Jobs kept while the broker is unavailable; the oldest are dropped past this
+BROKER_PUBLISH_BUFFER_SIZE = int(os.getenv("BROKER_PUBLISH_BUFFER_SIZE", "10000"))
+# Consecutive publish failures that open the circuit
+BROKER_BREAKER_FAILURES = int(os.getenv("BROKER_BREAKER_FAILURES", "3"))
+# Seconds the circuit stays open before a trial publish
+BROKER_BREAKER_RESET_SECONDS = float(os.getenv("BROKER_BREAKER_RESET_SECONDS", "30"))
+# Seconds to spend flushing buffered jobs at interpreter exit
+BROKER_SHUTDOWN_FLUSH_SECONDS = float(os.getenv("BROKER_SHUTDOWN_FLUSH_SECONDS", "2"))
+
+
+class TaskPublisher:
+    """
+    Buffered, thread-backed publisher of Celery tasks.
+
+    ``publish`` never touches the broker; the flusher thread (started on first
+    use, and again in forked children) sends jobs in FIFO order and keeps
+    failed ones at the head of the buffer for replay.
+    """
+
+    def __init__(self, max_buffered: int = BROKER_PUBLISH_BUFFER_SIZE,
+                 breaker: Optional[CircuitBreaker] = None, start_thread: bool = True):
+        self.breaker = breaker or CircuitBreaker(BROKER_BREAKER_FAILURES, BROKER_BREAKER_RESET_SECONDS)
+        self.max_buffered = max_buffered
+        self._start_thread = start_thread
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        # Only one thread sends at a time, so buffer order is publish order
+        self._send_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._published = 0
+        self._dropped = 0
+        self._failures = 0
+
+    def publish(self, task, args: Sequence[Any] = (), kwargs: Optional[Dict[str, Any]] = None,
+                **options) -> str:
+        """
+        Buffer a task for sending and return immediately
+
+        Args:
+            task: Celery task (anything with ``apply_async``)
+            args: Positional task arguments
+            kwargs: Keyword task arguments
+            **options: Extra ``apply_async`` options (queue, priority, ...)
+
+        Returns:
+            str: The task ID the job will be published under
+        """
+        task_id = options.pop("task_id", None) or str(uuid.uuid4())
+        job = (task, tuple(args), dict(kwargs or {}), task_id, options)
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered:
+                dropped_task, dropped_args, _, dropped_id, _ = self._buffer.popleft()
+                self._dropped += 1
+                logger.warning(f"Publish buffer full; dropped {getattr(dropped_task, 'name', dropped_task)}{dropped_args} ({dropped_id})")
+            self._buffer.append(job)
+        self._ensure_thread()
+        self._wakeup.set()
+        return task_id
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """
+        Send buffered jobs until the buffer is empty, the circuit opens or
+        ``timeout`` seconds have passed
+
+        Returns:
+            int: Number of jobs published
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sent = 0
+        with self._send_lock:
+            while True:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                with self._lock:
+                    if not self._buffer:
+                        break
+                    job = self._buffer[0]
+                # Asked only when a send follows, so a half-open trial always reports back
+                if not self.breaker.allow():
+                    break
+                task, args, kwargs, task_id, options = job
+                try:
+                    # Fail fast; the buffer and the breaker take care of retrying
+                    task.apply_async(args=args, kwargs=kwargs, task_id=task_id, retry=False, **options)
+                except Exception as e:
+                    self.breaker.record_failure()
+                    with self._lock:
+                        self._failures += 1
+                    logger.warning(f"Publishing {task_id} failed ({e}); circuit {self.breaker.state}")
+                    continue
+                self.breaker.record_success()
+                with self._lock:
+                    # publish() may have dropped the job meanwhile if the buffer overflowed
+                    if self._buffer and self._buffer[0] is job:
+                        self._buffer.popleft()
+                    self._published += 1
+                sent += 1
+        return sent
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth, counters and circuit state"""
+        with self._lock:
+            return {
+                "buffered": len(self._buffer),
+                "max_buffered": self.max_buffered,
+                "published": self._published,
+                "dropped": self._dropped,
+                "publish_failures": self._failures,
+                "circuit": self.breaker.state,
+            }
+
+    def _ensure_thread(self) -> None:
+        if not self._start_thread:
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            # Threads do not survive fork; each worker process runs its own flusher
+            if self._thread is None or self._pid != pid or not self._thread.is_alive():
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name="task-publisher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            # Wake up on new jobs, or periodically to replay once the circuit half-opens
+            self._wakeup.wait(timeout=min(1.0, self.breaker.reset_seconds or 1.0))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Task publisher flush failed: {e}")
+
+
+task_publisher = TaskPublisher()
+
+
+@atexit.register
+def _flush_on_exit():
+    if task_publisher.stats()["buffered"]:
+        task_publisher.flush(timeout=BROKER_SHUTDOWN_FLUSH_SECONDS)
+        remaining = task_publisher.stats()["buffered"]
+        if remaining:
+            logger.warning(f"{remaining} buffered task(s) not published at shutdown; run a reindex to catch up")
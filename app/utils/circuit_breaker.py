@@ -0,0 +1,72 @@
+"""
+Circuit breaker shared by clients of optional external services (the task
+broker, the Redis card cache)
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    ``closed`` lets every call through; ``open`` rejects calls until
+    ``reset_seconds`` have passed; ``half_open`` lets one trial call through,
+    whose outcome closes or re-opens the circuit. Other callers are rejected
+    while the trial is in flight. A trial that never reports back is given up
+    after another ``reset_seconds``.
+
+    Every ``allow()`` that returns True must be followed by
+    ``record_success()`` or ``record_failure()``.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """True when a call may be attempted now (in half_open, for one caller only)"""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "open":
+                return False
+            now = self._clock()
+            if self._trial_started_at is not None and now - self._trial_started_at < self.reset_seconds:
+                return False
+            self._trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_started_at = None
+            # A failed trial call re-opens the circuit straight away
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
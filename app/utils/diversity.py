@@ -0,0 +1,134 @@
+"""
+Maximal marginal relevance (MMR) re-ranking of match candidates.
+
+Picks results one at a time by
+``lambda * relevance - (1 - lambda) * max similarity to the results already picked``,
+so the final list trades a little relevance for not returning five near-identical
+profiles from the same lab. Only the similarity rows of picked candidates
+are ever needed, so each pick costs one (n, dimension) matrix-vector product
+and a vectorized update of the running maximum, instead of materializing the
+full n x n matrix. Optional caps limit results per organization.
+"""
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 1 keeps the relevance order (diversity off); lower values favour diversity
+MATCH_MMR_LAMBDA = float(os.getenv("MATCH_MMR_LAMBDA", "1"))
+# Candidates retrieved for MMR to choose from
+MATCH_MMR_CANDIDATES = int(os.getenv("MATCH_MMR_CANDIDATES", "100"))
+# Maximum results from one organization (0 = no cap)
+MATCH_MAX_PER_ORGANIZATION = int(os.getenv("MATCH_MAX_PER_ORGANIZATION", "0"))
+# Score keys that order a candidate list, most specific first
+_RELEVANCE_KEYS = ("rerank_score", "fused_score", "match_score")
+
+
+def diversity_enabled() -> bool:
+    """True when MMR or an organization cap is configured"""
+    return MATCH_MMR_LAMBDA < 1 or MATCH_MAX_PER_ORGANIZATION > 0
+
+
+def mmr_select(relevance: np.ndarray, embeddings: np.ndarray, k: int, lambda_: float = 1.0,
+               groups: Optional[Sequence[Any]] = None, max_per_group: int = 0) -> np.ndarray:
+    """
+    Indices of up to k candidates chosen by maximal marginal relevance
+
+    Args:
+        relevance: (n,) relevance of each candidate, on a [0, 1] scale
+        embeddings: (n, dimension) candidate vectors, not necessarily normalized; zero
+            rows are treated as unlike every other candidate
+        k: Number of candidates to pick
+        lambda_: Relevance weight; 1 is pure relevance order
+        groups: Optional group of each candidate (e.g. organization); None means
+            the candidate belongs to no group and is never capped
+        max_per_group: Maximum picks per group (0 = no cap)
+
+    Returns:
+        np.ndarray: Picked candidate indices, in pick order
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Cosine similarity from raw dot products scaled by inverse norms, which is
+    # cheaper than normalizing the whole matrix
+    vectors = np.asarray(embeddings, dtype=np.float32).reshape(n, -1)
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    inverse_norms = np.zeros_like(norms)
+    np.divide(1.0, norms, out=inverse_norms, where=norms > 0)
+
+    capped = groups is not None and max_per_group > 0
+    if capped:
+        codes: Dict[Any, int] = {}
+        group_codes = np.array(
+            [-1 if group is None else codes.setdefault(group, len(codes)) for group in groups], dtype=np.int64
+        )
+        group_counts = np.zeros(len(codes), dtype=np.int64)
+
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.zeros(n, dtype=np.float32)
+    picked = []
+    for _ in range(k):
+        scores = lambda_ * relevance - (1 - lambda_) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not available[best]:
+            break
+        picked.append(best)
+        available[best] = False
+        similarity = (vectors @ vectors[best]) * (inverse_norms * inverse_norms[best])
+        np.maximum(max_similarity, similarity, out=max_similarity)
+        if capped and group_codes[best] >= 0:
+            group = group_codes[best]
+            group_counts[group] += 1
+            if group_counts[group] >= max_per_group:
+                available[group_codes == group] = False
+    return np.array(picked, dtype=np.int64)
+
+
+def _relevance(matches: List[Dict[str, Any]]) -> np.ndarray:
+    """Raw relevance of each match from the score that ordered the list, or its rank"""
+    for key in _RELEVANCE_KEYS:
+        if all(match.get(key) is not None for match in matches):
+            return np.array([match[key] for match in matches], dtype=np.float32)
+    return np.arange(len(matches), 0, -1, dtype=np.float32)
+
+
+def diversify_matches(matches: List[Dict[str, Any]], embeddings: np.ndarray, k: int,
+                      lambda_: Optional[float] = None,
+                      max_per_organization: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Re-order matches by MMR and keep k of them
+
+    Relevance is the list's own order signal: rerank_score when the list was
+    re-ranked, fused_score for hybrid results, match_score otherwise, and the
+    rank when no score is present on every candidate. It is min-max scaled to
+    [0, 1] within the pool so it is comparable with cosine similarity.
+    Candidates without an organization are not subject to the cap.
+
+    Args:
+        matches: Candidates, best first
+        embeddings: (len(matches), dimension) vectors row-aligned with matches
+        k: Number of matches to keep
+        lambda_: Relevance weight; 1 is pure relevance order (defaults to MATCH_MMR_LAMBDA)
+        max_per_organization: Maximum matches per organization, 0 for no cap
+            (defaults to MATCH_MAX_PER_ORGANIZATION)
+    """
+    if not matches:
+        return matches
+    lambda_ = MATCH_MMR_LAMBDA if lambda_ is None else lambda_
+    max_per_organization = MATCH_MAX_PER_ORGANIZATION if max_per_organization is None else max_per_organization
+
+    relevance = _relevance(matches)
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones_like(relevance)
+
+    groups = None
+    if max_per_organization > 0:
+        groups = [(match.get("organization") or "").strip() or None for match in matches]
+    picked = mmr_select(relevance, embeddings, k, lambda_, groups, max_per_organization)
+    return [matches[i] for i in picked]
+
@@ -1,9 +1,11 @@
 """
 Utilities for embedding computation and text processing
 """
+import os
+import re
 import hashlib
 import numpy as np
-from typing import Optional
+from typing import List, Optional, Tuple
 from sklearn.preprocessing import normalize
 
 from app.database import Profile
@@ -55,6 +57,84 @@ def create_profile_text(profile: Profile) -> str:
     return combined_text
 
 
+# Multi-vector profiles: at most this many chunks per profile, sentences shorter
+# than CHUNK_MIN_CHARS are merged into the following one
+MAX_CHUNKS_PER_PROFILE = int(os.getenv("MAX_CHUNKS_PER_PROFILE", "16"))
+CHUNK_MIN_CHARS = int(os.getenv("CHUNK_MIN_CHARS", "40"))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def split_sentences(text: str, min_chars: int = CHUNK_MIN_CHARS) -> List[str]:
+    """
+    Split text into sentence chunks, merging fragments shorter than ``min_chars``
+    
+    Args:
+        text: Free text
+        min_chars: Minimum chunk length
+        
+    Returns:
+        list: Non-empty chunks in order
+    """
+    chunks: List[str] = []
+    pending = ""
+    for sentence in _SENTENCE_BOUNDARY.split(text or ""):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        pending = f"{pending} {sentence}".strip()
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks and len(pending) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+def create_profile_chunks(profile: Profile) -> List[Tuple[str, int, str]]:
+    """
+    Break a profile into separately embedded chunks for multi-vector matching.
+    Uses the same fields as create_profile_text, so the chunks change exactly
+    when the profile text hash changes.
+    
+    Args:
+        profile: Profile database model instance
+        
+    Returns:
+        list: (field, chunk_index, text) tuples, at most MAX_CHUNKS_PER_PROFILE
+    """
+    chunks: List[Tuple[str, int, str]] = []
+    
+    # The research area is short and matched as a whole
+    if profile.research_area and profile.research_area.strip():
+        chunks.append(("research_area", 0, profile.research_area.strip()))
+    
+    # Long free text is matched sentence by sentence
+    field, text = ("description", profile.description) if profile.description else ("primary_text", profile.primary_text)
+    for index, sentence in enumerate(split_sentences(text or "")):
+        chunks.append((field, index, sentence))
+    
+    return chunks[:MAX_CHUNKS_PER_PROFILE]
+
+
+def create_publication_text(publication) -> str:
+    """
+    Create the text embedded for a publication
+    
+    Args:
+        publication: Publication database model instance
+        
+    Returns:
+        str: Title, followed by the journal when known
+    """
+    if publication.journal:
+        return f"{publication.title}. {publication.journal}"
+    return publication.title
+
+
 def normalize_embedding(embedding: np.ndarray) -> np.ndarray:
     """
     Normalize embedding vector for consistent similarity computation
@@ -78,6 +158,19 @@ def normalize_embedding(embedding: np.ndarray) -> np.ndarray:
     return normalized
 
 
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """
+    L2 normalize a batch of embeddings (one vector per row)
+    
+    Args:
+        embeddings: 2D array of raw embeddings
+        
+    Returns:
+        np.ndarray: Row-wise L2 normalized embeddings
+    """
+    return normalize(np.asarray(embeddings), norm='l2')
+
+
 def compute_text_hash(text: str) -> str:
     """
     Compute SHA256 hash of text for change detection
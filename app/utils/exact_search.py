@@ -0,0 +1,374 @@
+"""
+Exact in-memory vector search.
+
+``ExactSearchIndex`` keeps one contiguous, L2-normalized float32 matrix and a
+boolean row mask per distinct value of each filter column. A query is one
+matrix-vector product (matrix-matrix for batches) followed by
+``argpartition``, so for corpora that fit in RAM it is both exact and faster
+than an ANN round trip. ``rerank`` rescores an approximate candidate list
+against the same matrix.
+
+The ``memory`` match backend serves ``find_db_matches`` from an index built
+from researcher_embeddings and refreshed periodically.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.utils.embedding_utils import normalize_embeddings
+from app.utils.snapshot_utils import EMBEDDING_DIMENSION
+
+logger = logging.getLogger(__name__)
+
+# Profile columns the match filters need
+FILTER_COLUMNS = ["seek_share", "resource_type", "status"]
+
+MATCH_INDEX_REFRESH_SECONDS = float(os.getenv("MATCH_INDEX_REFRESH_SECONDS", "300"))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the ``k`` highest scores, best first
+
+    Uses ``argpartition`` so only the selected ``k`` entries are sorted.
+    Entries scored ``-inf`` (filtered out) are never returned.
+    """
+    k = min(k, int(np.count_nonzero(scores > -np.inf)))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.flatnonzero(scores > -np.inf)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class ExactSearchIndex:
+    """
+    Contiguous embedding matrix with per-value filter masks
+
+    Args:
+        ids: Profile ID of each row
+        embeddings: (n, dimension) matrix, row-aligned with ``ids``; normalized here
+        filters: Column name -> value per row, used to build the masks
+        normalized: Rows are already unit length (e.g. a memory-mapped
+            snapshot), so the matrix is used as is instead of copied
+    """
+
+    def __init__(self, ids: Sequence[int], embeddings: np.ndarray, filters: Optional[Dict[str, Sequence[Any]]] = None,
+                 normalized: bool = False):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if len(matrix) and not normalized:
+            matrix = normalize_embeddings(matrix)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self._rows = {int(profile_id): row for row, profile_id in enumerate(self.ids)}
+        self._masks: Dict[str, Dict[Any, np.ndarray]] = {}
+        for column, values in (filters or {}).items():
+            values = np.asarray(values, dtype=object)
+            self._masks[column] = {value: values == value for value in set(values.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def value_mask(self, column: str, predicate: Callable[[Any], bool]) -> np.ndarray:
+        """
+        Rows whose ``column`` value satisfies ``predicate``
+
+        The predicate runs once per distinct value, not once per row.
+        """
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for value, rows in self._masks.get(column, {}).items():
+            if predicate(value):
+                mask |= rows
+        return mask
+
+    def positions(self, ids: Iterable[int]) -> np.ndarray:
+        """Row positions of the given profile IDs (IDs not in the index are skipped)"""
+        return np.array([self._rows[int(i)] for i in ids if int(i) in self._rows], dtype=np.int64)
+
+    def vectors(self, ids: Sequence[int]) -> np.ndarray:
+        """Normalized vectors of the given profile IDs, row-aligned with ``ids`` (zeros for unknown IDs)"""
+        vectors = np.zeros((len(ids), self.matrix.shape[1]), dtype=np.float32)
+        for i, profile_id in enumerate(ids):
+            row = self._rows.get(int(profile_id))
+            if row is not None:
+                vectors[i] = self.matrix[row]
+        return vectors
+
+    def exclude_ids(self, mask: np.ndarray, ids: Iterable[int]) -> np.ndarray:
+        """Clear the rows of the given profile IDs in ``mask`` (in place)"""
+        for profile_id in ids:
+            row = self._rows.get(int(profile_id))
+            if row is not None:
+                mask[row] = False
+        return mask
+
+    def _query_matrix(self, queries: np.ndarray) -> np.ndarray:
+        queries = np.asarray(queries, dtype=np.float32)
+        return normalize_embeddings(queries.reshape(-1, self.matrix.shape[1])).astype(np.float32, copy=False)
+
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows for one query
+
+        Args:
+            query: Query vector (normalized here)
+            k: Number of results
+            mask: Optional boolean row mask of eligible rows
+
+        Returns:
+            tuple: (profile ids, cosine scores), best first
+        """
+        ids, scores = self.search_batch(query, k, mask)
+        return ids[0], scores[0]
+
+    def search_batch(self, queries: np.ndarray, k: int,
+                     masks: Optional[np.ndarray] = None) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Top-k rows for several queries with one matrix-matrix product
+
+        Args:
+            queries: (m, dimension) query matrix
+            k: Number of results per query
+            masks: Optional (n,) mask shared by all queries or (m, n) per-query masks
+
+        Returns:
+            tuple: (list of id arrays, list of score arrays), one entry per query
+        """
+        queries = self._query_matrix(queries)
+        if len(self.ids) == 0:
+            return [np.empty(0, dtype=np.int64)] * len(queries), [np.empty(0, dtype=np.float32)] * len(queries)
+
+        scores = queries @ self.matrix.T
+        if masks is not None:
+            scores = np.where(np.broadcast_to(masks, scores.shape), scores, -np.inf)
+
+        result_ids, result_scores = [], []
+        for row_scores in scores:
+            rows = top_k(row_scores, k)
+            result_ids.append(self.ids[rows])
+            result_scores.append(row_scores[rows])
+        return result_ids, result_scores
+
+    def search_mutual(self, query: np.ndarray, profile_id: int, k: int, weight: float,
+                      mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """
+        Top-k rows by (1 - weight) * query similarity + weight * similarity to the
+        row of ``profile_id``, both directions scored with one matrix product
+
+        Args:
+            query: Query vector (normalized here)
+            profile_id: Profile whose stored vector is the second direction
+            k: Number of results
+            weight: Weight of the profile-to-candidate similarity
+            mask: Optional boolean row mask of eligible rows
+
+        Returns:
+            tuple: (profile ids, combined scores, query scores, reciprocal scores),
+            best first; without a row for ``profile_id`` the query scores are used
+            and the reciprocal scores are None
+        """
+        row = self._rows.get(int(profile_id))
+        if row is None or len(self.ids) == 0:
+            ids, scores = self.search(query, k, mask)
+            return ids, scores, scores, None
+
+        both = np.vstack([self._query_matrix(query), self.matrix[row:row + 1]]) @ self.matrix.T
+        combined = (1 - weight) * both[0] + weight * both[1]
+        if mask is not None:
+            combined = np.where(mask, combined, -np.inf)
+        rows = top_k(combined, k)
+        return self.ids[rows], combined[rows], both[0][rows], both[1][rows]
+
+    def rerank(self, query: np.ndarray, candidate_ids: Sequence[int], k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact re-ranking of an approximate candidate list
+
+        Candidates that are not in the index are dropped.
+
+        Args:
+            query: Query vector
+            candidate_ids: Profile IDs from a first-stage (e.g. HNSW) search
+            k: Number of results (default: all candidates)
+
+        Returns:
+            tuple: (profile ids, cosine scores), best first
+        """
+        rows = self.positions(candidate_ids)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.matrix[rows] @ self._query_matrix(query)[0]
+        order = top_k(scores, len(rows) if k is None else k)
+        return self.ids[rows[order]], scores[order]
+
+
+def match_filter_mask(index: ExactSearchIndex, user_intent: str, resource_type: Optional[str] = None,
+                      current_user_id: Optional[int] = None) -> np.ndarray:
+    """
+    Rows eligible for a match query, mirroring the SQL filters
+
+    Opposite intent (case-insensitive), active status, resource type
+    substring match (NULL never matches) and self-exclusion.
+    """
+    opposite_intent = 'share' if user_intent.lower() == 'seek' else 'seek'
+    needle = (resource_type or "").lower()
+    mask = index.value_mask("seek_share", lambda value: value is not None and value.lower() == opposite_intent)
+    mask &= index.value_mask("status", lambda value: value == "active")
+    mask &= index.value_mask("resource_type", lambda value: value is not None and needle in value.lower())
+    if current_user_id is not None:
+        index.exclude_ids(mask, [current_user_id])
+    return mask
+
+
+def build_index_from_database(db: Session) -> ExactSearchIndex:
+    """Load researcher_embeddings and the filter columns into an index"""
+    from app.database import Profile, ResearcherEmbedding
+
+    rows = db.query(
+        ResearcherEmbedding.user_id, ResearcherEmbedding.embedding,
+        *[getattr(Profile, column) for column in FILTER_COLUMNS]
+    ).join(Profile, Profile.id == ResearcherEmbedding.user_id).all()
+
+    embeddings = np.array([row[1] for row in rows], dtype=np.float32).reshape(len(rows), EMBEDDING_DIMENSION)
+    filters = {column: [row[2 + i] for row in rows] for i, column in enumerate(FILTER_COLUMNS)}
+    return ExactSearchIndex([row[0] for row in rows], embeddings, filters)
+
+
+_memory_index: Optional[ExactSearchIndex] = None
+_memory_index_loaded_at = 0.0
+_memory_index_refreshing = False
+_memory_index_lock = threading.Lock()
+
+
+def _build_memory_index() -> ExactSearchIndex:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        index = build_index_from_database(db)
+    finally:
+        db.close()
+    logger.info(f"Built in-memory match index with {len(index)} profiles")
+    return index
+
+
+def _refresh_memory_index() -> None:
+    """Rebuild the shared index off the request path and swap it in"""
+    global _memory_index, _memory_index_loaded_at, _memory_index_refreshing
+    try:
+        index = _build_memory_index()
+        # A single reference swap; searches already running keep the index they hold
+        _memory_index = index
+        _memory_index_loaded_at = time.monotonic()
+    except Exception as e:
+        logger.error(f"Refreshing the in-memory match index failed; keeping the previous one: {e}")
+    finally:
+        with _memory_index_lock:
+            _memory_index_refreshing = False
+
+
+def get_memory_index() -> ExactSearchIndex:
+    """
+    Shared index over researcher_embeddings
+
+    The first call builds it. Once it is older than MATCH_INDEX_REFRESH_SECONDS,
+    callers keep getting the current index while one background thread
+    rebuilds it from the database and swaps the reference.
+    """
+    global _memory_index, _memory_index_loaded_at, _memory_index_refreshing
+
+    index = _memory_index
+    if index is None:
+        with _memory_index_lock:
+            if _memory_index is None:
+                _memory_index = _build_memory_index()
+                _memory_index_loaded_at = time.monotonic()
+            return _memory_index
+
+    if time.monotonic() - _memory_index_loaded_at > MATCH_INDEX_REFRESH_SECONDS:
+        with _memory_index_lock:
+            start_refresh = not _memory_index_refreshing
+            _memory_index_refreshing = True
+        if start_refresh:
+            threading.Thread(target=_refresh_memory_index, name="memory-index-refresh", daemon=True).start()
+    return index
+
+
+def find_memory_matches(query_embedding: np.ndarray, user_intent: str, resource_type: Optional[str] = None,
+                        current_user_id: Optional[int] = None, limit: int = 5,
+                        mutual_weight: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Exact in-memory search, then one query to fetch the matched profiles
+
+    Args:
+        mutual_weight: Weight of the similarity between the current user's own
+            vector and each candidate (0 = query similarity only)
+
+    Returns:
+        list: Match dictionaries in the same shape as the SQL matcher
+    """
+    if mutual_weight <= 0 or current_user_id is None:
+        return find_memory_matches_batch([query_embedding], [(user_intent, resource_type)], current_user_id, limit)[0]
+
+    index = get_memory_index()
+    mask = match_filter_mask(index, user_intent, resource_type, current_user_id)
+    ids, scores, query_scores, reciprocal_scores = index.search_mutual(
+        query_embedding, current_user_id, limit, mutual_weight, mask
+    )
+    by_id = _load_match_rows(ids.tolist())
+    return [
+        {
+            **by_id[profile_id], "match_score": float(score), "embedding_source": "memory",
+            "query_score": float(query_score),
+            "reciprocal_score": None if reciprocal_scores is None else float(reciprocal_scores[i]),
+        }
+        for i, (profile_id, score, query_score) in enumerate(zip(ids.tolist(), scores, query_scores))
+        if profile_id in by_id
+    ]
+
+
+def _load_match_rows(profile_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """Result columns of the given profiles, by profile ID, from the profile card cache"""
+    from app.utils.profile_cards import get_profile_cards
+
+    return get_profile_cards(profile_ids)
+
+
+def find_memory_matches_batch(query_embeddings: np.ndarray, filters: Sequence[Tuple[str, Optional[str]]],
+                              current_user_id: Optional[int] = None, limit: int = 5) -> List[List[Dict[str, Any]]]:
+    """
+    Exact in-memory search for several queries with one matrix-matrix product,
+    then one query to fetch every matched profile
+
+    Args:
+        query_embeddings: (m, dimension) query matrix
+        filters: (user_intent, resource_type) per query
+        current_user_id: Profile ID to exclude from results
+        limit: Maximum matches per query
+
+    Returns:
+        list: One list of match dictionaries per query
+    """
+    index = get_memory_index()
+    masks = np.stack([
+        match_filter_mask(index, user_intent, resource_type, current_user_id)
+        for user_intent, resource_type in filters
+    ])
+    ids, scores = index.search_batch(query_embeddings, limit, masks)
+
+    by_id = _load_match_rows([profile_id for query_ids in ids for profile_id in query_ids])
+
+    return [
+        [
+            {**by_id[profile_id], "match_score": float(score), "embedding_source": "memory"}
+            for profile_id, score in zip(query_ids.tolist(), query_scores)
+            if profile_id in by_id
+        ]
+        for query_ids, query_scores in zip(ids, scores)
+    ]
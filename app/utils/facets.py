@@ -0,0 +1,154 @@
+"""
+Facet counts for match filters, kept in profile_facet_counts.
+
+Each active profile contributes one count per facet value under its own
+intent: its organization, its research area and every comma-separated item
+of its resource type. Profile writes apply the difference between the old and
+new contributions in the same transaction (see app.hooks.profile_hooks), so
+reading the counts is a bounded index lookup that does not touch profiles.
+Bulk paths that bypass the ORM (CSV ingest, snapshot import) rebuild the
+table afterwards.
+
+The counts are directory-wide: they are not narrowed by a search's query or
+results, and they include active profiles whose embedding is still pending.
+"""
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import Profile, ProfileFacetCount
+
+FACET_FIELDS = ("resource_type", "organization", "research_area")
+# Profile columns whose changes can move a profile between facet counts
+FACET_SOURCE_FIELDS = FACET_FIELDS + ("seek_share", "status")
+# Values returned per facet, most common first
+FACET_LIMIT = int(os.getenv("FACET_LIMIT", "20"))
+
+FacetKey = Tuple[str, str, str]
+
+
+def _facet_values(field: str, value: Any) -> List[str]:
+    if not value or not str(value).strip():
+        return []
+    if field == "resource_type":
+        return [part.strip() for part in str(value).split(",") if part.strip()]
+    return [str(value).strip()]
+
+
+def facet_keys(values: Mapping[str, Any]) -> List[FacetKey]:
+    """
+    (seek_share, facet, value) keys a profile counts towards
+
+    Args:
+        values: Profile column values (FACET_SOURCE_FIELDS)
+
+    Returns:
+        list: One key per facet value; empty for inactive profiles
+    """
+    seek_share = (values.get("seek_share") or "").strip().lower()
+    if values.get("status") != "active" or not seek_share:
+        return []
+    return [
+        (seek_share, field, facet_value)
+        for field in FACET_FIELDS
+        for facet_value in _facet_values(field, values.get(field))
+    ]
+
+
+def apply_facet_delta(connection, removed: Iterable[FacetKey], added: Iterable[FacetKey]) -> None:
+    """
+    Move counts from a profile's old facet keys to its new ones
+
+    Args:
+        connection: Connection of the transaction that writes the profile
+        removed: Keys of the old profile state
+        added: Keys of the new profile state
+    """
+    delta = Counter(added)
+    delta.subtract(Counter(removed))
+    changes = [(key, change) for key, change in delta.items() if change]
+    if not changes:
+        return
+
+    for (seek_share, facet, value), change in changes:
+        stmt = pg_insert(ProfileFacetCount).values(seek_share=seek_share, facet=facet, value=value, count=change)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["seek_share", "facet", "value"],
+            set_={"count": ProfileFacetCount.count + stmt.excluded.count}
+        ))
+
+    emptied = [key for key, change in changes if change < 0]
+    for seek_share, facet, value in emptied:
+        connection.execute(delete(ProfileFacetCount).where(
+            ProfileFacetCount.seek_share == seek_share,
+            ProfileFacetCount.facet == facet,
+            ProfileFacetCount.value == value,
+            ProfileFacetCount.count <= 0,
+        ))
+
+
+def rebuild_facet_counts(connection) -> int:
+    """
+    Recount every facet from profiles, replacing the table contents
+
+    Args:
+        connection: Connection or session; the caller commits
+
+    Returns:
+        int: Number of facet rows written
+    """
+    counts: Counter = Counter()
+    rows = connection.execute(select(*[getattr(Profile, field) for field in FACET_SOURCE_FIELDS]))
+    for row in rows:
+        counts.update(facet_keys(row._mapping))
+
+    connection.execute(delete(ProfileFacetCount))
+    if counts:
+        connection.execute(insert(ProfileFacetCount), [
+            {"seek_share": seek_share, "facet": facet, "value": value, "count": count}
+            for (seek_share, facet, value), count in counts.items()
+        ])
+    return len(counts)
+
+
+def get_facet_counts(connection, seek_share: str, limit: int = FACET_LIMIT) -> Dict[str, Dict[str, int]]:
+    """
+    Facet counts of active profiles with the given intent
+
+    Args:
+        connection: Connection or session
+        seek_share: Intent of the profiles being counted ('seek' or 'share')
+        limit: Values returned per facet, most common first
+
+    Returns:
+        dict: Facet name -> {value: count}
+    """
+    # One short index scan per facet, however many distinct values there are
+    rows = connection.execute(text("""
+        SELECT f.facet, c.value, c.count
+        FROM unnest(CAST(:facets AS text[])) AS f(facet)
+        CROSS JOIN LATERAL (
+            SELECT value, count
+            FROM profile_facet_counts
+            WHERE seek_share = :seek_share AND facet = f.facet
+            ORDER BY count DESC, value
+            LIMIT :limit
+        ) c
+    """), {"facets": list(FACET_FIELDS), "seek_share": (seek_share or "").strip().lower(), "limit": limit})
+    facets: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+    for facet, value, count in rows:
+        facets[facet][value] = count
+    return facets
+
+
+def get_directory_facets(connection, user_intent: str) -> Dict[str, Dict[str, int]]:
+    """
+    Directory-wide facet counts of the intent a match request searches (the
+    opposite of the user's): every active profile with that intent, not only
+    the ones the query returned or could return yet
+    """
+    opposite_intent = "share" if (user_intent or "").lower() == "seek" else "seek"
+    return get_facet_counts(connection, opposite_intent)
@@ -0,0 +1,63 @@
+"""
+orjson encoding and sparse fieldsets for the hot read endpoints.
+
+Match and profile payloads are plain dicts of JSON-ready values, so they are
+encoded directly with orjson instead of going through ``jsonable_encoder``
+and ``json.dumps``. Endpoints that accept ``fields=name,organization,...``
+return only those keys of each object (``id`` is always kept), letting a view
+request what it renders and leave out wide columns such as descriptions and
+publications.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+# Integer keys (profiles by id) and NumPy scores are common in match payloads
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(data: Any) -> bytes:
+    """Encode data as compact JSON, falling back to str() for unknown types"""
+    return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; return it directly to skip jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[FrozenSet[str]]:
+    """
+    Parse a ``fields`` query parameter
+
+    Args:
+        fields: Comma-separated field names, or None/empty for every field
+        allowed: Field names the endpoint can return
+
+    Returns:
+        frozenset: Requested fields plus id, or None for every field
+
+    Raises:
+        HTTPException: 400 when a requested field is unknown
+    """
+    if fields is None or not fields.strip():
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return frozenset(requested | {"id"})
+
+
+def select_fields(item: Dict[str, Any], fields: Optional[FrozenSet[str]]) -> Dict[str, Any]:
+    """The requested keys of item (all of them when fields is None)"""
+    if fields is None:
+        return item
+    return {key: value for key, value in item.items() if key in fields}
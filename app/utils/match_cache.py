@@ -0,0 +1,35 @@
+"""
+Cache of final match results of recent searches
+"""
+import os
+from typing import Hashable, List, Optional
+
+from app.utils.cache_utils import TTLCache
+
+# Final (re-ranked) results of recent queries, so repeated searches skip encoding
+# and retrieval entirely (0 disables)
+MATCH_CACHE_TTL_SECONDS = float(os.getenv("MATCH_CACHE_TTL_SECONDS", "60"))
+MATCH_CACHE_MAX_ENTRIES = int(os.getenv("MATCH_CACHE_MAX_ENTRIES", "1000"))
+
+_match_cache = TTLCache(ttl_seconds=MATCH_CACHE_TTL_SECONDS, max_entries=MATCH_CACHE_MAX_ENTRIES)
+
+
+def get_cached_matches(cache_key: Hashable) -> Optional[List[dict]]:
+    """Final matches of an identical recent request, or None"""
+    return _match_cache.get(cache_key)
+
+
+def cache_matches(cache_key: Hashable, matches: List[dict]) -> None:
+    """Remember the final matches of a request for MATCH_CACHE_TTL_SECONDS"""
+    _match_cache.set(cache_key, matches)
+
+
+def invalidate_matches() -> None:
+    """
+    Drop every cached result after a profile, publication or embedding changed
+
+    Any search may return (or stop returning) the changed profile, so entries
+    are not tracked per profile. Writes made by other processes (e.g. the
+    embedding worker) are only picked up once MATCH_CACHE_TTL_SECONDS passes.
+    """
+    _match_cache.clear()
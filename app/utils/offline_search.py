@@ -0,0 +1,126 @@
+"""
+Database-free matching over a local profile snapshot.
+
+Answers the same queries as the pgvector path in ``app.alogirithm`` using an
+exact NumPy scan of a snapshot written by ``embedding-cli snapshot-export``.
+Used for read-only replicas, tests and ranking benchmarks.
+"""
+import os
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.exact_search import FILTER_COLUMNS, ExactSearchIndex, match_filter_mask
+from app.utils.snapshot_utils import ProfileSnapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+MATCH_SNAPSHOT_DIR = os.getenv("MATCH_SNAPSHOT_DIR", "data/snapshot")
+
+# Columns returned for each match, same as the SQL matcher
+RESULT_COLUMNS = ["id", "name", "email", "organization", "research_area", "primary_text", "resource_type"]
+
+
+class SnapshotMatcher:
+    """
+    Exact cosine search over a loaded snapshot
+
+    Wraps the memory-mapped matrix in an ExactSearchIndex (no copy, the
+    snapshot is already normalized) with filter masks built once at load.
+    """
+
+    def __init__(self, snapshot: ProfileSnapshot):
+        self.snapshot = snapshot
+        self.index = ExactSearchIndex(
+            snapshot.ids, snapshot.embeddings,
+            {column: snapshot.column(column) for column in FILTER_COLUMNS},
+            normalized=True,
+        )
+
+    def find_matches(self, query_embedding: np.ndarray, user_intent: str, resource_type: Optional[str] = None,
+                     current_user_id: Optional[int] = None, limit: int = 5,
+                     mutual_weight: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top matches for a query embedding
+
+        Args:
+            query_embedding: Query vector (normalized here)
+            user_intent: 'seek' or 'share'
+            resource_type: Resource type filter
+            current_user_id: Profile ID to exclude from results
+            limit: Maximum number of matches
+            mutual_weight: Weight of the similarity between the current user's
+                snapshot vector and each candidate (0 = query similarity only)
+
+        Returns:
+            list: Match dictionaries in descending score order
+        """
+        if mutual_weight <= 0 or current_user_id is None:
+            return self.find_matches_batch([query_embedding], [(user_intent, resource_type)], current_user_id, limit)[0]
+
+        mask = match_filter_mask(self.index, user_intent, resource_type, current_user_id)
+        ids, scores, query_scores, reciprocal_scores = self.index.search_mutual(
+            query_embedding, current_user_id, limit, mutual_weight, mask
+        )
+        matches = self._matches(ids, scores)
+        for i, match in enumerate(matches):
+            match["query_score"] = float(query_scores[i])
+            match["reciprocal_score"] = None if reciprocal_scores is None else float(reciprocal_scores[i])
+        return matches
+
+    def find_matches_batch(self, query_embeddings: np.ndarray, filters: Sequence[Tuple[str, Optional[str]]],
+                           current_user_id: Optional[int] = None, limit: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Top matches for several queries with one matrix-matrix product
+
+        Args:
+            query_embeddings: (m, dimension) query matrix
+            filters: (user_intent, resource_type) per query
+            current_user_id: Profile ID to exclude from results
+            limit: Maximum matches per query
+
+        Returns:
+            list: One list of match dictionaries per query
+        """
+        masks = np.stack([
+            match_filter_mask(self.index, user_intent, resource_type, current_user_id)
+            for user_intent, resource_type in filters
+        ])
+        ids, scores = self.index.search_batch(query_embeddings, limit, masks)
+
+        return [self._matches(query_ids, query_scores) for query_ids, query_scores in zip(ids, scores)]
+
+    def _matches(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        matches = []
+        for row, score in zip(self.snapshot.rows(self.index.positions(ids)), scores):
+            match = {column: row[column] for column in RESULT_COLUMNS}
+            match["match_score"] = float(score)
+            match["embedding_source"] = "snapshot"
+            matches.append(match)
+        return matches
+
+
+_matcher: Optional[SnapshotMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_snapshot_matcher(snapshot_dir: Optional[str] = None) -> SnapshotMatcher:
+    """Load the snapshot on first use and share it across requests"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            path = snapshot_dir or MATCH_SNAPSHOT_DIR
+            _matcher = SnapshotMatcher(load_snapshot(path))
+            logger.info(f"Loaded match snapshot with {len(_matcher.index)} profiles from {path}")
+        return _matcher
+
+
+def reload_snapshot_matcher(snapshot_dir: Optional[str] = None) -> SnapshotMatcher:
+    """Swap in a freshly exported snapshot"""
+    global _matcher
+    matcher = SnapshotMatcher(load_snapshot(snapshot_dir or MATCH_SNAPSHOT_DIR))
+    with _matcher_lock:
+        _matcher = matcher
+    return matcher
@@ -0,0 +1,105 @@
+"""
+Cache of serialized profile responses and the ETags derived from them
+"""
+import hashlib
+import json
+import os
+from typing import Optional, Tuple
+
+from app.utils.cache_utils import TTLCache
+
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+
+_profile_cache = TTLCache(ttl_seconds=PROFILE_CACHE_TTL_SECONDS, max_entries=PROFILE_CACHE_MAX_ENTRIES)
+
+
+def profile_key(profile_id: int) -> tuple:
+    """Cache key for GET /profile/{profile_id}"""
+    return ("profile", profile_id)
+
+
+def me_key(user_id: int) -> tuple:
+    """Cache key for GET /profile/me"""
+    return ("me", user_id)
+
+
+def content_etag(body: dict) -> str:
+    """Build a weak ETag from the response body"""
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+    return f'W/"c-{digest[:16]}"'
+
+
+def fields_etag(etag: str, fields) -> str:
+    """
+    ETag of a sparse (``?fields=``) representation: the full body's ETag plus
+    the sorted field names, so each field set revalidates separately
+    """
+    if not fields:
+        return etag
+    # "." rather than "," keeps If-None-Match lists parseable
+    return etag[:-1] + "-f." + ".".join(sorted(fields)) + '"'
+
+
+def get_cached_profile(key: tuple) -> Optional[Tuple[str, dict]]:
+    """
+    Get a cached profile response
+
+    Returns:
+        tuple: (etag, serialized body) or None on a miss
+    """
+    return _profile_cache.get(key)
+
+
+def cache_profile(key: tuple, etag: str, body: dict) -> None:
+    """Store a serialized profile response with its ETag"""
+    _profile_cache.set(key, (etag, body))
+
+
+def invalidate_profile(profile_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+    """
+    Drop cached responses after a profile or its user changes
+
+    Args:
+        profile_id: Profile ID whose public view changed
+        user_id: User ID whose /profile/me view changed
+    """
+    if profile_id is not None:
+        _profile_cache.delete(profile_key(profile_id))
+    if user_id is not None:
+        _profile_cache.delete(me_key(user_id))
+        # /profile/{id} falls back to the users table when no profile has that id
+        _profile_cache.delete(profile_key(user_id))
+
+
+def invalidate_profiles(profile_ids) -> None:
+    """
+    Drop cached responses after a bulk load changed several profiles
+
+    The users owning those profiles are not known here, so every cached
+    /profile/me response is dropped as well.
+    """
+    for profile_id in profile_ids:
+        _profile_cache.delete(profile_key(profile_id))
+    _profile_cache.delete_where(lambda key, _: key[0] == "me")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag
+
+    Args:
+        if_none_match: Raw header value (may list several tags or be "*")
+        etag: Current ETag of the resource
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def _opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    current = _opaque(etag)
+    return any(_opaque(candidate) == current for candidate in if_none_match.split(","))
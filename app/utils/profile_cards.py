@@ -0,0 +1,160 @@
+"""
+Read-through cache of the display fields ("cards") of matched profiles.
+
+Match retrieval only ranks profile IDs, so its sorts and CTEs carry ids and
+scores instead of wide text columns. The fields a result shows are then
+looked up here: first in an in-process LRU, then in Redis when
+PROFILE_CARD_REDIS_URL is set (shared by every API process), and only the
+remaining misses are read from profiles, in one query. Profile writes drop
+the affected cards after commit (see app.hooks.profile_hooks); bulk loads
+drop the cards of the profiles they change.
+
+Other processes keep their in-process copy until it expires, so with
+several API workers PROFILE_CARD_CACHE_TTL_SECONDS bounds how stale a card
+can be; Redis entries are deleted on write.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+
+from app.database import engine, Profile
+from app.utils.cache_utils import TTLCache
+from app.utils.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Profile columns shown on a match result
+CARD_FIELDS = ("id", "name", "email", "organization", "research_area", "primary_text", "resource_type")
+
+PROFILE_CARD_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CARD_CACHE_TTL_SECONDS", "60"))
+PROFILE_CARD_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CARD_CACHE_MAX_ENTRIES", "20000"))
+# Shared second level (empty = in-process only)
+PROFILE_CARD_REDIS_URL = os.getenv("PROFILE_CARD_REDIS_URL", "")
+PROFILE_CARD_REDIS_TTL_SECONDS = int(os.getenv("PROFILE_CARD_REDIS_TTL_SECONDS", "3600"))
+# Redis calls slower than this count as misses; repeated failures bypass Redis for a while
+PROFILE_CARD_REDIS_TIMEOUT_MS = float(os.getenv("PROFILE_CARD_REDIS_TIMEOUT_MS", "50"))
+
+_cards = TTLCache(ttl_seconds=PROFILE_CARD_CACHE_TTL_SECONDS, max_entries=PROFILE_CARD_CACHE_MAX_ENTRIES)
+_redis_breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+_redis_client = None
+
+
+def _redis():
+    """Shared Redis client, or None when not configured or currently failing"""
+    global _redis_client
+    if not PROFILE_CARD_REDIS_URL or not _redis_breaker.allow():
+        return None
+    if _redis_client is None:
+        import redis
+        timeout = PROFILE_CARD_REDIS_TIMEOUT_MS / 1000
+        _redis_client = redis.Redis.from_url(
+            PROFILE_CARD_REDIS_URL, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+    return _redis_client
+
+
+def _redis_key(profile_id: int) -> str:
+    return f"profile_card:{profile_id}"
+
+
+def _redis_call(operation: str, call):
+    try:
+        # Inside the try: once the breaker has allowed a call, its outcome must be recorded
+        client = _redis()
+        if client is None:
+            return None
+        result = call(client)
+    except Exception as e:
+        _redis_breaker.record_failure()
+        logger.warning(f"Profile card Redis {operation} failed: {e}")
+        return None
+    _redis_breaker.record_success()
+    return result
+
+
+def _load_cards(profile_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(*[getattr(Profile, field) for field in CARD_FIELDS]).where(Profile.id.in_(profile_ids))
+        ).fetchall()
+    return {row.id: dict(row._mapping) for row in rows}
+
+
+def get_profile_cards(profile_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Display fields of the given profiles
+
+    Args:
+        profile_ids: Profile IDs, in any order, duplicates allowed
+
+    Returns:
+        dict: Profile ID -> card; profiles that no longer exist are left out
+    """
+    wanted = list(dict.fromkeys(int(profile_id) for profile_id in profile_ids))
+    cards: Dict[int, Dict[str, Any]] = {}
+    missing = []
+    for profile_id in wanted:
+        card = _cards.get(profile_id)
+        if card is None:
+            missing.append(profile_id)
+        else:
+            cards[profile_id] = card
+    if not missing:
+        return cards
+
+    cached = _redis_call("read", lambda client: client.mget([_redis_key(profile_id) for profile_id in missing]))
+    if cached:
+        still_missing = []
+        for profile_id, value in zip(missing, cached):
+            if value is None:
+                still_missing.append(profile_id)
+                continue
+            card = json.loads(value)
+            cards[profile_id] = card
+            _cards.set(profile_id, card)
+        missing = still_missing
+    if not missing:
+        return cards
+
+    loaded = _load_cards(missing)
+    for profile_id, card in loaded.items():
+        cards[profile_id] = card
+        _cards.set(profile_id, card)
+    if loaded:
+        def store(client):
+            pipeline = client.pipeline(transaction=False)
+            for profile_id, card in loaded.items():
+                pipeline.set(_redis_key(profile_id), json.dumps(card), ex=PROFILE_CARD_REDIS_TTL_SECONDS)
+            pipeline.execute()
+        _redis_call("write", store)
+    return cards
+
+
+def hydrate_matches(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add card fields to ranked matches that carry only ids and scores
+
+    Order is kept; matches whose profile has been deleted are dropped.
+    """
+    if not matches:
+        return matches
+    cards = get_profile_cards(match["id"] for match in matches)
+    return [{**cards[match["id"]], **match} for match in matches if match["id"] in cards]
+
+
+def invalidate_profile_cards(profile_ids: Iterable[int]) -> None:
+    """Drop cached cards after their profiles changed"""
+    profile_ids = [int(profile_id) for profile_id in profile_ids]
+    if not profile_ids:
+        return
+    for profile_id in profile_ids:
+        _cards.delete(profile_id)
+    _redis_call("delete", lambda client: client.delete(*[_redis_key(profile_id) for profile_id in profile_ids]))
+
+
+def clear_profile_cards() -> None:
+    """Drop every in-process card (tests, bulk reloads of this process)"""
+    _cards.clear()
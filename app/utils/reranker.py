@@ -0,0 +1,97 @@
+"""
+Optional cross-encoder re-ranking of first-stage matches.
+
+Disabled unless RERANK_MODEL names a sentence-transformers CrossEncoder
+(e.g. ``cross-encoder/ms-marco-MiniLM-L-6-v2``). Scoring runs on a small
+worker pool with a hard budget of RERANK_BUDGET_MS: if the model is slow,
+still loading, busy or failing, the first-stage order is returned unchanged
+and the reason is reported instead.
+"""
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+# First-stage candidates sent to the cross-encoder
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+# Requests that find every worker busy fall back immediately instead of queueing
+_slots = threading.BoundedSemaphore(RERANK_WORKERS)
+_model = None
+_model_lock = threading.Lock()
+
+
+def reranker_enabled() -> bool:
+    """True when a cross-encoder model is configured"""
+    return bool(RERANK_MODEL)
+
+
+def _get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import CrossEncoder
+            _model = CrossEncoder(RERANK_MODEL)
+            logger.info(f"Loaded cross-encoder {RERANK_MODEL}")
+        return _model
+
+
+def warm_up() -> None:
+    """Load the model in the background so the first request is not the one that pays for it"""
+    if reranker_enabled():
+        _executor.submit(_get_model)
+
+
+def match_text(match: Dict[str, Any]) -> str:
+    """Text of a match that the cross-encoder scores against the query"""
+    return " ".join(part for part in (match.get("research_area"), match.get("primary_text")) if part)
+
+
+def _score(query: str, documents: List[str]) -> List[float]:
+    return _get_model().predict([(query, document) for document in documents]).tolist()
+
+
+def rerank_matches(query: str, matches: List[Dict[str, Any]],
+                   budget_ms: float = RERANK_BUDGET_MS) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Re-order first-stage matches by cross-encoder score within a latency budget
+
+    Args:
+        query: Raw search query
+        matches: First-stage matches, best first
+        budget_ms: Maximum time to wait for the model
+
+    Returns:
+        tuple: (matches, status) where status is "ok", or "timeout", "busy",
+        "error" or "disabled" when the first-stage order was kept
+    """
+    if not reranker_enabled() or not matches:
+        return matches, "disabled"
+    if not _slots.acquire(blocking=False):
+        return matches, "busy"
+
+    try:
+        future = _executor.submit(_score, query, [match_text(match) for match in matches])
+    except Exception:
+        _slots.release()
+        raise
+    # The slot is held until scoring really finishes, even after a timeout
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        scores = future.result(timeout=budget_ms / 1000)
+    except FutureTimeoutError:
+        return matches, "timeout"
+    except Exception as e:
+        logger.warning(f"Cross-encoder re-ranking failed: {e}")
+        return matches, "error"
+
+    ranked = sorted(zip(scores, range(len(matches))), key=lambda pair: (-pair[0], pair[1]))
+    return [{**matches[i], "rerank_score": float(score)} for score, i in ranked], "ok"
@@ -0,0 +1,280 @@
+"""
+Columnar profile snapshots: export/import against the database and
+memory-mapped loading for services and tools.
+
+A snapshot is a directory with three files:
+
+- ``metadata.arrow``: one row per profile (Arrow IPC file, uncompressed so it
+  can be memory-mapped without a decode step)
+- ``embeddings.npy``: float32 matrix, row ``i`` belongs to metadata row ``i``;
+  vectors are L2 normalized
+- ``manifest.json``: format version, row count, dimension and model versions
+"""
+import os
+import json
+import shutil
+import logging
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import Profile, ResearcherEmbedding
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+METADATA_FILE = "metadata.arrow"
+EMBEDDINGS_FILE = "embeddings.npy"
+MANIFEST_FILE = "manifest.json"
+EMBEDDING_DIMENSION = 384
+
+# Columns stored in metadata.arrow, in order
+PROFILE_COLUMNS = [
+    "id", "name", "email", "organization", "seek_share", "resource_type",
+    "research_area", "description", "primary_text", "status",
+]
+EMBEDDING_COLUMNS = ["model_version", "text_sha256"]
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Profile snapshots require pyarrow (pip install pyarrow)") from e
+    return pa
+
+
+def _metadata_schema(pa):
+    fields = [pa.field("id", pa.int64())]
+    fields += [pa.field(column, pa.string()) for column in PROFILE_COLUMNS[1:] + EMBEDDING_COLUMNS]
+    return pa.schema(fields)
+
+
+class ProfileSnapshot:
+    """
+    A loaded snapshot
+
+    Attributes:
+        metadata: pyarrow.Table with PROFILE_COLUMNS + EMBEDDING_COLUMNS
+        embeddings: (n, dimension) float32 array, memory-mapped when loaded with mmap=True
+        manifest: Parsed manifest.json
+        ids: int64 array of profile ids (row order of ``embeddings``)
+    """
+
+    def __init__(self, metadata, embeddings: np.ndarray, manifest: Dict[str, Any]):
+        self.metadata = metadata
+        self.embeddings = embeddings
+        self.manifest = manifest
+        self.ids = metadata.column("id").to_numpy()
+
+    def __len__(self) -> int:
+        return self.metadata.num_rows
+
+    def column(self, name: str) -> List[Any]:
+        """Return a metadata column as a Python list"""
+        return self.metadata.column(name).to_pylist()
+
+    def rows(self, indices) -> List[Dict[str, Any]]:
+        """Return metadata rows for the given row indices as dictionaries"""
+        return self.metadata.take(np.asarray(indices, dtype=np.int64)).to_pylist()
+
+
+def load_snapshot(snapshot_dir: str, mmap: bool = True) -> ProfileSnapshot:
+    """
+    Load a snapshot directory
+
+    With ``mmap=True`` neither file is read up front: the embedding matrix
+    and the Arrow columns are mapped from the page cache, so startup cost is
+    independent of corpus size and pages are shared across processes.
+
+    Args:
+        snapshot_dir: Directory written by export_snapshot
+        mmap: Memory-map the files instead of reading them into memory
+    """
+    pa = _require_pyarrow()
+
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as handle:
+        manifest = json.load(handle)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+
+    metadata_path = os.path.join(snapshot_dir, METADATA_FILE)
+    source = pa.memory_map(metadata_path, "r") if mmap else pa.OSFile(metadata_path, "r")
+    metadata = pa.ipc.open_file(source).read_all()
+
+    embeddings = np.load(os.path.join(snapshot_dir, EMBEDDINGS_FILE), mmap_mode="r" if mmap else None)
+    if embeddings.shape[0] != metadata.num_rows:
+        raise ValueError(
+            f"Snapshot is inconsistent: {metadata.num_rows} metadata rows, {embeddings.shape[0]} embeddings"
+        )
+
+    return ProfileSnapshot(metadata, embeddings, manifest)
+
+
+def _iter_embedded_profiles(db: Session) -> Iterator[tuple]:
+    columns = [getattr(Profile, column) for column in PROFILE_COLUMNS]
+    columns += [getattr(ResearcherEmbedding, column) for column in EMBEDDING_COLUMNS]
+    query = db.query(*columns, ResearcherEmbedding.embedding).join(
+        ResearcherEmbedding, ResearcherEmbedding.user_id == Profile.id
+    ).order_by(Profile.id)
+    return iter(query.yield_per(EXPORT_BATCH_SIZE))
+
+
+def export_snapshot(db: Session, snapshot_dir: str) -> Dict[str, Any]:
+    """
+    Export every profile that has an embedding to a snapshot directory
+
+    Files are written to a temporary directory next to ``snapshot_dir`` and
+    swapped in at the end, so readers never see a half-written snapshot.
+
+    Args:
+        db: Database session
+        snapshot_dir: Output directory (replaced if it exists)
+
+    Returns:
+        dict: The written manifest
+    """
+    pa = _require_pyarrow()
+    schema = _metadata_schema(pa)
+    # Count and scan must see the same rows to size the matrix up front
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    total = db.query(ResearcherEmbedding).join(Profile, Profile.id == ResearcherEmbedding.user_id).count()
+
+    parent = os.path.dirname(os.path.abspath(snapshot_dir))
+    os.makedirs(parent, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+
+    try:
+        matrix = np.lib.format.open_memmap(
+            os.path.join(work_dir, EMBEDDINGS_FILE), mode="w+", dtype=np.float32,
+            shape=(total, EMBEDDING_DIMENSION)
+        )
+        model_versions: Dict[str, int] = {}
+        written = 0
+
+        with pa.OSFile(os.path.join(work_dir, METADATA_FILE), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                batch: List[tuple] = []
+                for row in _iter_embedded_profiles(db):
+                    batch.append(row)
+                    if len(batch) == EXPORT_BATCH_SIZE:
+                        written = _write_batch(pa, schema, writer, matrix, batch, written, model_versions)
+                        batch = []
+                if batch:
+                    written = _write_batch(pa, schema, writer, matrix, batch, written, model_versions)
+
+        db.rollback()  # end the read-only snapshot transaction
+        matrix.flush()
+        del matrix
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "count": written,
+            "dimension": EMBEDDING_DIMENSION,
+            "dtype": "float32",
+            "model_versions": model_versions,
+            "files": {"metadata": METADATA_FILE, "embeddings": EMBEDDINGS_FILE},
+        }
+        with open(os.path.join(work_dir, MANIFEST_FILE), "w") as handle:
+            json.dump(manifest, handle, indent=2)
+
+        if os.path.exists(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+        os.replace(work_dir, snapshot_dir)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    logger.info(f"Exported {written} profiles to snapshot {snapshot_dir}")
+    return manifest
+
+
+def _write_batch(pa, schema, writer, matrix: np.ndarray, rows: List[tuple], offset: int, model_versions: Dict[str, int]) -> int:
+    columns = PROFILE_COLUMNS + EMBEDDING_COLUMNS
+    arrays = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+    writer.write_batch(pa.record_batch([arrays[name] for name in columns], schema=schema))
+
+    vectors = np.asarray([row[-1] for row in rows], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    matrix[offset:offset + len(rows)] = vectors / np.where(norms == 0, 1, norms)
+
+    for version in arrays["model_version"]:
+        model_versions[version] = model_versions.get(version, 0) + 1
+    return offset + len(rows)
+
+
+def import_snapshot(db: Session, snapshot_dir: str, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Load a snapshot into profiles/researcher_embeddings
+
+    Rows are upserted by profile id,
+    so re-importing is safe and an empty database gets the exporter's ids.
+
+    Args:
+        db: Database session
+        snapshot_dir: Directory written by export_snapshot
+        batch_size: Rows per INSERT ... ON CONFLICT statement
+
+    Returns:
+        dict: Number of profiles imported
+    """
+    from app.utils.match_cache import invalidate_matches
+    from app.utils.profile_cache import invalidate_profiles
+    from app.utils.profile_cards import invalidate_profile_cards
+
+    snapshot = load_snapshot(snapshot_dir)
+    profile_fields = PROFILE_COLUMNS[1:]
+    now = datetime.utcnow()
+
+    for start in range(0, len(snapshot), batch_size):
+        rows = snapshot.metadata.slice(start, batch_size).to_pylist()
+        vectors = np.asarray(snapshot.embeddings[start:start + batch_size])
+
+        profile_stmt = pg_insert(Profile).values([
+            {column: row[column] for column in PROFILE_COLUMNS} for row in rows
+        ])
+        db.execute(profile_stmt.on_conflict_do_update(
+            index_elements=[Profile.id],
+            set_={column: profile_stmt.excluded[column] for column in profile_fields},
+        ))
+
+        embedding_stmt = pg_insert(ResearcherEmbedding).values([
+            {
+                "user_id": row["id"],
+                "embedding": vector.tolist(),
+                "model_version": row["model_version"],
+                "text_sha256": row["text_sha256"],
+                "updated_at": now,
+            }
+            for row, vector in zip(rows, vectors)
+        ])
+        db.execute(embedding_stmt.on_conflict_do_update(
+            index_elements=[ResearcherEmbedding.user_id],
+            set_={
+                column: embedding_stmt.excluded[column]
+                for column in ("embedding", "model_version", "text_sha256", "updated_at")
+            },
+        ))
+        db.commit()
+        # The upserts bypass the ORM hooks that drop cached match cards, profile responses and results
+        invalidate_profile_cards(row["id"] for row in rows)
+        invalidate_profiles(row["id"] for row in rows)
+        invalidate_matches()
+        logger.info(f"Imported {min(start + batch_size, len(snapshot))}/{len(snapshot)} profiles")
+
+    # Keep the id sequence ahead of the imported ids
+    db.execute(text("SELECT setval(pg_get_serial_sequence('profiles', 'id'), GREATEST((SELECT MAX(id) FROM profiles), 1))"))
+    # The upserts bypass the ORM hooks that maintain facet counts
+    from app.utils.facets import rebuild_facet_counts
+    rebuild_facet_counts(db)
+    db.commit()
+    return {"imported": len(snapshot)}
@@ -0,0 +1,39 @@
+"""
+Server-sent events framing for streaming endpoints
+"""
+import logging
+from typing import Any, Iterable, Iterator
+
+from app.utils.fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one server-sent event
+
+    Args:
+        event: Event name (the client's ``event:`` field)
+        data: JSON-serializable payload, sent on a single ``data:`` line
+
+    Returns:
+        str: The event frame, terminated by a blank line
+    """
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+def sse_stream(events: Iterable[str]) -> Iterator[str]:
+    """
+    Pass events through, ending the stream with an ``error`` event if producing
+    them fails
+
+    The status line is sent with the first event, so a failure partway through
+    can only be reported in the stream itself; the client sees the events sent
+    so far followed by ``error`` and no ``done``.
+    """
+    try:
+        yield from events
+    except Exception:
+        logger.exception("Event stream failed")
+        yield sse_event("error", {"detail": "Internal server error"})
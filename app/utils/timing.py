@@ -0,0 +1,51 @@
+"""
+Per-request stage timing, reported to clients through the Server-Timing header
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+
+class StageTimer:
+    """
+    Collects (stage, duration, description) entries for one request
+
+    Example:
+        timer = StageTimer()
+        with timer.stage("encode"):
+            ...
+        response.headers["Server-Timing"] = timer.header()
+    """
+
+    def __init__(self):
+        self.stages: List[list] = []
+
+    @contextmanager
+    def stage(self, name: str, description: Optional[str] = None) -> Iterator[None]:
+        """Time the enclosed block as stage ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append([name, (time.perf_counter() - start) * 1000, description])
+
+    def describe(self, name: str, description: str) -> None:
+        """Attach a description (e.g. a fallback reason) to the last entry for ``name``"""
+        for entry in reversed(self.stages):
+            if entry[0] == name:
+                entry[2] = description
+                return
+
+    def as_dict(self) -> dict:
+        """Durations in milliseconds by stage name"""
+        return {name: round(duration, 1) for name, duration, _ in self.stages}
+
+    def header(self) -> str:
+        """Server-Timing header value, e.g. ``encode;dur=4.2, rerank;dur=150.0;desc="timeout"``"""
+        parts = []
+        for name, duration, description in self.stages:
+            part = f"{name};dur={duration:.1f}"
+            if description:
+                part += f';desc="{description}"'
+            parts.append(part)
+        return ", ".join(parts)
@@ -6,6 +6,7 @@ import os
 import sys
 import argparse
 import logging
+import uuid
 from pathlib import Path
 
 # Add the app directory to Python path
@@ -13,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.database import get_db, Profile, ResearcherEmbedding
 from app.tasks.embedding_tasks import embed_profile, reindex_all_profiles
-from app.celery_app import celery_app
+from app.tasks.jobs import create_job, get_job
 from app.utils.embedding_utils import should_recompute_embedding
 
 # Configure logging
@@ -62,35 +63,49 @@ def check_embedding_status():
 
 def reindex_profiles(force=False, profile_id=None):
     """Reindex profiles"""
+    task_id = str(uuid.uuid4())
+    db = next(get_db())
+    try:
+        create_job(db, task_id, "profile" if profile_id else "reindex", total=1 if profile_id else 0)
+        db.commit()
+    finally:
+        db.close()
+    
     if profile_id:
         print(f"🔄 Reindexing profile {profile_id}...")
-        task = embed_profile.delay(profile_id)
-        print(f"Task enqueued: {task.id}")
+        embed_profile.apply_async(args=[profile_id], kwargs={"job_id": task_id}, task_id=task_id)
+        print(f"Task enqueued: {task_id}")
     else:
         print(f"🔄 Reindexing all profiles (force={force})...")
-        task = reindex_all_profiles.delay(force=force)
-        print(f"Bulk reindex task enqueued: {task.id}")
+        reindex_all_profiles.apply_async(kwargs={"force": force}, task_id=task_id)
+        print(f"Bulk reindex task enqueued: {task_id}")
     
     print("Use 'embedding-cli status-task <task_id>' to check progress")
 
 
 def check_task_status(task_id):
     """Check the status of a specific task"""
-    result = celery_app.AsyncResult(task_id)
+    db = next(get_db())
+    try:
+        job = get_job(db, task_id)
+    finally:
+        db.close()
     
     print(f"\n📋 Task Status: {task_id}")
     print(f"{'='*50}")
-    print(f"Status: {result.status}")
-    print(f"Ready: {result.ready()}")
+    if job is None:
+        print("Unknown task (only reindexes and CLI/admin triggered embeddings are tracked)")
+        print()
+        return
     
-    if result.ready():
-        print(f"Successful: {result.successful()}")
-        if result.successful():
-            print(f"Result: {result.result}")
-        else:
-            print(f"Error: {result.info}")
-    else:
-        print(f"Info: {result.info}")
+    print(f"Kind: {job['kind']}")
+    print(f"Status: {job['status']}")
+    print(f"Ready: {job['ready']}")
+    print(f"Progress: {job['progress']}% ({job['processed']} processed, {job['skipped']} skipped, "
+          f"{job['errors']} errors of {job['total']})")
+    if job['message']:
+        print(f"Message: {job['message']}")
+    print(f"Updated: {job['updated_at']}")
     
     print()
 
@@ -146,6 +161,44 @@ def list_outdated_profiles():
         db.close()
 
 
+def export_snapshot(snapshot_dir):
+    """Export profiles and embeddings to a memory-mappable snapshot"""
+    from app.utils.snapshot_utils import export_snapshot as write_snapshot
+    db = next(get_db())
+
+    try:
+        manifest = write_snapshot(db, snapshot_dir)
+        print(f"✅ Exported {manifest['count']} profiles to {snapshot_dir}")
+        print(f"   Model versions: {manifest['model_versions']}")
+    finally:
+        db.close()
+
+
+def import_snapshot(snapshot_dir):
+    """Load a snapshot into the database"""
+    from app.utils.snapshot_utils import import_snapshot as read_snapshot
+    db = next(get_db())
+
+    try:
+        result = read_snapshot(db, snapshot_dir)
+        print(f"✅ Imported {result['imported']} profiles from {snapshot_dir}")
+    finally:
+        db.close()
+
+
+def rebuild_facets():
+    """Recount match filter facets from profiles (after bulk SQL changes)"""
+    from app.utils.facets import rebuild_facet_counts
+    db = next(get_db())
+
+    try:
+        rows = rebuild_facet_counts(db)
+        db.commit()
+        print(f"✅ Rebuilt {rows} facet counts")
+    finally:
+        db.close()
+
+
 def main():
     parser = argparse.ArgumentParser(description='Manage researcher profile embeddings')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -165,6 +218,15 @@ def main():
     # Outdated command
     outdated_parser = subparsers.add_parser('outdated', help='List profiles needing updates')
     
+    # Snapshot commands
+    export_parser = subparsers.add_parser('snapshot-export', help='Export profiles and embeddings to a snapshot directory')
+    export_parser.add_argument('snapshot_dir', help='Output directory')
+    import_parser = subparsers.add_parser('snapshot-import', help='Load a snapshot directory into the database')
+    import_parser.add_argument('snapshot_dir', help='Snapshot directory')
+    
+    # Facet counts command
+    subparsers.add_parser('facets-rebuild', help='Recount match filter facets from profiles')
+    
     args = parser.parse_args()
     
     if args.command == 'status':
@@ -175,6 +237,12 @@ def main():
         check_task_status(args.task_id)
     elif args.command == 'outdated':
         list_outdated_profiles()
+    elif args.command == 'snapshot-export':
+        export_snapshot(args.snapshot_dir)
+    elif args.command == 'snapshot-import':
+        import_snapshot(args.snapshot_dir)
+    elif args.command == 'facets-rebuild':
+        rebuild_facets()
     else:
         parser.print_help()
 
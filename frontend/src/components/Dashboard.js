@@ -1,11 +1,10 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import { getApiUrl, API_ENDPOINTS } from '../config/api';
 
 const Dashboard = () => {
   const navigate = useNavigate();
-  const { logout, getAuthHeaders } = useAuth();
+  const { logout } = useAuth();
   const [showNewSearch, setShowNewSearch] = useState(false);
   const [formData, setFormData] = useState({
     seek_share: '',
@@ -81,27 +80,6 @@ const Dashboard = () => {
       console.log('=== DASHBOARD SEARCH DEBUG ===');
       console.log('Form data:', formData);
       console.log('Payload being sent:', payload);
-      console.log('Auth headers:', getAuthHeaders());
-      console.log('Making API request to:', getApiUrl(API_ENDPOINTS.MATCH));
-      
-      const response = await fetch(getApiUrl(API_ENDPOINTS.MATCH), {
-        method: 'POST',
-        headers: getAuthHeaders(),
-        body: JSON.stringify(payload)
-      });
-      
-      console.log('Response status:', response.status);
-      console.log('Response headers:', response.headers);
-
-      if (!response.ok) {
-        throw new Error('Failed to find matches');
-      }
-
-      const data = await response.json();
-      console.log('Response data:', data);
-      
-      const matches = data.matches || data;
-      console.log('Extracted matches:', matches);
       
       // Map form data to match Results component expectations
       const mappedFormData = {
@@ -114,9 +92,9 @@ const Dashboard = () => {
       };
       
       console.log('Mapped form data for Results:', mappedFormData);
-      console.log('Navigating to results with:', { matches, formData: mappedFormData });
       
-      navigate('/results', { state: { matches, formData: mappedFormData } });
+      // Results streams the matches itself so the first ones show up sooner
+      navigate('/results', { state: { matchRequest: payload, formData: mappedFormData } });
       
     } catch (error) {
       console.error('Error finding matches:', error);
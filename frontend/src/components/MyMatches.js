@@ -13,6 +13,8 @@ const MyMatches = () => {
   const [deletingMatch, setDeletingMatch] = useState(null);
   const [searchQuery, setSearchQuery] = useState('');
   const [showFilters, setShowFilters] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Function to clean description text and remove research area duplication
   const getCleanDescription = (match) => {
@@ -51,17 +53,25 @@ const MyMatches = () => {
     }
   }, [searchQuery, savedMatches]);
 
-  const fetchSavedMatches = async () => {
+  const fetchSavedMatches = async (cursor = null) => {
+    // Saved matches are paginated newest first; pass the cursor to load the next page
+    const url = new URL(getApiUrl(API_ENDPOINTS.SAVED_MATCHES), window.location.origin);
+    if (cursor !== null) {
+      url.searchParams.append('cursor', cursor);
+    }
+
     try {
-      const response = await fetch(getApiUrl(API_ENDPOINTS.SAVED_MATCHES), {
+      const response = await fetch(url.toString(), {
         method: 'GET',
         headers: getAuthHeaders()
       });
 
       if (response.ok) {
-        const matches = await response.json();
+        const page = await response.json();
+        const matches = cursor === null ? page.items : [...savedMatches, ...page.items];
         setSavedMatches(matches);
         setFilteredMatches(matches);
+        setNextCursor(page.next_cursor);
       } else {
         console.error('Failed to fetch saved matches');
         alert('Failed to load saved matches');
@@ -71,9 +81,15 @@ const MyMatches = () => {
       alert('Failed to load saved matches. Please try again.');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const handleLoadMore = () => {
+    setLoadingMore(true);
+    fetchSavedMatches(nextCursor);
+  };
+
   const handleDeleteMatch = async (profileId, index) => {
     if (!window.confirm('Are you sure you want to delete this match?')) {
       return;
@@ -115,9 +131,9 @@ const MyMatches = () => {
   };
 
   const getMatchScore = (match) => {
-    // Return the stored match score string (e.g., "85%")
-    if (match.match_score && match.match_score !== null) {
-      return match.match_score;
+    // The stored match score is a percentage (e.g., 85.0)
+    if (match.match_score !== undefined && match.match_score !== null) {
+      return `${Math.round(match.match_score)}%`;
     }
     // Fallback if no match score available
     return '85%';
@@ -576,6 +592,25 @@ const MyMatches = () => {
                 </div>
               );
             })}
+            {nextCursor !== null && (
+              <button
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                style={{
+                  alignSelf: 'center',
+                  padding: '10px 24px',
+                  backgroundColor: 'white',
+                  color: '#1a73e8',
+                  border: '1px solid #dadce0',
+                  borderRadius: '6px',
+                  cursor: loadingMore ? 'default' : 'pointer',
+                  fontSize: '14px',
+                  fontWeight: '500'
+                }}
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -3,11 +3,22 @@ import { useLocation, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { getApiUrl, API_ENDPOINTS } from '../config/api';
 
+// Fields a result card renders; the stream leaves out publications and other
+// wide columns the list view does not show
+const CARD_FIELDS = [
+  'id', 'name', 'organization', 'research_area', 'resource_type',
+  'primary_text', 'description', 'match_score'
+].join(',');
+
 const Results = () => {
   const navigate = useNavigate();
   const location = useLocation();
   const { logout, getAuthHeaders } = useAuth();
-  const { matches, formData } = location.state || { matches: [], formData: {} };
+  const { matchRequest, formData = {} } = location.state || {};
+  const [matches, setMatches] = useState((location.state && location.state.matches) || []);
+  const [isStreaming, setIsStreaming] = useState(Boolean(matchRequest));
+  const [streamError, setStreamError] = useState('');
+  const [facets, setFacets] = useState((location.state && location.state.facets) || {});
   const [savedMatches, setSavedMatches] = useState(new Set());
   const [savingMatch, setSavingMatch] = useState(null);
   const [searchQuery, setSearchQuery] = useState('');
@@ -36,6 +47,81 @@ const Results = () => {
     return description || 'No description available.';
   };
 
+  // Stream results from /api/match/stream: cached or first-stage matches arrive
+  // first, then re-ranked matches, then full profile details for each match
+  useEffect(() => {
+    if (!matchRequest) return;
+    const controller = new AbortController();
+
+    // Returns true when the stream should stop being read
+    const handleEvent = (event, data) => {
+      if (event === 'error') {
+        setStreamError(data.detail || 'Failed to find matches. Please try again.');
+        return true;
+      }
+      if (event === 'matches') {
+        setMatches(data.matches);
+      } else if (event === 'facets') {
+        setFacets(data.facets);
+      } else if (event === 'details') {
+        setMatches(prev => prev.map(match => ({ ...match, ...(data.profiles[match.id] || {}) })));
+      }
+      return false;
+    };
+
+    const streamMatches = async () => {
+      try {
+        const response = await fetch(`${getApiUrl(API_ENDPOINTS.MATCH_STREAM)}?fields=${CARD_FIELDS}`, {
+          method: 'POST',
+          headers: { ...getAuthHeaders(), Accept: 'text/event-stream' },
+          body: JSON.stringify(matchRequest),
+          signal: controller.signal
+        });
+
+        if (!response.ok) {
+          throw new Error('Failed to find matches');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          // Events are separated by a blank line
+          let boundary;
+          while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+              if (line.startsWith('event:')) event = line.slice(6).trim();
+              else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data && handleEvent(event, JSON.parse(data))) {
+              await reader.cancel();
+              return;
+            }
+          }
+        }
+      } catch (error) {
+        if (error.name !== 'AbortError') {
+          console.error('Error streaming matches:', error);
+          setStreamError('Failed to find matches. Please try again.');
+        }
+      } finally {
+        if (!controller.signal.aborted) setIsStreaming(false);
+      }
+    };
+
+    streamMatches();
+    return () => controller.abort();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [matchRequest]);
+
   useEffect(() => {
     // Initialize filtered matches with all matches
     setFilteredMatches(matches);
@@ -274,7 +360,9 @@ const Results = () => {
             fontSize: '16px',
             color: '#5f6368'
           }}>
-            Found {filteredMatches.length} researcher{filteredMatches.length !== 1 ? 's' : ''} matching your criteria
+            {isStreaming && matches.length === 0
+              ? 'Searching for researchers...'
+              : `Found ${filteredMatches.length} researcher${filteredMatches.length !== 1 ? 's' : ''} matching your criteria`}
           </p>
         </div>
 
@@ -477,6 +565,11 @@ const Results = () => {
                     }}
                   />
                   {org}
+                  {facets.organization && facets.organization[org] !== undefined && (
+                    <span style={{ color: '#9aa0a6' }} title="Active profiles in the directory, not only these results">
+                      ({facets.organization[org]})
+                    </span>
+                  )}
                 </label>
               ))}
             </div>
@@ -529,8 +622,33 @@ const Results = () => {
           </p>
         </div>
 
+        {streamError && (
+          <div style={{
+            padding: '12px 16px',
+            marginBottom: '16px',
+            backgroundColor: '#fce8e6',
+            color: '#c5221f',
+            borderRadius: '8px',
+            fontSize: '14px'
+          }}>
+            {streamError}
+          </div>
+        )}
+
         {/* Results List */}
-        {filteredMatches.length > 0 ? (
+        {isStreaming && matches.length === 0 ? (
+          <div style={{
+            textAlign: 'center',
+            padding: '64px 32px',
+            backgroundColor: 'white',
+            borderRadius: '8px',
+            border: '1px solid #e8eaed',
+            color: '#5f6368',
+            fontSize: '16px'
+          }}>
+            Finding matches...
+          </div>
+        ) : filteredMatches.length > 0 ? (
           <div style={{
             display: 'flex',
             flexDirection: 'column',
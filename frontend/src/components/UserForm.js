@@ -1,11 +1,10 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import { getApiUrl, API_ENDPOINTS } from '../config/api';
 
 const UserForm = () => {
   const navigate = useNavigate();
-  const { logout, getAuthHeaders } = useAuth();
+  const { logout } = useAuth();
   
   // --- Form State ---
   const [formData, setFormData] = useState({
@@ -103,37 +102,14 @@ const UserForm = () => {
     
     console.log("Sending payload:", payload);
 
-    try {
-      console.log("Making API request...");
-      const response = await fetch(getApiUrl(API_ENDPOINTS.MATCH), {
-        method: 'POST',
-        headers: getAuthHeaders(),
-        body: JSON.stringify(payload)
-      });
-
-      console.log("Response status:", response.status);
-
-      if (!response.ok) {
-        throw new Error(`Server error: ${response.status}`);
+    // Results streams the matches itself so the first ones show up sooner
+    navigate('/results', {
+      state: {
+        matchRequest: payload,
+        formData: formData
       }
-
-      const data = await response.json();
-      console.log("Received data:", data);
-      
-      // Navigate to results page with data
-      navigate('/results', {
-        state: {
-          matches: data.matches || [],
-          formData: formData
-        }
-      });
-
-    } catch (error) {
-      console.error("Full API Error:", error);
-      setApiError(`Failed to fetch matches: ${error.message}`);
-    } finally {
-      setIsLoading(false);
-    }
+    });
+    setIsLoading(false);
   };
 
   const resourceTypes = [
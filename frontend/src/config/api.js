@@ -18,11 +18,14 @@ const API_CONFIG = {
     
     // Matching
     MATCH: '/api/match',
+    MATCH_STREAM: '/api/match/stream',
     
     // Saved Matches
     SAVED_MATCHES: '/matches/saved',
     SAVE_MATCH: (profileId) => `/matches/save/${profileId}`,
     DELETE_SAVED_MATCH: (profileId) => `/matches/saved/${profileId}`,
+    SAVE_MATCHES_BATCH: '/matches/save/batch',
+    DELETE_SAVED_MATCHES_BATCH: '/matches/saved/batch-delete',
   }
 };
 
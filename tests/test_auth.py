@@ -0,0 +1,152 @@
+"""
+Tests for authentication: per-token user cache and password hashing
+"""
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import auth
+from app.database import User
+from app.utils.cache_utils import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test the shared TTL cache"""
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=10, clock=clock)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        clock.now = 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = TTLCache(ttl_seconds=10, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # touch "a" so "b" becomes least recently used
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_delete_where(self):
+        cache = TTLCache(ttl_seconds=10)
+        cache.set("t1", {"id": 1})
+        cache.set("t2", {"id": 2})
+        cache.set("t3", {"id": 1})
+
+        removed = cache.delete_where(lambda key, value: value["id"] == 1)
+        assert removed == 2
+        assert cache.get("t2") == {"id": 2}
+
+    def test_non_positive_ttl_is_not_stored(self):
+        cache = TTLCache(ttl_seconds=10)
+        cache.set("a", 1, ttl_seconds=0)
+        assert cache.get("a") is None
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = factory()
+    db.add(User(
+        email="alice@example.com",
+        hashed_password="x",
+        name="Alice",
+        seek_share="share",
+        resource_type="expertise",
+        description="Protein folding",
+        research_area="Biology",
+        status="active",
+    ))
+    db.commit()
+    db.close()
+    auth._user_cache.clear()
+    yield factory
+    auth._user_cache.clear()
+
+
+class TestResolveUser:
+    """Test token-to-user resolution"""
+
+    def test_second_lookup_skips_database(self, session_factory):
+        token = auth.create_Access_token({"sub": "alice@example.com"})
+
+        db = session_factory()
+        assert auth.resolve_user(token, db).name == "Alice"
+        db.close()
+
+        db = session_factory()
+        queries = []
+        db.query = lambda *args, **kwargs: queries.append(args)
+        user = auth.resolve_user(token, db)
+        assert user.email == "alice@example.com"
+        assert queries == []
+        db.close()
+
+    def test_cached_user_can_be_updated(self, session_factory):
+        token = auth.create_Access_token({"sub": "alice@example.com"})
+        db = session_factory()
+        auth.resolve_user(token, db)
+        db.close()
+
+        db = session_factory()
+        user = auth.resolve_user(token, db)
+        user.name = "Alice B."
+        db.commit()
+        auth.invalidate_user_cache(user.id)
+        db.close()
+
+        db = session_factory()
+        assert auth.resolve_user(token, db).name == "Alice B."
+        db.close()
+
+    def test_invalid_token(self, session_factory):
+        db = session_factory()
+        assert auth.resolve_user("not-a-token", db) is None
+        db.close()
+
+
+class TestPasswordHashing:
+    """Test pooled hashing and rehash-on-login"""
+
+    def test_hash_and_verify(self):
+        hashed = asyncio.run(auth.hash_password_async("s3cret"))
+        assert f"${auth.PASSWORD_HASH_ROUNDS:02d}$" in hashed
+
+        valid, new_hash = asyncio.run(auth.verify_password_async("s3cret", hashed))
+        assert valid is True
+        assert new_hash is None
+
+        valid, _ = asyncio.run(auth.verify_password_async("wrong", hashed))
+        assert valid is False
+
+    def test_outdated_hash_is_upgraded(self):
+        weak_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret")
+
+        valid, new_hash = asyncio.run(auth.verify_password_async("s3cret", weak_hash))
+        assert valid is True
+        assert new_hash is not None
+        assert auth.verify_hashed_pass("s3cret", new_hash)
+
+    def test_unknown_user_and_unusable_hash(self):
+        assert asyncio.run(auth.verify_password_async("s3cret", None)) == (False, None)
+        assert asyncio.run(auth.verify_password_async("s3cret", "!")) == (False, None)
@@ -0,0 +1,51 @@
+"""
+Tests for the engine factory and connection pool metrics
+"""
+import pytest
+from sqlalchemy import exc as sa_exc, text
+from sqlalchemy.pool import QueuePool
+
+from app import database
+
+
+def test_create_db_engine_uses_instrumented_pool(tmp_path):
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == database.DB_POOL_SIZE
+    engine.dispose()
+
+
+def test_pool_metrics_track_checkouts(tmp_path):
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    database.pool_metrics.reset()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        snapshot = database.pool_metrics.snapshot(engine.pool)
+        assert snapshot["checked_out"] == 1
+
+    snapshot = database.pool_metrics.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 1
+    assert snapshot["checkins"] == 1
+    assert snapshot["connects"] == 1
+    assert snapshot["checked_out"] == 0
+    engine.dispose()
+
+
+def test_pool_timeout_is_not_recorded_as_a_wait(tmp_path, caplog):
+    engine = database.create_db_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.15
+    )
+    database.pool_metrics.reset()
+
+    with engine.connect():
+        with pytest.raises(sa_exc.TimeoutError):
+            engine.connect()
+
+    snapshot = database.pool_metrics.snapshot(engine.pool)
+    assert snapshot["timeouts"] == 1
+    # Longer than DB_POOL_WAIT_WARN_MS, but a timeout is not a wait
+    assert snapshot["max_wait_ms"] < database.DB_POOL_WAIT_WARN_MS
+    assert "Connection pool exhausted" in caplog.text
+    assert "for a database connection" not in caplog.text
+    engine.dispose()
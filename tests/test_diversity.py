@@ -0,0 +1,60 @@
+"""
+Tests for maximal marginal relevance re-ranking
+"""
+import numpy as np
+
+from app.utils.diversity import diversify_matches, mmr_select
+
+
+def test_mmr_skips_near_duplicates():
+    # 0 and 1 are near-identical; 2 is less relevant but different
+    embeddings = np.array([[1, 0], [1, 0.01], [0, 1]], dtype=np.float32)
+    relevance = np.array([1.0, 0.95, 0.6])
+
+    assert mmr_select(relevance, embeddings, 2, lambda_=1.0).tolist() == [0, 1]
+    assert mmr_select(relevance, embeddings, 2, lambda_=0.5).tolist() == [0, 2]
+    assert mmr_select(relevance, embeddings, 5, lambda_=0.5).tolist() == [0, 2, 1]
+
+
+def test_organization_cap_and_relevance_scaling():
+    matches = [
+        {"id": 1, "organization": "Lab A", "match_score": 0.9},
+        {"id": 2, "organization": "Lab A", "match_score": 0.8},
+        {"id": 3, "organization": "Lab A", "match_score": 0.7},
+        {"id": 4, "organization": "Lab B", "match_score": 0.1},
+    ]
+    embeddings = np.eye(4, dtype=np.float32)
+
+    capped = diversify_matches(matches, embeddings, 3, lambda_=1.0, max_per_organization=2)
+    assert [match["id"] for match in capped] == [1, 2, 4]
+
+    # Zero vectors (profiles without an embedding) never count as duplicates
+    reranked = [{**match, "rerank_score": 10 - match["id"]} for match in matches]
+    assert [m["id"] for m in diversify_matches(reranked, np.zeros((4, 2)), 2, lambda_=0.5)] == [1, 2]
+
+
+def test_relevance_follows_the_fused_order():
+    # Hybrid results are ordered by fused_score, which disagrees with match_score here
+    matches = [
+        {"id": 1, "match_score": 0.2, "fused_score": 0.032},
+        {"id": 2, "match_score": 0.9, "fused_score": 0.016},
+        {"id": 3, "match_score": 0.5, "fused_score": 0.010},
+    ]
+    embeddings = np.eye(3, dtype=np.float32)
+    assert [m["id"] for m in diversify_matches(matches, embeddings, 3, lambda_=0.9)] == [1, 2, 3]
+
+    # Without a score on every candidate the list order itself is the relevance
+    unscored = [{"id": 1}, {"id": 2, "match_score": 0.9}, {"id": 3}]
+    assert [m["id"] for m in diversify_matches(unscored, embeddings, 3, lambda_=0.9)] == [1, 2, 3]
+
+
+def test_profiles_without_organization_are_not_capped():
+    matches = [
+        {"id": 1, "organization": None, "match_score": 0.9},
+        {"id": 2, "organization": "", "match_score": 0.8},
+        {"id": 3, "organization": "Lab A", "match_score": 0.7},
+        {"id": 4, "organization": "Lab A", "match_score": 0.6},
+        {"id": 5, "match_score": 0.5},
+    ]
+    picked = diversify_matches(matches, np.eye(5, dtype=np.float32), 4, lambda_=1.0, max_per_organization=1)
+    assert [match["id"] for match in picked] == [1, 2, 3, 5]
@@ -7,9 +7,12 @@ from unittest.mock import Mock, patch, MagicMock
 import numpy as np
 from sqlalchemy.orm import Session
 
-from app.database import Profile, ResearcherEmbedding
+from app.database import Profile, Publication, ResearcherEmbedding
 from app.tasks.embedding_tasks import embed_profile
-from app.utils.embedding_utils import create_profile_text, normalize_embedding, should_recompute_embedding
+from app.utils.embedding_utils import (
+    create_profile_text, create_profile_chunks, create_publication_text, split_sentences,
+    normalize_embedding, should_recompute_embedding
+)
 
 
 class TestEmbeddingUtils:
@@ -50,6 +53,37 @@ class TestEmbeddingUtils:
         minimal_text = create_profile_text(minimal_profile)
         assert "Researcher: Jane Doe" in minimal_text
     
+    def test_split_sentences_merges_short_fragments(self):
+        """Test sentence chunking for multi-vector embeddings"""
+        text = "We build genomics pipelines for hospitals. Yes. Also robotics!\nShort."
+        chunks = split_sentences(text, min_chars=20)
+        assert chunks == ["We build genomics pipelines for hospitals.", "Yes. Also robotics! Short."]
+        assert split_sentences("", min_chars=20) == []
+        assert split_sentences("tiny", min_chars=20) == ["tiny"]
+    
+    def test_create_profile_chunks(self):
+        """Test chunks use the same fields as the profile text"""
+        profile = Mock(spec=Profile)
+        profile.research_area = "Machine Learning"
+        profile.description = "Working on neural networks and deep learning. Building labelled datasets for medical imaging research."
+        profile.primary_text = "Ignored while a description exists"
+        
+        chunks = create_profile_chunks(profile)
+        assert chunks[0] == ("research_area", 0, "Machine Learning")
+        assert [field for field, _, _ in chunks[1:]] == ["description", "description"]
+        assert [index for _, index, _ in chunks[1:]] == [0, 1]
+        
+        profile.description = None
+        profile.research_area = None
+        assert create_profile_chunks(profile) == [("primary_text", 0, "Ignored while a description exists")]
+    
+    def test_create_publication_text(self):
+        """Test publication text includes the journal when known"""
+        publication = Publication(title="Deep learning for genomics", journal="Nature", year=2020)
+        assert create_publication_text(publication) == "Deep learning for genomics. Nature"
+        publication.journal = None
+        assert create_publication_text(publication) == "Deep learning for genomics"
+    
     def test_normalize_embedding(self):
         """Test embedding normalization"""
         # Test with numpy array
@@ -199,6 +233,33 @@ class TestEmbeddingTasks:
         assert existing_embedding is not None
         assert existing_embedding.text_sha256 == expected_hash
 
+    
+    @patch('app.tasks.embedding_tasks.get_db')
+    def test_reindex_dispatches_batches_to_bulk_lane(self, mock_get_db):
+        """Reindex fans out batch tasks on the bulk queue without waiting for them"""
+        from app.celery_app import celery_app, EMBEDDING_BULK_QUEUE, EMBEDDING_INTERACTIVE_QUEUE
+        from app.tasks.embedding_tasks import embed_profiles_batch, reindex_all_profiles
+        
+        routes = celery_app.conf.task_routes
+        assert routes[embed_profile.name]["queue"] == EMBEDDING_INTERACTIVE_QUEUE
+        assert routes[embed_profiles_batch.name]["queue"] == EMBEDDING_BULK_QUEUE
+        assert routes[reindex_all_profiles.name]["queue"] == EMBEDDING_BULK_QUEUE
+        
+        mock_db = Mock(spec=Session)
+        mock_get_db.return_value = iter([mock_db])
+        mock_db.query.return_value.count.return_value = 3
+        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.side_effect = [
+            [(1,), (2,)], [(3,)], []
+        ]
+        
+        with patch.object(embed_profiles_batch, 'apply_async') as mock_apply:
+            mock_apply.side_effect = [Mock(id="batch-1"), Mock(id="batch-2")]
+            result = reindex_all_profiles.run(force=True)
+        
+        assert [c.kwargs["args"] for c in mock_apply.call_args_list] == [[[1, 2], True], [[3], True]]
+        assert result["status"] == "dispatched"
+        assert result["batch_task_ids"] == ["batch-1", "batch-2"]
+
 
 class TestDatabaseIntegration:
     """Test database integration for embeddings"""
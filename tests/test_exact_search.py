@@ -0,0 +1,103 @@
+"""
+Tests for the exact in-memory search index
+"""
+import threading
+
+import numpy as np
+
+from app.utils import exact_search
+from app.utils.exact_search import ExactSearchIndex, match_filter_mask, top_k
+
+
+def test_top_k_orders_and_skips_filtered():
+    scores = np.array([0.1, 0.9, -np.inf, 0.5, 0.7], dtype=np.float32)
+    assert top_k(scores, 2).tolist() == [1, 4]
+    assert top_k(scores, 10).tolist() == [1, 4, 3, 0]
+    assert top_k(np.full(3, -np.inf), 2).tolist() == []
+
+
+def test_search_batch_matches_brute_force():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(200, 16)).astype(np.float32)
+    queries = rng.normal(size=(4, 16)).astype(np.float32)
+    index = ExactSearchIndex(np.arange(1000, 1200), embeddings)
+
+    ids, scores = index.search_batch(queries, 10)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    for query, result_ids, result_scores in zip(queries, ids, scores):
+        expected = normalized @ (query / np.linalg.norm(query))
+        assert result_ids.tolist() == (1000 + np.argsort(-expected)[:10]).tolist()
+        np.testing.assert_allclose(result_scores, np.sort(expected)[::-1][:10], rtol=1e-5)
+
+
+def test_filter_masks_and_rerank():
+    index = ExactSearchIndex(
+        [1, 2, 3, 4],
+        np.array([[1, 0], [1, 0.2], [0, 1], [1, 0.1]], dtype=np.float32),
+        {
+            "seek_share": ["Share", "share", "share", "seek"],
+            "status": ["active", "active", "inactive", "active"],
+            "resource_type": ["Data", None, "data sets", "Data"],
+        },
+    )
+    query = np.array([1.0, 0.0])
+
+    mask = match_filter_mask(index, "seek")
+    assert mask.tolist() == [True, False, False, False]
+    assert index.search(query, 5, match_filter_mask(index, "seek", current_user_id=1))[0].tolist() == []
+
+    ids, scores = index.rerank(query, [3, 2, 99, 1])
+    assert ids.tolist() == [1, 2, 3]
+    assert scores[0] == 1.0
+    assert index.rerank(query, [3, 2, 1], k=1)[0].tolist() == [1]
+
+
+def test_search_mutual_prefers_two_sided_matches():
+    # Searcher 1 looks like candidate 3; the query alone prefers candidate 2
+    index = ExactSearchIndex(
+        [1, 2, 3],
+        np.array([[0, 1], [1, 0], [0.8, 0.6]], dtype=np.float32),
+    )
+    query = np.array([1.0, 0.0])
+    mask = np.array([False, True, True])
+
+    assert index.search(query, 2, mask)[0].tolist() == [2, 3]
+
+    ids, scores, query_scores, reciprocal_scores = index.search_mutual(query, 1, 2, 0.5, mask)
+    assert ids.tolist() == [3, 2]
+    np.testing.assert_allclose(query_scores, [0.8, 1.0], rtol=1e-5)
+    np.testing.assert_allclose(reciprocal_scores, [0.6, 0.0], atol=1e-6)
+    np.testing.assert_allclose(scores, [0.7, 0.5], rtol=1e-5)
+
+    ids, scores, query_scores, reciprocal_scores = index.search_mutual(query, 99, 2, 0.5, mask)
+    assert ids.tolist() == [2, 3]
+    assert reciprocal_scores is None
+
+
+def test_stale_memory_index_is_rebuilt_in_the_background(monkeypatch):
+    old = ExactSearchIndex([1], np.ones((1, 2), dtype=np.float32), {})
+    new = ExactSearchIndex([1, 2], np.ones((2, 2), dtype=np.float32), {})
+    release = threading.Event()
+    builds = []
+
+    def slow_build():
+        builds.append(threading.current_thread().name)
+        release.wait(5)
+        return new
+
+    monkeypatch.setattr(exact_search, "_build_memory_index", slow_build)
+    monkeypatch.setattr(exact_search, "_memory_index", old)
+    monkeypatch.setattr(exact_search, "_memory_index_loaded_at", 0.0)
+    monkeypatch.setattr(exact_search, "_memory_index_refreshing", False)
+
+    # Requests keep the old index while a single rebuild runs
+    assert exact_search.get_memory_index() is old
+    assert exact_search.get_memory_index() is old
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "memory-index-refresh":
+            thread.join(5)
+
+    assert builds == ["memory-index-refresh"]
+    assert exact_search.get_memory_index() is new
+    assert not exact_search._memory_index_refreshing
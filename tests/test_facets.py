@@ -0,0 +1,110 @@
+"""
+Tests for facet keys derived from profiles and the profile_facet_counts table
+
+The table tests run against TEST_DATABASE_URL (PostgreSQL) in a scratch schema
+inside one transaction that is rolled back afterwards.
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+
+from app import database
+from app.utils.facets import apply_facet_delta, facet_keys, get_directory_facets, rebuild_facet_counts
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a PostgreSQL database with pgvector"
+)
+
+
+def test_facet_keys_split_resource_types():
+    keys = facet_keys({
+        "seek_share": " Share ",
+        "status": "active",
+        "organization": "Virginia Tech",
+        "research_area": "Genomics",
+        "resource_type": "Data, Equipment ,",
+    })
+    assert sorted(keys) == [
+        ("share", "organization", "Virginia Tech"),
+        ("share", "research_area", "Genomics"),
+        ("share", "resource_type", "Data"),
+        ("share", "resource_type", "Equipment"),
+    ]
+
+
+def test_inactive_or_intentless_profiles_are_not_counted():
+    profile = {"seek_share": "seek", "status": "inactive", "organization": "Virginia Tech"}
+    assert facet_keys(profile) == []
+    assert facet_keys({**profile, "status": "active", "seek_share": None}) == []
+    assert facet_keys({**profile, "status": "active", "organization": "  "}) == []
+
+
+@pytest.fixture
+def pg_connection():
+    engine = create_engine(TEST_DATABASE_URL)
+    connection = engine.connect()
+    transaction = connection.begin()
+    connection.execute(text("CREATE SCHEMA facet_tests"))
+    connection.execute(text("SET LOCAL search_path TO facet_tests, public"))
+    # checkfirst would look in public (the dialect's default schema) and skip tables found there
+    database.Base.metadata.create_all(connection, checkfirst=False)
+    yield connection
+    transaction.rollback()
+    connection.close()
+    engine.dispose()
+
+
+def _counts(connection):
+    rows = connection.execute(select(
+        database.ProfileFacetCount.seek_share, database.ProfileFacetCount.facet,
+        database.ProfileFacetCount.value, database.ProfileFacetCount.count
+    ))
+    return {(seek_share, facet, value): count for seek_share, facet, value, count in rows}
+
+
+@requires_postgres
+def test_apply_facet_delta_moves_counts_and_drops_empty_rows(pg_connection):
+    lab_a = ("share", "organization", "Lab A")
+    lab_b = ("share", "organization", "Lab B")
+    apply_facet_delta(pg_connection, [], [lab_a, lab_a, lab_b])
+    assert _counts(pg_connection) == {lab_a: 2, lab_b: 1}
+
+    apply_facet_delta(pg_connection, [lab_b], [lab_a])
+    assert _counts(pg_connection) == {lab_a: 3}
+
+    # Keys both removed and added cancel out without a write
+    apply_facet_delta(pg_connection, [lab_a], [lab_a])
+    assert _counts(pg_connection) == {lab_a: 3}
+
+
+@requires_postgres
+def test_rebuild_facet_counts_replaces_the_table(pg_connection):
+    pg_connection.execute(insert(database.ProfileFacetCount), [
+        {"seek_share": "share", "facet": "organization", "value": "Stale", "count": 9}
+    ])
+    profiles = [
+        ("share", "active", "Lab A", "Data, Equipment", None),
+        ("share", "active", "Lab A", None, "Genomics"),
+        ("share", "inactive", "Lab B", None, None),
+        ("seek", "active", "Lab C", None, None),
+    ]
+    pg_connection.execute(insert(database.Profile), [
+        {"email": f"{i}@example.org", "name": str(i), "seek_share": seek_share, "status": status,
+         "organization": organization, "resource_type": resource_type, "research_area": research_area}
+        for i, (seek_share, status, organization, resource_type, research_area) in enumerate(profiles)
+    ])
+
+    assert rebuild_facet_counts(pg_connection) == 5
+    assert _counts(pg_connection) == {
+        ("share", "organization", "Lab A"): 2,
+        ("share", "resource_type", "Data"): 1,
+        ("share", "resource_type", "Equipment"): 1,
+        ("share", "research_area", "Genomics"): 1,
+        ("seek", "organization", "Lab C"): 1,
+    }
+    # A seeker's search counts the sharing side of the directory
+    facets = get_directory_facets(pg_connection, "seek")
+    assert facets["organization"] == {"Lab A": 2}
+    assert facets["resource_type"] == {"Data": 1, "Equipment": 1}
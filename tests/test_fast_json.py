@@ -0,0 +1,39 @@
+"""
+Tests for orjson encoding and sparse fieldsets
+"""
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.utils.fast_json import FastJSONResponse, dumps, parse_fields, select_fields
+
+
+def test_dumps_handles_int_keys_numpy_and_fallback():
+    data = {"profiles": {7: {"score": np.float32(0.5)}}, "at": datetime(2024, 1, 2, 3, 4, 5)}
+    decoded = json.loads(dumps(data))
+    assert decoded["profiles"]["7"]["score"] == 0.5
+    assert decoded["at"].startswith("2024-01-02T03:04:05")
+
+
+def test_fast_json_response_matches_json():
+    body = {"matches": [{"id": 1, "name": "Ada", "match_score": 0.91}], "facets": {}}
+    assert json.loads(FastJSONResponse(body).body) == body
+
+
+def test_parse_fields_keeps_id_and_rejects_unknown():
+    assert parse_fields(None, ("id", "name")) is None
+    assert parse_fields(" ", ("id", "name")) is None
+    assert parse_fields("name, organization", ("id", "name", "organization")) == {"id", "name", "organization"}
+    with pytest.raises(HTTPException) as excinfo:
+        parse_fields("name,password", ("id", "name"))
+    assert excinfo.value.status_code == 400
+    assert "password" in excinfo.value.detail
+
+
+def test_select_fields():
+    item = {"id": 1, "name": "Ada", "description": "long text", "publications": [1, 2]}
+    assert select_fields(item, None) is item
+    assert select_fields(item, frozenset({"id", "name"})) == {"id": 1, "name": "Ada"}
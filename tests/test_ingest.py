@@ -0,0 +1,62 @@
+"""
+Tests for the survey CSV ingest normalization and chunking
+"""
+import csv
+
+from app.seed_database import CSV_COLUMNS, iter_chunks, normalize_row
+
+
+def _record(**overrides):
+    record = {column: "" for column in CSV_COLUMNS}
+    record.update({
+        'Email Address': ' Jane.Doe@Example.org ',
+        'Last Name, First Name': 'Doe, Jane',
+        'Research Expertise to seek / share': 'Share',
+        'Brief Description of Resource/Study': 'Biofilm genomics',
+        'Section/Area/Research Areas': 'Infectious Disease',
+        'Status': 'Active',
+    })
+    record.update(overrides)
+    return record
+
+
+def test_normalize_row():
+    row = normalize_row(_record(), source_row=3)
+    assert row['email'] == 'Jane.Doe@Example.org'
+    assert row['seek_share'] == 'share'
+    assert row['status'] == 'active'
+    assert row['organization'] is None
+    assert row['primary_text'] == 'Infectious Disease Biofilm genomics'
+    assert row['source_row'] == 3
+
+
+def test_normalize_row_fallbacks():
+    row = normalize_row(_record(**{
+        'Section/Area/Research Areas': '',
+        'Choose your Section': 'Medicine',
+        'Choose your Research Area(s)': 'Cardiology',
+        'Status': '',
+    }), source_row=1)
+    assert row['research_area'] == 'Medicine, Cardiology'
+    assert row['status'] == 'active'
+
+    assert normalize_row(_record(**{'Email Address': '  '}), source_row=1) is None
+
+
+def test_iter_chunks_resumes(tmp_path):
+    path = tmp_path / "responses.csv"
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(CSV_COLUMNS))
+        writer.writeheader()
+        for i in range(5):
+            writer.writerow(_record(**{'Email Address': f'user{i}@example.org'}))
+
+    chunks = list(iter_chunks(str(path), chunk_size=2))
+    assert [consumed for consumed, _ in chunks] == [2, 4, 5]
+
+    resumed = list(iter_chunks(str(path), chunk_size=2, skip_rows=4))
+    assert len(resumed) == 1
+    consumed, rows = resumed[0]
+    assert consumed == 5
+    assert rows[0]['email'] == 'user4@example.org'
+    assert rows[0]['source_row'] == 5
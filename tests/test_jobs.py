@@ -0,0 +1,135 @@
+"""
+Tests for embedding job progress tracking
+
+These run against TEST_DATABASE_URL (PostgreSQL) in a scratch schema inside
+one transaction that is rolled back afterwards.
+"""
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app import database
+from app.tasks.jobs import add_job_progress, create_job, fail_job, finish_dispatch, get_job, start_job
+
+with patch("sentence_transformers.SentenceTransformer"):
+    from app.tasks import embedding_tasks
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a PostgreSQL database with pgvector"
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(TEST_DATABASE_URL)
+    connection = engine.connect()
+    transaction = connection.begin()
+    connection.execute(text("CREATE SCHEMA job_tests"))
+    connection.execute(text("SET LOCAL search_path TO job_tests, public"))
+    # checkfirst would look in public (the dialect's default schema) and skip tables found there
+    database.Base.metadata.create_all(connection, checkfirst=False)
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+    engine.dispose()
+
+
+def _state(db, job_id):
+    db.expire_all()
+    return get_job(db, job_id)
+
+
+def test_start_job_creates_or_updates_the_row(db):
+    start_job(db, "direct", "profile", 1)
+    assert _state(db, "direct")["status"] == "running"
+
+    create_job(db, "queued", "reindex")
+    assert _state(db, "queued")["status"] == "queued"
+    start_job(db, "queued", "reindex", 5)
+    job = _state(db, "queued")
+    assert (job["status"], job["total"], job["ready"]) == ("running", 5, False)
+
+
+def test_add_job_progress_completes_at_total(db):
+    start_job(db, "job", "reindex", 4)
+    add_job_progress(db, "job", processed=2, skipped=1)
+    job = _state(db, "job")
+    assert (job["status"], job["progress"]) == ("running", 75.0)
+
+    add_job_progress(db, "job", errors=1, message="Profile 9 not found")
+    job = _state(db, "job")
+    assert (job["status"], job["ready"], job["progress"]) == ("completed", True, 100.0)
+    assert (job["processed"], job["skipped"], job["errors"]) == (2, 1, 1)
+    assert job["message"] == "Profile 9 not found"
+
+
+def test_failed_job_stays_failed(db):
+    start_job(db, "job", "reindex", 2)
+    fail_job(db, "job", "broker unreachable")
+    add_job_progress(db, "job", processed=2)
+    job = _state(db, "job")
+    assert (job["status"], job["ready"], job["message"]) == ("failed", True, "broker unreachable")
+
+    finish_dispatch(db, "job", 2)
+    assert _state(db, "job")["status"] == "failed"
+
+
+def test_get_job_of_unknown_id(db):
+    assert get_job(db, "missing") is None
+
+
+def test_dispatching_job_completes_only_at_the_dispatched_total(db):
+    # Counted 2 profiles, but 3 were dispatched because one was added while paging
+    start_job(db, "grown", "reindex", 2, dispatching=True)
+    add_job_progress(db, "grown", processed=2)
+    job = _state(db, "grown")
+    assert (job["status"], job["progress"]) == ("dispatching", 100.0)
+    finish_dispatch(db, "grown", 3)
+    assert _state(db, "grown")["status"] == "running"
+    add_job_progress(db, "grown", processed=1)
+    assert _state(db, "grown")["status"] == "completed"
+
+    # Counted 3, but one was deleted first; batches already covered the other 2
+    start_job(db, "shrunk", "reindex", 3, dispatching=True)
+    add_job_progress(db, "shrunk", processed=2)
+    finish_dispatch(db, "shrunk", 2)
+    assert _state(db, "shrunk")["status"] == "completed"
+
+
+def test_reindex_total_follows_profiles_added_while_paging(db, monkeypatch):
+    def add_profile(profile_id):
+        db.execute(insert(database.Profile).values(id=profile_id, email=f"{profile_id}@example.org", name="p"))
+
+    for profile_id in (1, 2, 3):
+        add_profile(profile_id)
+    db.commit()
+
+    dispatched = []
+
+    def apply_async(args, kwargs):
+        dispatched.append(args[0])
+        if len(dispatched) == 1:
+            add_profile(10)
+        return MagicMock(id=f"batch-{len(dispatched)}")
+
+    monkeypatch.setattr(embedding_tasks, "get_db", lambda: iter([db]))
+    monkeypatch.setattr(embedding_tasks, "REINDEX_BATCH_SIZE", 2)
+    monkeypatch.setattr(embedding_tasks.embed_profiles_batch, "apply_async", apply_async)
+    monkeypatch.setattr(db, "close", lambda: None)
+
+    embedding_tasks.reindex_all_profiles.apply(args=[False], task_id="reindex")
+    assert dispatched == [[1, 2], [3, 10]]
+    job = _state(db, "reindex")
+    assert (job["status"], job["total"]) == ("running", 4)
+
+    add_job_progress(db, "reindex", processed=3)
+    assert _state(db, "reindex")["status"] == "running"
+    add_job_progress(db, "reindex", processed=1)
+    assert _state(db, "reindex")["status"] == "completed"
@@ -0,0 +1,54 @@
+"""
+Tests for the database-free snapshot matcher
+"""
+import numpy as np
+import pyarrow as pa
+
+from app.utils import snapshot_utils
+from app.utils.offline_search import SnapshotMatcher
+
+
+def build_matcher(rows, vectors):
+    schema = snapshot_utils._metadata_schema(pa)
+    table = pa.table([[row.get(name) for row in rows] for name in schema.names], schema=schema)
+    embeddings = np.asarray(vectors, dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return SnapshotMatcher(snapshot_utils.ProfileSnapshot(table, embeddings, {}))
+
+
+def profile(id, seek_share="Share", resource_type="Data", status="active"):
+    return {"id": id, "name": f"P{id}", "seek_share": seek_share, "resource_type": resource_type, "status": status}
+
+
+def test_find_matches_applies_sql_filters():
+    matcher = build_matcher(
+        [
+            profile(1),
+            profile(2, seek_share="seek"),
+            profile(3, status="inactive"),
+            profile(4, resource_type=None),
+            profile(5, resource_type="Equipment"),
+            profile(6),
+        ],
+        [[1, 0], [1, 0], [1, 0], [1, 0], [1, 0.1], [0.5, 1]],
+    )
+
+    matches = matcher.find_matches(np.array([2.0, 0.0]), "Seek")
+    assert [match["id"] for match in matches] == [1, 5, 6]
+    assert matches[0]["match_score"] == 1.0
+    assert matches[0]["embedding_source"] == "snapshot"
+
+    assert [m["id"] for m in matcher.find_matches(np.array([1.0, 0.0]), "seek", "equip")] == [5]
+    assert [m["id"] for m in matcher.find_matches(np.array([1.0, 0.0]), "seek", current_user_id=1)] == [5, 6]
+    assert [m["id"] for m in matcher.find_matches(np.array([1.0, 0.0]), "seek", limit=1)] == [1]
+    assert [m["id"] for m in matcher.find_matches(np.array([1.0, 0.0]), "share")] == [2]
+
+
+def test_find_matches_batch_uses_per_query_filters():
+    matcher = build_matcher(
+        [profile(1), profile(2, seek_share="seek"), profile(3)],
+        [[1, 0], [1, 0], [0, 1]],
+    )
+
+    results = matcher.find_matches_batch(np.array([[1.0, 0.0], [0.0, 1.0]]), [("seek", None), ("share", None)])
+    assert [[m["id"] for m in matches] for matches in results] == [[1, 3], [2]]
@@ -0,0 +1,291 @@
+"""
+Tests for the pgvector match statements
+
+The statement-level checks run without a database. The tests marked
+requires_postgres run the real SQL against TEST_DATABASE_URL (PostgreSQL with
+the pgvector extension); they work on temporary tables that shadow profiles and
+researcher_embeddings (and the chunk and publication tables) for one connection, so no data is
+written.
+"""
+import os
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+with patch("sentence_transformers.SentenceTransformer"):
+    from app import alogirithm
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a PostgreSQL database with pgvector"
+)
+
+
+class RecordingConnection:
+    def __init__(self, scalar=None):
+        self.statements = []
+        self.scalar_result = scalar
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        return self
+
+    def fetchall(self):
+        return []
+
+    def scalar(self):
+        return self.scalar_result
+
+
+class RecordingEngine:
+    def __init__(self, scalar=None):
+        self.connection = RecordingConnection(scalar)
+
+    def connect(self):
+        return self.connection
+
+
+@pytest.fixture(autouse=True)
+def no_legacy_vectors(monkeypatch):
+    """Skip the legacy-vector lookup; tests that need the fallback turn it on"""
+    monkeypatch.setattr(alogirithm, "_legacy_vectors_needed", False)
+
+
+def test_hnsw_ef_search_covers_candidates(monkeypatch):
+    monkeypatch.setattr(alogirithm, "MATCH_HNSW_EF_SEARCH", 40)
+    monkeypatch.setattr(alogirithm, "MATCH_HNSW_EF_FACTOR", 4)
+    assert alogirithm.hnsw_ef_search(5) == 40
+    assert alogirithm.hnsw_ef_search(100) == 400
+    assert alogirithm.hnsw_ef_search(500) == alogirithm.HNSW_EF_SEARCH_MAX
+
+
+def test_ef_search_is_set_in_the_match_transaction(monkeypatch):
+    engine = RecordingEngine()
+    monkeypatch.setattr(alogirithm, "engine", engine)
+    monkeypatch.setattr(alogirithm, "hydrate_matches", lambda matches: matches)
+
+    alogirithm.find_postgres_matches([0.1, 0.2], "seek", None, limit=100, chunk_scoring="off",
+                                     publication_weight=0, mutual_weight=0)
+
+    (set_sql, set_params), (match_sql, match_params) = engine.connection.statements
+    assert "hnsw.ef_search" in set_sql
+    assert int(set_params["ef_search"]) >= match_params["candidate_limit"] == 100
+
+
+def test_hybrid_falls_back_without_search_vector(monkeypatch):
+    engine = RecordingEngine(scalar=False)
+    monkeypatch.setattr(alogirithm, "engine", engine)
+    monkeypatch.setattr(alogirithm, "MATCH_HYBRID", True)
+    monkeypatch.setattr(alogirithm, "_search_vector_available", None)
+
+    assert not alogirithm.hybrid_available()
+    assert not alogirithm.hybrid_available()
+    # The column is looked up once per process
+    assert len(engine.connection.statements) == 1
+    assert "search_vector" in engine.connection.statements[0][0]
+
+    monkeypatch.setattr(alogirithm, "MATCH_HYBRID", False)
+    monkeypatch.setattr(alogirithm, "_search_vector_available", True)
+    assert not alogirithm.hybrid_available()
+
+
+def test_legacy_vectors_are_checked_until_none_are_left(monkeypatch):
+    engine = RecordingEngine(scalar=True)
+    monkeypatch.setattr(alogirithm, "engine", engine)
+    monkeypatch.setattr(alogirithm, "_legacy_vectors_needed", None)
+    clock = [1000.0]
+    monkeypatch.setattr(alogirithm.time, "monotonic", lambda: clock[0])
+
+    # Column lookup, then the legacy-only lookup
+    assert alogirithm.legacy_vectors_needed()
+    assert len(engine.connection.statements) == 2
+    assert alogirithm._profile_vectors_sql() == alogirithm._LEGACY_VECTORS_SQL
+    assert len(engine.connection.statements) == 2
+
+    engine.connection.scalar_result = False
+    clock[0] += alogirithm.LEGACY_VECTORS_RECHECK_SECONDS
+    assert not alogirithm.legacy_vectors_needed()
+    clock[0] += alogirithm.LEGACY_VECTORS_RECHECK_SECONDS
+    assert alogirithm._profile_vectors_sql() == alogirithm._VECTORS_SQL
+    assert len(engine.connection.statements) == 3
+
+
+def test_hybrid_statement_fuses_both_rankings(monkeypatch):
+    engine = RecordingEngine()
+    monkeypatch.setattr(alogirithm, "engine", engine)
+    monkeypatch.setattr(alogirithm, "hydrate_matches", lambda matches: matches)
+
+    alogirithm.find_postgres_matches([0.1, 0.2], "seek", None, query_text="protein folding", limit=5,
+                                     chunk_scoring="off", publication_weight=0, mutual_weight=0)
+
+    _, (sql, params) = engine.connection.statements
+    assert "FULL OUTER JOIN lexical" in sql and "websearch_to_tsquery" in sql
+    assert params["query_text"] == "protein folding"
+    assert params["rrf_k"] == alogirithm.MATCH_RRF_K
+    assert params["candidate_limit"] == max(alogirithm.MATCH_HYBRID_CANDIDATES, 5)
+    assert params["match_limit"] == 5
+
+
+@pytest.fixture
+def pg_engine(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL, poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("""
+            CREATE TEMP TABLE profiles (
+                id integer, seek_share text, resource_type text, status text,
+                search_vector tsvector
+            )
+        """))
+        connection.execute(text("CREATE TEMP TABLE researcher_embeddings (user_id integer, embedding vector(3))"))
+        connection.execute(text("CREATE INDEX ON researcher_embeddings USING hnsw (embedding vector_cosine_ops)"))
+        # Half of the profiles pass the intent filter
+        connection.execute(text("""
+            INSERT INTO profiles
+            SELECT i, CASE WHEN i % 2 = 0 THEN 'share' ELSE 'seek' END, 'expertise', 'active',
+                   to_tsvector('english', 'profile ' || i)
+            FROM generate_series(1, 400) i
+        """))
+        connection.execute(text("""
+            INSERT INTO researcher_embeddings
+            SELECT i, format('[%s,%s,1]', cos(i), sin(i))::vector FROM generate_series(1, 400) i
+        """))
+        connection.execute(text(
+            "CREATE TEMP TABLE profile_chunk_embeddings (profile_id integer, chunk_index integer, embedding vector(3))"
+        ))
+        connection.execute(text("CREATE INDEX ON profile_chunk_embeddings USING hnsw (embedding vector_cosine_ops)"))
+        # Three chunks each for profiles 4k and 4k + 1; profiles 4k + 2 (and 4k + 3) have none
+        connection.execute(text("""
+            INSERT INTO profile_chunk_embeddings
+            SELECT i, k, format('[%s,%s,1]', cos(i + k * 0.01), sin(i + k * 0.01))::vector
+            FROM generate_series(1, 400) i CROSS JOIN generate_series(0, 2) k
+            WHERE i % 4 IN (0, 1)
+        """))
+        connection.execute(text("CREATE TEMP TABLE publications (id integer, title text)"))
+        connection.execute(text(
+            "CREATE TEMP TABLE publication_embeddings (publication_id integer, profile_id integer, embedding vector(3))"
+        ))
+        connection.execute(text("CREATE INDEX ON publication_embeddings USING hnsw (embedding vector_cosine_ops)"))
+        # One publication per profile, pointing the opposite way of its profile vector
+        connection.execute(text("INSERT INTO publications SELECT i, 'Paper ' || i FROM generate_series(1, 400) i"))
+        connection.execute(text("""
+            INSERT INTO publication_embeddings
+            SELECT i, i, format('[%s,%s,1]', -cos(i), -sin(i))::vector FROM generate_series(1, 400) i
+        """))
+        for table in ("profiles", "researcher_embeddings", "profile_chunk_embeddings", "publication_embeddings"):
+            connection.execute(text(f"ANALYZE {table}"))
+        # No other index and no sequential scans: the HNSW index is used as on a full-size table
+        connection.execute(text("SET enable_seqscan = off"))
+    monkeypatch.setattr(alogirithm, "engine", engine)
+    monkeypatch.setattr(alogirithm, "hydrate_matches", lambda matches: matches)
+    yield engine
+    engine.dispose()
+
+
+@requires_postgres
+def test_legacy_only_profiles_are_matched_until_backfilled(pg_engine, monkeypatch):
+    with pg_engine.begin() as connection:
+        connection.execute(text("ALTER TABLE profiles ADD COLUMN embedding vector(3)"))
+        # Profiles 402 and 404 only have the legacy column; profile 2 has both
+        connection.execute(text("""
+            INSERT INTO profiles (id, seek_share, resource_type, status, embedding)
+            VALUES (402, 'share', 'expertise', 'active', '[1,0,1]'), (404, 'share', 'expertise', 'active', '[0,1,1]')
+        """))
+        connection.execute(text("UPDATE profiles SET embedding = '[1,0,1]' WHERE id = 2"))
+
+    assert not {402, 404} & {match["id"] for match in _find(250)}
+
+    monkeypatch.setattr(alogirithm, "_legacy_vectors_needed", True)
+    monkeypatch.setattr(alogirithm, "_legacy_vectors_checked_at", alogirithm.time.monotonic())
+    matches = _find(202)
+    assert len(matches) == 202
+    by_id = {match["id"]: match for match in matches}
+    assert by_id[402]["embedding_source"] == "legacy"
+    assert by_id[402]["match_score"] == pytest.approx(1.0)
+    assert by_id[2]["embedding_source"] == "async"
+    # The profile vector of a profile that has both wins over its legacy one
+    assert [match["id"] for match in matches].count(2) == 1
+
+    hybrid = _find(5, query_text="profile")
+    assert all(match["embedding_source"] in ("async", "legacy") for match in hybrid)
+
+
+def _find(limit, **kwargs):
+    options = {"chunk_scoring": "off", "publication_weight": 0, "mutual_weight": 0}
+    options.update(kwargs)
+    return alogirithm.find_postgres_matches([1.0, 0.0, 1.0], "seek", None, limit=limit, **options)
+
+
+@requires_postgres
+def test_filtered_candidate_pool_larger_than_default_ef_search(pg_engine, monkeypatch):
+    matches = _find(100)
+    assert len(matches) == 100
+    assert all(match["id"] % 2 == 0 for match in matches)
+    scores = [match["match_score"] for match in matches]
+    assert scores == sorted(scores, reverse=True)
+
+    # pgvector's default breadth leaves at most 40 rows to filter
+    monkeypatch.setattr(alogirithm, "MATCH_HNSW_EF_FACTOR", 0)
+    assert len(_find(100)) <= 40
+
+
+@requires_postgres
+def test_chunk_scoring_scans_past_default_ef_search_and_keeps_unchunked_profiles(pg_engine, monkeypatch):
+    monkeypatch.setattr(alogirithm, "MATCH_CHUNK_CANDIDATES", 500)
+    matches = _find(200, chunk_scoring="max")
+    by_source = {}
+    for match in matches:
+        by_source.setdefault(match["embedding_source"], set()).add(match["id"])
+    # Every eligible profile: the 100 with chunks, and the 100 without ranked by their profile vector
+    assert {source: len(ids) for source, ids in by_source.items()} == {"chunks": 100, "async": 100}
+    assert all(profile_id % 4 == 0 for profile_id in by_source["chunks"])
+    assert all(profile_id % 4 == 2 for profile_id in by_source["async"])
+
+    monkeypatch.setattr(alogirithm, "MATCH_HNSW_EF_FACTOR", 0)
+    chunked = [match for match in _find(200, chunk_scoring="max") if match["embedding_source"] == "chunks"]
+    assert len(chunked) <= 40
+
+
+@requires_postgres
+def test_publication_scan_past_default_ef_search(pg_engine, monkeypatch):
+    monkeypatch.setattr(alogirithm, "MATCH_PUBLICATION_CANDIDATES", 200)
+    matches = _find(200, publication_weight=0.5)
+    # All 200 eligible publications are scored, not the ~20 left from a 40-row scan
+    assert len(matches) == 200
+    assert all(match["best_publication"] == f"Paper {match['id']}" for match in matches)
+
+    monkeypatch.setattr(alogirithm, "MATCH_HNSW_EF_FACTOR", 0)
+    scored = [match for match in _find(200, publication_weight=0.5) if match["publication_score"] is not None]
+    assert len(scored) <= 40
+
+
+@requires_postgres
+def test_reciprocal_rank_fusion(pg_engine, monkeypatch):
+    monkeypatch.setattr(alogirithm, "MATCH_HYBRID_CANDIDATES", 50)
+    monkeypatch.setattr(alogirithm, "MATCH_RRF_K", 60)
+    semantic_ids = [match["id"] for match in _find(50)]
+    # Only profile 250 contains the term; it is far down the vector ranking
+    assert 250 not in semantic_ids[:10]
+
+    matches = _find(10, query_text="250")
+    by_id = {match["id"]: match for match in matches}
+    assert 250 in by_id and by_id[250]["lexical_score"] > 0
+
+    for match in matches:
+        expected = 0.0
+        if match["id"] in semantic_ids:
+            expected += 1 / (60 + semantic_ids.index(match["id"]) + 1)
+        if match["lexical_score"] is not None:
+            expected += 1 / (60 + 1)
+        assert match["fused_score"] == pytest.approx(expected)
+    fused = [match["fused_score"] for match in matches]
+    assert fused == sorted(fused, reverse=True)
+    # The lexical hit outranks vector-only neighbours it would otherwise trail
+    assert matches.index(by_id[250]) < 2
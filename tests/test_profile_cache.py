@@ -0,0 +1,55 @@
+"""
+Tests for cached profile responses and ETag handling
+"""
+from app.utils import profile_cache
+
+
+def test_etag_matches_weak_and_lists():
+    etag = 'W/"p-7-3"'
+    assert profile_cache.etag_matches('W/"p-7-3"', etag)
+    assert profile_cache.etag_matches('"p-7-3"', etag)
+    assert profile_cache.etag_matches('"other", W/"p-7-3"', etag)
+    assert profile_cache.etag_matches("*", etag)
+    assert not profile_cache.etag_matches('W/"p-7-2"', etag)
+    assert not profile_cache.etag_matches(None, etag)
+
+
+def test_content_etag_is_stable():
+    body = {"id": 1, "name": "A", "publications": []}
+    assert profile_cache.content_etag(body) == profile_cache.content_etag(dict(reversed(list(body.items()))))
+    assert profile_cache.content_etag(body) != profile_cache.content_etag({**body, "name": "B"})
+
+
+def test_invalidate_profile():
+    profile_cache.cache_profile(profile_cache.profile_key(5), "e1", {"id": 5})
+    profile_cache.cache_profile(profile_cache.me_key(9), "e2", {"id": 9})
+
+    profile_cache.invalidate_profile(profile_id=5)
+    assert profile_cache.get_cached_profile(profile_cache.profile_key(5)) is None
+    assert profile_cache.get_cached_profile(profile_cache.me_key(9)) == ("e2", {"id": 9})
+
+    profile_cache.invalidate_profile(user_id=9)
+    assert profile_cache.get_cached_profile(profile_cache.me_key(9)) is None
+
+
+def test_bulk_invalidation_drops_profiles_and_me_views():
+    profile_cache.cache_profile(profile_cache.profile_key(1), "e1", {"id": 1})
+    profile_cache.cache_profile(profile_cache.profile_key(2), "e2", {"id": 2})
+    profile_cache.cache_profile(profile_cache.me_key(9), "e3", {"id": 9})
+
+    profile_cache.invalidate_profiles([1])
+    assert profile_cache.get_cached_profile(profile_cache.profile_key(1)) is None
+    assert profile_cache.get_cached_profile(profile_cache.profile_key(2)) is not None
+    assert profile_cache.get_cached_profile(profile_cache.me_key(9)) is None
+
+
+def test_fields_etag_distinguishes_representations():
+    etag = profile_cache.content_etag({"id": 1, "name": "A"})
+    assert profile_cache.fields_etag(etag, None) == etag
+    partial = profile_cache.fields_etag(etag, frozenset({"name", "id"}))
+    assert partial == profile_cache.fields_etag(etag, ["id", "name"])
+    assert partial.startswith('W/"') and partial.endswith('"') and "," not in partial
+    # A cached partial body never revalidates the full one, or another field set
+    assert not profile_cache.etag_matches(partial, etag)
+    assert not profile_cache.etag_matches(partial, profile_cache.fields_etag(etag, ["id", "email"]))
+    assert profile_cache.etag_matches(f'"x", {partial}', partial)
@@ -0,0 +1,73 @@
+"""
+Tests for the read-through profile card cache used to hydrate matches
+"""
+from app.utils import profile_cards
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def execute(self):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+def _use_fake_backends(monkeypatch, rows):
+    loads = []
+
+    def load_cards(profile_ids):
+        loads.append(sorted(profile_ids))
+        return {profile_id: rows[profile_id] for profile_id in profile_ids if profile_id in rows}
+
+    redis = FakeRedis()
+    monkeypatch.setattr(profile_cards, "_load_cards", load_cards)
+    monkeypatch.setattr(profile_cards, "PROFILE_CARD_REDIS_URL", "redis://fake")
+    monkeypatch.setattr(profile_cards, "_redis_client", redis)
+    profile_cards.clear_profile_cards()
+    return loads, redis
+
+
+def test_hydrate_reads_each_level_once(monkeypatch):
+    rows = {1: {"id": 1, "name": "Ada"}, 2: {"id": 2, "name": "Grace"}}
+    loads, redis = _use_fake_backends(monkeypatch, rows)
+
+    matches = [{"id": 2, "match_score": 0.9}, {"id": 3, "match_score": 0.8}, {"id": 1, "match_score": 0.7}]
+    hydrated = profile_cards.hydrate_matches(matches)
+    # Order is kept and deleted profiles are dropped
+    assert hydrated == [{"id": 2, "name": "Grace", "match_score": 0.9}, {"id": 1, "name": "Ada", "match_score": 0.7}]
+    assert loads == [[1, 2, 3]]
+    assert set(redis.values) == {"profile_card:1", "profile_card:2"}
+
+    # In-process hits need neither Redis nor the database
+    profile_cards.hydrate_matches(matches[:1])
+    assert loads == [[1, 2, 3]]
+
+    # Another process (empty local cache) is served by Redis
+    profile_cards.clear_profile_cards()
+    assert profile_cards.get_profile_cards([1, 2]) == {1: rows[1], 2: rows[2]}
+    assert loads == [[1, 2, 3]]
+
+
+def test_invalidate_drops_both_levels(monkeypatch):
+    rows = {1: {"id": 1, "name": "Ada"}}
+    loads, redis = _use_fake_backends(monkeypatch, rows)
+    profile_cards.get_profile_cards([1])
+
+    rows[1] = {"id": 1, "name": "Ada Lovelace"}
+    profile_cards.invalidate_profile_cards([1])
+    assert not redis.values
+    assert profile_cards.get_profile_cards([1]) == {1: {"id": 1, "name": "Ada Lovelace"}}
+    assert loads == [[1], [1]]
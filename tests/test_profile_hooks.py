@@ -0,0 +1,212 @@
+"""
+Tests for the profile database hooks
+
+These run real flushes and commits against TEST_DATABASE_URL (PostgreSQL with
+pgvector). Each test builds the schema in a scratch schema inside one outer
+transaction that is rolled back afterwards; session commits only release
+savepoints, so nothing is written.
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app import database, schemas
+from app.hooks import profile_hooks
+from app.routers.profile import update_current_user_profile
+from app.utils import match_cache, profile_cache
+from app.utils.facets import get_directory_facets
+from app.utils.embedding_utils import compute_text_hash, create_profile_text
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a PostgreSQL database with pgvector"
+)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL)
+    connection = engine.connect()
+    transaction = connection.begin()
+    connection.execute(text("CREATE SCHEMA profile_hook_tests"))
+    connection.execute(text("SET LOCAL search_path TO profile_hook_tests, public"))
+    # checkfirst would look in public (the dialect's default schema) and skip tables found there
+    database.Base.metadata.create_all(connection, checkfirst=False)
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+
+    enqueued = []
+    monkeypatch.setattr(profile_hooks, "enqueue_embedding_task", enqueued.append)
+    monkeypatch.setattr(profile_hooks, "invalidate_profile_cards", lambda profile_ids: None)
+    session.enqueued = enqueued
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+    engine.dispose()
+
+
+def _add_user_with_profile(db, email="ada@example.org"):
+    fields = dict(
+        email=email, name="Ada", organization="Lab A", seek_share="share", resource_type="expertise",
+        description="protein folding", research_area="Biology", status="active",
+    )
+    user = database.User(hashed_password="x", **fields)
+    profile = database.Profile(primary_text="Biology protein folding", **fields)
+    db.add_all([user, profile])
+    db.commit()
+    return user, profile
+
+
+def _store_embedding(db, profile):
+    """Mark the profile's current text as embedded"""
+    db.add(database.ResearcherEmbedding(
+        user_id=profile.id, embedding=[0.0] * 384, text_sha256=compute_text_hash(create_profile_text(profile))
+    ))
+    db.commit()
+
+
+def _cache_views(user, profile):
+    profile_cache.cache_profile(profile_cache.profile_key(profile.id), "e1", {"id": profile.id})
+    profile_cache.cache_profile(profile_cache.me_key(user.id), "e2", {"id": user.id})
+
+
+def _cached(user, profile):
+    return (
+        profile_cache.get_cached_profile(profile_cache.profile_key(profile.id)) is not None,
+        profile_cache.get_cached_profile(profile_cache.me_key(user.id)) is not None,
+    )
+
+
+def test_publication_write_drops_cached_profile_views_after_commit(db):
+    user, profile = _add_user_with_profile(db)
+    _cache_views(user, profile)
+
+    publication = database.Publication(profile_id=profile.id, title="Folding at scale")
+    db.add(publication)
+    # The owners are looked up after commit, so the flush only writes
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.connection(), "before_cursor_execute", record)
+    try:
+        db.flush()
+    finally:
+        event.remove(db.connection(), "before_cursor_execute", record)
+    assert not [statement for statement in statements if statement.lstrip().startswith("SELECT")]
+    assert _cached(user, profile) == (True, True)
+    db.commit()
+    assert _cached(user, profile) == (False, False)
+
+    _cache_views(user, profile)
+    db.delete(publication)
+    db.commit()
+    assert _cached(user, profile) == (False, False)
+
+
+def test_profile_update_drops_cached_views_only_when_committed(db):
+    user, profile = _add_user_with_profile(db)
+    _cache_views(user, profile)
+
+    profile.h_index = 12
+    db.flush()
+    db.rollback()
+    assert _cached(user, profile) == (True, True)
+
+    profile.h_index = 12
+    db.commit()
+    assert _cached(user, profile) == (False, False)
+
+
+def test_profile_delete_drops_cached_views(db):
+    user, profile = _add_user_with_profile(db)
+    _cache_views(user, profile)
+
+    db.delete(profile)
+    db.commit()
+    assert _cached(user, profile) == (False, False)
+
+
+def test_profile_and_publication_writes_drop_cached_matches_after_commit(db):
+    user, profile = _add_user_with_profile(db)
+    match_cache.cache_matches("query", [{"id": profile.id}])
+
+    profile.organization = "Lab B"
+    db.flush()
+    db.rollback()
+    assert match_cache.get_cached_matches("query") is not None
+
+    profile.organization = "Lab B"
+    db.commit()
+    assert match_cache.get_cached_matches("query") is None
+
+    match_cache.cache_matches("query", [{"id": profile.id}])
+    db.add(database.Publication(profile_id=profile.id, title="Folding at scale"))
+    db.commit()
+    assert match_cache.get_cached_matches("query") is None
+
+
+def test_profile_writes_keep_facet_counts_current(db):
+    user, profile = _add_user_with_profile(db)
+    _add_user_with_profile(db, email="grace@example.org")
+    assert get_directory_facets(db, "seek")["organization"] == {"Lab A": 2}
+
+    profile.organization = "Lab B"
+    profile.resource_type = "expertise, data"
+    db.commit()
+    facets = get_directory_facets(db, "seek")
+    assert facets["organization"] == {"Lab A": 1, "Lab B": 1}
+    assert facets["resource_type"] == {"expertise": 2, "data": 1}
+
+    # Changing intent moves every count to the other side
+    profile.seek_share = "seek"
+    db.commit()
+    assert get_directory_facets(db, "share")["organization"] == {"Lab B": 1}
+    assert get_directory_facets(db, "seek")["organization"] == {"Lab A": 1}
+
+    db.delete(profile)
+    db.commit()
+    assert get_directory_facets(db, "share") == {"resource_type": {}, "organization": {}, "research_area": {}}
+
+
+def test_update_without_text_change_enqueues_nothing(db):
+    user, profile = _add_user_with_profile(db)
+    _store_embedding(db, profile)
+    db.enqueued.clear()
+    unchanged = schemas.UserProfileUpdate(description="protein folding", research_area="Biology")
+
+    # The route rewrites primary_text, a relevant column, but the embedded text is the same
+    update_current_user_profile(unchanged, user, db)
+    assert profile.primary_text == "Ada Lab A Biology protein folding"
+    assert db.enqueued == []
+
+    # Nothing differs the second time, so nothing is written at all
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.connection(), "before_cursor_execute", record)
+    try:
+        update_current_user_profile(unchanged, user, db)
+    finally:
+        event.remove(db.connection(), "before_cursor_execute", record)
+    assert not [statement for statement in statements if statement.lstrip().startswith(("UPDATE", "INSERT"))]
+    assert db.enqueued == []
+
+
+def test_relevant_update_enqueues_once_after_commit(db, monkeypatch):
+    user, profile = _add_user_with_profile(db)
+    _store_embedding(db, profile)
+    db.enqueued.clear()
+
+    commits = []
+    original_commit = db.commit
+    monkeypatch.setattr(db, "commit", lambda: (commits.append(list(db.enqueued)), original_commit()))
+
+    body = update_current_user_profile(
+        schemas.UserProfileUpdate(description="cryo-EM of membrane proteins", research_area="Structural biology"),
+        user, db
+    )
+    # One commit for the user and profile rows, with nothing enqueued before it
+    assert commits == [[]]
+    assert db.enqueued == [profile.id]
+    assert body["description"] == profile.description == "cryo-EM of membrane proteins"
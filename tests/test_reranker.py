@@ -0,0 +1,64 @@
+"""
+Tests for cross-encoder re-ranking and stage timing
+"""
+import threading
+
+import numpy as np
+
+from app.utils import reranker
+from app.utils.timing import StageTimer
+
+
+class LengthModel:
+    """Scores documents by length; optionally blocks until released"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+
+    def predict(self, pairs):
+        if self.gate is not None:
+            self.gate.wait(5)
+        return np.array([len(document) for _, document in pairs], dtype=float)
+
+
+MATCHES = [
+    {"id": 1, "research_area": "AI"},
+    {"id": 2, "research_area": "Machine learning", "primary_text": "for genomics"},
+    {"id": 3, "research_area": "Robotics"},
+]
+
+
+def test_rerank_orders_by_model_score(monkeypatch):
+    monkeypatch.setattr(reranker, "RERANK_MODEL", "test")
+    monkeypatch.setattr(reranker, "_model", LengthModel())
+
+    ranked, status = reranker.rerank_matches("query", MATCHES)
+    assert status == "ok"
+    assert [match["id"] for match in ranked] == [2, 3, 1]
+    assert ranked[0]["rerank_score"] == len("Machine learning for genomics")
+
+
+def test_rerank_falls_back_to_first_stage_order(monkeypatch):
+    assert reranker.rerank_matches("query", MATCHES) == (MATCHES, "disabled")
+
+    gate = threading.Event()
+    monkeypatch.setattr(reranker, "RERANK_MODEL", "test")
+    monkeypatch.setattr(reranker, "_model", LengthModel(gate))
+    try:
+        assert reranker.rerank_matches("query", MATCHES, budget_ms=20) == (MATCHES, "timeout")
+    finally:
+        gate.set()
+
+
+def test_stage_timer_header():
+    timer = StageTimer()
+    with timer.stage("encode"):
+        pass
+    with timer.stage("rerank"):
+        pass
+    timer.describe("rerank", "timeout")
+
+    header = timer.header()
+    assert header.startswith("encode;dur=")
+    assert header.endswith(';desc="timeout"')
+    assert set(timer.as_dict()) == {"encode", "rerank"}
@@ -0,0 +1,22 @@
+"""
+Tests for saved match helpers
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.routers.matches import parse_match_score
+
+
+def test_parse_match_score():
+    assert parse_match_score("85%") == 85.0
+    assert parse_match_score(" 72.5 % ") == 72.5
+    assert parse_match_score("90") == 90.0
+    assert parse_match_score(64) == 64.0
+    assert parse_match_score(None) is None
+    assert parse_match_score("") is None
+
+
+def test_parse_match_score_rejects_garbage():
+    with pytest.raises(HTTPException) as exc_info:
+        parse_match_score("high")
+    assert exc_info.value.status_code == 422
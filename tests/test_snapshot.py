@@ -0,0 +1,51 @@
+"""
+Tests for memory-mapped profile snapshots
+"""
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+import pytest
+
+from app.utils import snapshot_utils
+
+
+def write_snapshot(path, count=3, format_version=snapshot_utils.SNAPSHOT_FORMAT_VERSION):
+    os.makedirs(path, exist_ok=True)
+    schema = snapshot_utils._metadata_schema(pa)
+    columns = {name: [f"{name}-{i}" for i in range(count)] for name in schema.names}
+    columns["id"] = list(range(10, 10 + count))
+    table = pa.table([columns[name] for name in schema.names], schema=schema)
+    with pa.OSFile(os.path.join(path, snapshot_utils.METADATA_FILE), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+
+    vectors = np.eye(count, snapshot_utils.EMBEDDING_DIMENSION, dtype=np.float32)
+    np.save(os.path.join(path, snapshot_utils.EMBEDDINGS_FILE), vectors)
+    with open(os.path.join(path, snapshot_utils.MANIFEST_FILE), "w") as handle:
+        json.dump({"format_version": format_version, "count": count}, handle)
+
+
+def test_load_snapshot_memory_maps(tmp_path):
+    write_snapshot(str(tmp_path))
+    snapshot = snapshot_utils.load_snapshot(str(tmp_path))
+
+    assert len(snapshot) == 3
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert snapshot.embeddings.dtype == np.float32
+    assert snapshot.ids.tolist() == [10, 11, 12]
+    assert [row["name"] for row in snapshot.rows([2, 0])] == ["name-2", "name-0"]
+    assert snapshot.column("status") == ["status-0", "status-1", "status-2"]
+
+
+def test_load_snapshot_rejects_bad_snapshots(tmp_path):
+    write_snapshot(str(tmp_path / "old"), format_version=0)
+    with pytest.raises(ValueError):
+        snapshot_utils.load_snapshot(str(tmp_path / "old"))
+
+    write_snapshot(str(tmp_path / "torn"))
+    np.save(str(tmp_path / "torn" / snapshot_utils.EMBEDDINGS_FILE), np.zeros((2, 384), dtype=np.float32))
+    with pytest.raises(ValueError):
+        snapshot_utils.load_snapshot(str(tmp_path / "torn"))
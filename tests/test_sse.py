@@ -0,0 +1,27 @@
+"""
+Tests for server-sent event framing
+"""
+import json
+
+from app.utils.sse import sse_event, sse_stream
+
+
+def test_sse_event_is_single_data_line():
+    frame = sse_event("matches", {"stage": "first", "matches": [{"id": 1, "name": "a\nb"}]})
+    assert frame.endswith("\n\n")
+    lines = frame.rstrip("\n").split("\n")
+    assert lines[0] == "event: matches"
+    assert len(lines) == 2
+    assert json.loads(lines[1][len("data: "):])["matches"][0]["name"] == "a\nb"
+
+
+def test_sse_stream_ends_with_error_event_on_failure():
+    def events():
+        yield sse_event("matches", {"stage": "first", "matches": []})
+        raise RuntimeError("database went away")
+
+    frames = list(sse_stream(events()))
+    assert frames[0].startswith("event: matches")
+    assert frames[1].startswith("event: error\n")
+    assert "database went away" not in frames[1]
+    assert len(frames) == 2
@@ -0,0 +1,91 @@
+"""
+Tests for the buffered task publisher and its broker circuit breaker
+"""
+from app.tasks.publisher import TaskPublisher
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTask:
+    name = "fake"
+
+    def __init__(self):
+        self.sent = []
+        self.broker_up = True
+
+    def apply_async(self, args=(), kwargs=None, task_id=None, **options):
+        if not self.broker_up:
+            raise ConnectionError("broker unavailable")
+        self.sent.append((args, task_id))
+
+
+def test_publish_is_buffered_and_replayed_after_outage():
+    clock = FakeClock()
+    publisher = TaskPublisher(breaker=CircuitBreaker(2, 30, clock=clock), start_thread=False)
+    task = FakeTask()
+    task.broker_up = False
+
+    ids = [publisher.publish(task, args=[i]) for i in range(3)]
+    assert publisher.stats()["buffered"] == 3 and not task.sent
+
+    # Two failures open the circuit; further flushes fail fast without calling the broker
+    assert publisher.flush() == 0
+    assert publisher.stats()["circuit"] == "open"
+    assert publisher.stats()["publish_failures"] == 2
+    assert publisher.flush() == 0
+    assert publisher.stats()["publish_failures"] == 2
+
+    # A failed trial publish re-opens the circuit
+    clock.now = 30
+    assert publisher.flush() == 0
+    assert publisher.stats()["circuit"] == "open"
+
+    # Once the broker is back the buffered jobs go out in order, with their original IDs
+    task.broker_up = True
+    clock.now = 60
+    assert publisher.flush() == 3
+    assert task.sent == [((0,), ids[0]), ((1,), ids[1]), ((2,), ids[2])]
+    assert publisher.stats()["circuit"] == "closed"
+    assert publisher.stats()["buffered"] == 0
+
+
+def test_full_buffer_drops_oldest_jobs():
+    publisher = TaskPublisher(max_buffered=2, start_thread=False)
+    task = FakeTask()
+    for i in range(3):
+        publisher.publish(task, args=[i])
+
+    assert publisher.stats()["dropped"] == 1
+    publisher.flush()
+    assert [args for args, _ in task.sent] == [(1,), (2,)]
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, 30, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # Concurrent callers are rejected until the trial reports back
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 60
+    assert breaker.allow() and not breaker.allow()
+    # A trial that never reports back is given up after another reset period
+    clock.now = 90
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()